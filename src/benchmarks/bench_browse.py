@@ -0,0 +1,74 @@
+"""
+Benchmark of the browse view.
+
+For growing corpus sizes, measures the latency and the JSON payload of one page of each listing,
+unfiltered, filtered and sorted by the number of related entities,
+and compares the payload to the previous view, which sent the full lists of IDs and names.
+
+    PYTHONPATH=src python -m benchmarks.bench_browse --sizes 1000 10000 50000
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_database
+from lib.browse import BrowseEntity
+from lib.datahandler import DataHandler
+
+QUERIES: list[tuple[str, BrowseEntity, str, str, bool, int]] = [
+    ("manuscripts_first_page", BrowseEntity.Manuscripts, "", "shelfmark", False, 1),
+    ("manuscripts_page_100", BrowseEntity.Manuscripts, "", "shelfmark", False, 100),
+    ("manuscripts_filtered", BrowseEntity.Manuscripts, "am 1", "date_mean", True, 1),
+    ("manuscripts_by_people", BrowseEntity.Manuscripts, "", "people", True, 1),
+    ("texts_by_manuscripts", BrowseEntity.Texts, "", "manuscripts", True, 1),
+    ("people_filtered", BrowseEntity.People, "son", "last_name", False, 1),
+]
+"""Name, entity, filter, sort key, descending and page of each benchmarked query."""
+
+
+def _time(handler: DataHandler, query: tuple[str, BrowseEntity, str, str, bool, int], repeat: int) -> dict[str, float]:
+    _, entity, search, sort_by, descending, page = query
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = handler.browse(entity, search, sort_by, descending, page)
+        times.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "rows": len(res.rows),
+        "payload_kb": round(len(res.rows.to_json(orient="records").encode("utf-8")) / 1024, 1),
+    }
+
+
+def _legacy_payload_kb(handler: DataHandler) -> float:
+    payload = json.dumps(list(handler.manuscripts)) + json.dumps(handler.texts) + json.dumps(handler.person_names)
+    return round(len(payload.encode("utf-8")) / 1024, 1)
+
+
+def run(sizes: list[int], repeat: int, seed: int) -> list[dict[str, object]]:
+    res: list[dict[str, object]] = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            handler = DataHandler(make_database(str(Path(tmp) / "data.db"), n, seed))
+            row: dict[str, object] = {"corpus_size": n, "legacy_payload_kb": _legacy_payload_kb(handler)}
+            for query in QUERIES:
+                row[query[0]] = _time(handler, query, repeat)
+            res.append(row)
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the browse view.")
+    parser.add_argument("--sizes", "-s", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", "-r", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
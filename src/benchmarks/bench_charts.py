@@ -0,0 +1,73 @@
+"""
+Benchmark of the figure payload size of the metadata charts.
+
+Compares the size of the figure JSON sent to the browser, and the time to build it,
+for the previous charts (one Plotly trace per shelfmark) and the current ones
+(single WebGL traces, binned heatmaps above `charts.SCATTER_MAX_POINTS`), for growing result sizes.
+
+    PYTHONPATH=src python -m benchmarks.bench_charts --sizes 100 1000 5000 20000
+"""
+
+import argparse
+import dataclasses
+import json
+import time
+from typing import Callable
+
+import pandas as pd
+import plotly.express as px
+from plotly.graph_objs import Figure
+
+from benchmarks.synthetic import make_data
+from lib import charts
+
+
+def _legacy_date_plotting(df: pd.DataFrame) -> Figure:
+    df = df[df['terminus_ante_quem'] != 0]
+    df = df[df['terminus_post_quem'] != 0]
+    return px.scatter(df, x='terminus_post_quem', y='terminus_ante_quem', color='shelfmark')
+
+
+def _legacy_dimensions_plotting(df: pd.DataFrame) -> Figure:
+    df = df.assign(width=pd.to_numeric(df["width"], errors='coerce'), height=pd.to_numeric(df["height"], errors='coerce'))
+    return px.scatter(df, x='width', y='height', color=df['support'], hover_name=df['shelfmark'])
+
+
+def _measure(fn: Callable[[pd.DataFrame], object], df: pd.DataFrame) -> dict[str, float]:
+    start = time.perf_counter()
+    fig = fn(df)
+    assert isinstance(fig, Figure)
+    payload = fig.to_json()
+    return {
+        "traces": len(fig.data),
+        "payload_kb": round(len(payload.encode("utf-8")) / 1024, 1),
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def run(sizes: list[int], max_legacy: int) -> list[dict[str, object]]:
+    _, _, manuscripts = make_data(max(sizes))
+    metadata = pd.DataFrame([dataclasses.asdict(m) for m in manuscripts])
+    res: list[dict[str, object]] = []
+    for n in sizes:
+        df = metadata.head(n)
+        row: dict[str, object] = {"manuscripts": n}
+        row["date"] = _measure(charts.date_plotting, df)
+        row["dimensions"] = _measure(charts.dimensions_plotting, df)
+        if n <= max_legacy:
+            row["legacy_date"] = _measure(_legacy_date_plotting, df)
+            row["legacy_dimensions"] = _measure(_legacy_dimensions_plotting, df)
+        res.append(row)
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chart payload sizes.")
+    parser.add_argument("--sizes", "-s", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--max-legacy", type=int, default=5000, help="largest size to run the previous charts for")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.max_legacy), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark of the corpus statistics, precomputed when the database is built, against computing them on request.
+
+A SQLite database is built from synthetic data (see `benchmarks.synthetic`), and the following is timed:
+    - `compute`: computing the statistics from the data, as it is done once when the database is built
+    - `precomputed`: loading the stored statistics into a new `DataHandler`, as the Browse page does
+    - `on_request`: loading the metadata of all manuscripts and the texts of each into DataFrames,
+      and counting manuscripts per century, country, repository and support, and the witnesses of each text
+The results are printed as JSON, one record per scale with the median time of each.
+
+    PYTHONPATH=src python -m benchmarks.bench_corpus_statistics --scales 10000 100000
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks.synthetic import make_data
+from lib import corpus_statistics, utils
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+
+SCALES = [10_000, 100_000]
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _on_request(db: DatabaseSQLiteImpl) -> list[pd.Series]:
+    handler = DataHandler(db)
+    metadata = handler.search_manuscript_data(list(handler.manuscripts))
+    with db.engine.connect() as conn:
+        txm = pd.DataFrame(conn.execute(text("SELECT text_id, manuscript_id FROM textmanuscriptjunction")).all(),
+                           columns=["text_id", "manuscript_id"])
+    return [
+        (metadata["date_mean"] // 100 * 100).value_counts().sort_index(),
+        metadata["country"].value_counts(),
+        metadata["repository"].value_counts(),
+        metadata["support"].value_counts(),
+        txm["text_id"].value_counts().head(corpus_statistics.TOP),
+    ]
+
+
+def run_scale(directory: Path, n_manuscripts: int, repeat: int, seed: int) -> dict[str, Any]:
+    data = make_data(n_manuscripts, seed=seed)
+    db = DatabaseSQLiteImpl(get_engine(str(directory / f"bench-{n_manuscripts}.db")))
+    db.setup_db()
+    db.add_data(*data)
+    db.add_corpus_statistics(corpus_statistics.compute(*data))
+    res = {
+        "scale": n_manuscripts,
+        "compute_ms": _median_ms(lambda: corpus_statistics.compute(*data), repeat),
+        "precomputed_ms": _median_ms(lambda: DataHandler(db).corpus_statistics, repeat),
+        "on_request_ms": _median_ms(lambda: _on_request(db), repeat),
+    }
+    db.engine.dispose()
+    return res
+
+
+def run(scales: list[int], repeat: int, seed: int) -> list[dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        return [run_scale(Path(tmp), scale, repeat, seed) for scale in scales]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark precomputed corpus statistics against computing them on request.")
+    parser.add_argument("--scales", "-s", type=int, nargs="+", default=SCALES, help="numbers of manuscripts")
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    print(json.dumps(run(args.scales, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
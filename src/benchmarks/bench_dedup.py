@@ -0,0 +1,182 @@
+"""
+Benchmark of the unification of catalogue entries into manuscripts.
+
+Adds Danish and English variants of the synthetic catalogue entries,
+with the kinds of differences found in the handrit.is data, until there are the requested number of entries.
+Then compares the previous implementation (copying lists while grouping, recursive pairwise combination,
+printing every conflict) with the current one, and checks that both produce the same manuscripts.
+The standard deviations of the dates are compared to 12 significant digits:
+before Python 3.11, `statistics.stdev()` rounds twice, and may differ in the last bit.
+
+    PYTHONPATH=src python -m benchmarks.bench_dedup --entries 100000
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import make_data
+from lib.database import deduplicate
+from lib.manuscripts import CatalogueEntry, Manuscript
+
+
+def _legacy_unify(entries: list[CatalogueEntry]) -> list[Manuscript]:
+    entries_per_ms: dict[str, list[CatalogueEntry]] = {}
+    for e in entries:
+        k = e.manuscript_id
+        g = entries_per_ms.get(k, [])
+        entries_per_ms[k] = g + [e]
+    return [_legacy_unify_entries(m) for m in entries_per_ms.values()]
+
+
+def _legacy_unify_entries(entries: list[CatalogueEntry]) -> Manuscript:
+    tps = [e.terminus_post_quem for e in entries]
+    tas = [e.terminus_ante_quem for e in entries]
+    return Manuscript(
+        manuscript_id=_legacy_strs(*[e.manuscript_id for e in entries]),
+        shelfmark=_legacy_strs(*[e.shelfmark for e in entries]),
+        catalogue_entries=len(entries),
+        catalogue_ids=" | ".join(e.catalogue_id for e in entries),
+        catalogue_filenames=" | ".join(e.catalogue_filename for e in entries),
+        title=_legacy_strs(*[e.title for e in entries]),
+        description=_legacy_strs(*[e.description for e in entries]),
+        date_string=_legacy_strs(*[e.date_string for e in entries]),
+        terminus_post_quem=max(tps),
+        termini_post_quos=_legacy_strs(*[str(t) for t in tps]),
+        terminus_ante_quem=min(tas),
+        termini_ante_quos=_legacy_strs(*[str(t) for t in tas]),
+        date_mean=int(statistics.mean(tps + tas)),
+        date_standard_deviation=statistics.stdev(tps + tas),
+        support=_legacy_strs(*[e.support for e in entries]),
+        folio=_legacy_ints(*[e.folio for e in entries]),
+        height=_legacy_strs(*[e.height for e in entries]),
+        width=_legacy_strs(*[e.width for e in entries]),
+        extent=_legacy_strs(*[e.extent for e in entries]),
+        origin=_legacy_strs(*[e.origin for e in entries]),
+        creator=_legacy_strs(*[e.creator for e in entries]),
+        country=_legacy_strs(*[e.country for e in entries]),
+        settlement=_legacy_strs(*[e.settlement for e in entries]),
+        repository=_legacy_strs(*[e.repository for e in entries]),
+        texts=list(set.union(*[set(e.texts) for e in entries])),
+        people=list(set.union(*[set(e.people) for e in entries]))
+    )
+
+
+def _legacy_strs(s: str, *ss: str) -> str:
+    if len(ss) < 1:
+        return s
+    elif len(ss) == 1:
+        return _legacy_str(s, ss[0])
+    else:
+        return _legacy_str(s, _legacy_strs(*ss))
+
+
+def _legacy_str(x: str, y: str) -> str:
+    disregard = {"origin unknown", "n/a", "null"}
+    dk = {"Danmark", "Denmark"}
+    cph = {"København", "Copenhagen"}
+    if x == y:
+        return x
+    if y in x:
+        return x
+    if x in y:
+        return y
+    if x.lower() in disregard:
+        return y
+    if y.lower() in disregard:
+        return x
+    if {x, y} == dk:
+        return "Denmark"
+    if {x, y} == cph:
+        return "Copenhagen"
+    r = ' | '.join((x, y))
+    print(f"Failed to unify: {r}")
+    return r
+
+
+def _legacy_ints(x: int, *xx: int) -> int:
+    if len(xx) < 1:
+        return x
+    elif len(xx) == 1:
+        return _legacy_int(x, xx[0])
+    else:
+        return _legacy_int(x, _legacy_ints(*xx))
+
+
+def _legacy_int(x: int, y: int) -> int:
+    if x == y:
+        return x
+    if x == 0:
+        return y
+    if y == 0:
+        return x
+    print(f"Failed to unify: {x} != {y}")
+    return int((x + y) / 2)
+
+
+def make_entries(n_entries: int, seed: int) -> list[CatalogueEntry]:
+    """Creates `n_entries` catalogue entries, about 2 per manuscript, in shuffled order."""
+    rnd = random.Random(seed)
+    _, originals, _ = make_data(max(1, n_entries // 2), seed=seed)
+    entries = list(originals)
+    variants = [("da", "Danmark", "København"), ("en", "Denmark", "Copenhagen")]
+    while len(entries) < n_entries:
+        e = rnd.choice(originals)
+        lang, country, settlement = rnd.choice(variants)
+        entries.append(dataclasses.replace(
+            e,
+            catalogue_id=f"{e.manuscript_id}-{lang}-{len(entries)}",
+            catalogue_filename=f"{e.manuscript_id}-{lang}.xml",
+            title=rnd.choice([e.title, f"{e.title} ({lang})", f"Other title {len(entries)}"]),
+            description=rnd.choice([e.description, "N/A"]),
+            terminus_post_quem=e.terminus_post_quem + rnd.choice([0, 0, -25]),
+            origin=rnd.choice([e.origin, "Origin unknown"]),
+            folio=rnd.choice([e.folio, 0, e.folio + 2]),
+            country=rnd.choice([e.country, country]),
+            settlement=rnd.choice([e.settlement, settlement]),
+            texts=e.texts[:len(e.texts) // 2],
+        ))
+    rnd.shuffle(entries)
+    return entries
+
+
+def _normalized(ms: Manuscript) -> Manuscript:
+    return dataclasses.replace(ms, texts=sorted(ms.texts), people=sorted(ms.people),
+                               date_standard_deviation=float(f"{ms.date_standard_deviation:.12g}"))
+
+
+def run(n_entries: int, seed: int) -> dict[str, object]:
+    entries = make_entries(n_entries, seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        legacy = _legacy_unify(entries)
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    res = deduplicate.unify(entries)
+    current_s = time.perf_counter() - start
+    return {
+        "entries": len(entries),
+        "manuscripts": len(res.manuscripts),
+        "legacy_s": round(legacy_s, 3),
+        "legacy_printed_conflicts": out.getvalue().count("\n"),
+        "current_s": round(current_s, 3),
+        "conflicts": len(res.conflicts),
+        "identical": [_normalized(m) for m in legacy] == [_normalized(m) for m in res.manuscripts],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the unification of catalogue entries.")
+    parser.add_argument("--entries", "-n", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark of the DuckDB implementation of the database against the SQLite one.
+
+Both databases are built from the same synthetic data (see `benchmarks.synthetic`), in temporary files,
+and the following is timed on each:
+    - building the database with `add_data`
+    - the relation queries behind the searches (`ms_x_ppl`, `ppl_x_mss`, `ms_x_txts`, `txts_x_ms`)
+    - `get_metadata`
+    - browsing: the first page of each listing sorted by a count, and a filtered listing
+    - loading the lookups
+    - union and intersection of groups
+
+The results are printed as JSON, one record per case with the median time of each implementation
+and the ratio of DuckDB to SQLite.
+
+    PYTHONPATH=src python -m benchmarks.bench_duckdb --scales 1000 10000 100000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Union
+
+from benchmarks.synthetic import make_data
+from lib import utils
+from lib.browse import BrowseEntity
+from lib.database.duckdb.database_duckdb_impl import (DatabaseDuckDBImpl,
+                                                      get_connection)
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.groups import Group, GroupType
+
+SCALES = [1_000, 10_000, 100_000]
+SIZE = 5
+"""Number of selected items per relation query"""
+METADATA_SIZE = 250
+GROUP_SIZE = 1_000
+
+Database = Union[DatabaseSQLiteImpl, DatabaseDuckDBImpl]
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _cases(db: Database, seed: int) -> list[tuple[str, Callable[[], object]]]:
+    """The timed cases, with selections drawn from the IDs of the database, the same for both implementations."""
+    rnd = random.Random(seed)
+    ms_ids = sorted(db.ms_lookup_dict())
+    person_ids = sorted(db.persons_lookup_dict())
+    texts = sorted(db.txt_lookup_list())
+    mss, ppl, txts = rnd.sample(ms_ids, SIZE), rnd.sample(person_ids, SIZE), rnd.sample(texts, SIZE)
+    metadata = rnd.sample(ms_ids, min(METADATA_SIZE, len(ms_ids)))
+    groups = [Group(GroupType.ManuscriptGroup, f"group {i}", set(rnd.sample(ms_ids, min(GROUP_SIZE, len(ms_ids)))))
+              for i in range(3)]
+    for g in groups:
+        db.add_group(g)
+    group_ids = [g.group_id for g in groups]
+    return [
+        ("ms_x_ppl", lambda: db.ms_x_ppl(ppl)),
+        ("ppl_x_mss", lambda: db.ppl_x_mss(mss)),
+        ("ms_x_txts", lambda: db.ms_x_txts(txts)),
+        ("txts_x_ms", lambda: db.txts_x_ms(mss)),
+        ("get_metadata", lambda: db.get_metadata(metadata)),
+        ("browse_manuscripts_by_people", lambda: db.browse(BrowseEntity.Manuscripts, "", "people", True, 0, 50)),
+        ("browse_texts_by_manuscripts", lambda: db.browse(BrowseEntity.Texts, "", "manuscripts", True, 0, 50)),
+        ("browse_people_search", lambda: db.browse(BrowseEntity.People, "ar", "last_name", False, 0, 50)),
+        ("browse_manuscripts_last_page", lambda: db.browse(BrowseEntity.Manuscripts, "", "shelfmark", False,
+                                                           len(ms_ids) - 50, 50)),
+        ("lookups", lambda: (db.ms_lookup_dict(), db.persons_lookup_dict(), db.txt_lookup_list())),
+        ("union_groups", lambda: db.union_groups(group_ids)),
+        ("intersect_groups", lambda: db.intersect_groups(group_ids)),
+        ("get_all_groups", db.get_all_groups),
+    ]
+
+
+def run_scale(directory: Path, n_manuscripts: int, repeat: int, seed: int) -> list[dict[str, Any]]:
+    data = make_data(n_manuscripts, seed=seed)
+    sqlite = DatabaseSQLiteImpl(get_engine(str(directory / f"bench-{n_manuscripts}.db")))
+    duck = DatabaseDuckDBImpl(get_connection(str(directory / f"bench-{n_manuscripts}.duckdb")))
+    medians: dict[str, dict[str, float]] = {}
+    databases: list[tuple[str, Database]] = [("sqlite", sqlite), ("duckdb", duck)]
+    for name, db in databases:
+        db.setup_db()
+        start = time.perf_counter()
+        db.add_data(*data)
+        medians.setdefault("add_data", {})[name] = round((time.perf_counter() - start) * 1000, 3)
+        for case, fn in _cases(db, seed):
+            fn()
+            medians.setdefault(case, {})[name] = _median_ms(fn, repeat)
+    sqlite.engine.dispose()
+    duck.close()
+    return [{
+        "scale": n_manuscripts,
+        "case": case,
+        "sqlite_ms": m["sqlite"],
+        "duckdb_ms": m["duckdb"],
+        "ratio": round(m["duckdb"] / m["sqlite"], 3) if m["sqlite"] else None,
+    } for case, m in medians.items()]
+
+
+def run(scales: list[int], repeat: int, seed: int) -> list[dict[str, Any]]:
+    res: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            res += run_scale(Path(tmp), scale, repeat, seed)
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the DuckDB database against the SQLite database.")
+    parser.add_argument("--scales", "-s", type=int, nargs="+", default=SCALES, help="numbers of manuscripts")
+    parser.add_argument("--repeat", "-r", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    print(json.dumps(run(args.scales, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
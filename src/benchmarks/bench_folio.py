@@ -0,0 +1,181 @@
+"""
+Micro-benchmark of getting the number of folios from <extent>.
+
+Compares the previous implementation (copying <extent>, removing <dimensions> and <locus>,
+parsing with uncompiled patterns) with the current rule table, and checks that both give the same results.
+
+By default, it runs over extent descriptions in the style of the handrit.is catalogue.
+With `--xml-dir`, it runs over the <extent> elements of the XML files in that directory instead,
+e.g. `data/handrit/Manuscripts`.
+
+    PYTHONPATH=src python -m benchmarks.bench_folio --repeat 200
+"""
+
+import argparse
+import copy
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from lxml import etree
+
+from lib.xml import metadata
+
+TEI = "http://www.tei-c.org/ns/1.0"
+
+EXTENTS = [
+    "45",
+    "112 blöð",
+    "i + 98 + i blöð",
+    "ii + 212 + ii blöð",
+    "iv. 120",
+    "3 + 218 + 3 blöð",
+    "154 blöð alls",
+    " 63 blöð alls (þar af 2 auð)",
+    "i + 45 blöð (þar með talin blöð 1a og 12a)",
+    "78 blöð (blöð 3-4 og 17 eru auð) Auð blöð: 3, 4 og 17.",
+    "Auð blöð: 1v og 45v",
+    "i + 23 + i blöð (blað 12 er yngra). Auð blöð: 23v.",
+    "102 + i blöð (1r-45v (90 bls.) í 8vo)",
+    "i + 356 leaves",
+    "ii + 80 + ii leaves (one leaf missing after fol. 7)",
+    "1 + 36 blade",
+    "<dimensions unit=\"mm\"><height>205</height><width>165</width></dimensions>",
+    "38 blöð <dimensions unit=\"mm\"><height>160</height><width>100</width></dimensions>",
+    "92 blöð <locus from=\"1r\" to=\"92v\">1r-92v</locus> (<dimensions unit=\"mm\"><height>200</height>"
+    "<width>160</width></dimensions>)",
+    "i + 204 + i blöð <dimensions type=\"leaf\" unit=\"mm\"><height>210</height><width>165</width></dimensions>"
+    " <dimensions type=\"written\" unit=\"mm\"><height>170</height><width>120</width></dimensions>",
+    "Tvö bindi: I: 1-120, II: 121-246 blöð",
+    "ca 30 blöð",
+    "",
+    "blöð alls",
+    "1040 blöð (margir hlutar)",
+    "xii blöð",
+    "ⅲ + 24 blöð",
+    "²3 blöð",
+]
+"""Extent descriptions in the style of the catalogue, including the odd ones."""
+
+
+def _legacy_get_digits(text: str) -> int:
+    s = ""
+    for x in text:
+        if x.isdigit():
+            s += x
+    if s:
+        i = int(s)
+    else:
+        i = 0
+    return i
+
+
+def _legacy_get_folio(root: etree._Element) -> int:
+    extent: etree._Element = root.find('.//extent', root.nsmap)
+    if extent is None:
+        return 0
+    extent_copy = copy.copy(extent)
+    dimensions = extent_copy.findall('dimensions', root.nsmap)
+    while dimensions:
+        for d in dimensions:
+            extent_copy.remove(d)
+        dimensions = extent_copy.find('dimensions', root.nsmap)
+    locus = extent_copy.find('locus', root.nsmap)
+    while locus:
+        extent_copy.remove(locus)
+        locus = extent_copy.find('locus', root.nsmap)
+    clean_extent_copy: str = extent_copy.text
+    try:
+        copy_no_period = clean_extent_copy.replace('.', '')
+        copy_no_space = copy_no_period.replace(' ', '')
+        perfect_copy = copy_no_space.isdigit()
+        if perfect_copy:
+            folio_total = int(copy_no_space)
+        else:
+            folio_total = 0
+            given_total: int = clean_extent_copy.find("blöð alls")
+            if given_total > 0:
+                clean_extent_copy = clean_extent_copy[:given_total]
+                folio_total = int(clean_extent_copy)
+            else:
+                given_emptiness = clean_extent_copy.find("Auð blöð")
+                if given_emptiness:
+                    clean_extent_copy = clean_extent_copy[:given_emptiness]
+                clean_extent_copy = re.sub(r"\([^()]*\)", "()", clean_extent_copy)
+                brackets = clean_extent_copy.find("()")
+                if brackets == -1:
+                    folio_total = _legacy_get_digits(clean_extent_copy)
+                else:
+                    while brackets != -1:
+                        first_bit: str = clean_extent_copy[:brackets]
+                        clean_extent_copy = clean_extent_copy[brackets+2:]
+                        brackets = clean_extent_copy.find("()")
+                        folio_n = _legacy_get_digits(first_bit)
+                        if folio_n:
+                            folio_total = folio_total+folio_n
+                    folio_z = _legacy_get_digits(clean_extent_copy)
+                    if folio_z:
+                        folio_total = folio_total+folio_z
+            folio_check: str = str(folio_total)
+            if len(folio_check) > 3:
+                folio_total = 0
+    except Exception:
+        folio_total = 0
+    return folio_total
+
+
+def _document(extent: str) -> etree._Element:
+    xml = (f'<TEI xmlns="{TEI}"><msDesc xml:id="AM01-0001-is"><physDesc><objectDesc><supportDesc>'
+           f'<extent>{extent}</extent></supportDesc></objectDesc></physDesc></msDesc></TEI>')
+    return etree.fromstring(xml)
+
+
+def _load_documents(xml_dir: Optional[str]) -> list[etree._Element]:
+    if not xml_dir:
+        return [_document(e) for e in EXTENTS]
+    res = []
+    for path in sorted(Path(xml_dir).rglob("*.xml")):
+        try:
+            res.append(etree.parse(str(path)).getroot())
+        except etree.XMLSyntaxError:
+            pass
+    return res
+
+
+def _time(fn: Callable[[etree._Element], int], docs: list[etree._Element], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            fn(doc)
+    return (time.perf_counter() - start) / (repeat * len(docs))
+
+
+def run(repeat: int, xml_dir: Optional[str]) -> dict[str, object]:
+    logging.getLogger(metadata.__name__).disabled = True
+    docs = _load_documents(xml_dir)
+    legacy = [_legacy_get_folio(d) for d in docs]
+    current = [metadata.get_folio(d, "AM01-0001-is") for d in docs]
+    legacy_s = _time(_legacy_get_folio, docs, repeat)
+    current_s = _time(lambda d: metadata.get_folio(d, "AM01-0001-is"), docs, repeat)
+    logging.getLogger(metadata.__name__).disabled = False
+    return {
+        "documents": len(docs),
+        "legacy_us": round(legacy_s * 1e6, 2),
+        "current_us": round(current_s * 1e6, 2),
+        "mismatches": [(i, a, b) for i, (a, b) in enumerate(zip(legacy, current)) if a != b],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark getting the number of folios.")
+    parser.add_argument("--repeat", "-r", type=int, default=200)
+    parser.add_argument("--xml-dir", help="run over the XML files in this directory")
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.xml_dir), indent=2))
+
+
+if __name__ == "__main__":
+    main()
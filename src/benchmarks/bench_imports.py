@@ -0,0 +1,60 @@
+"""
+Benchmark of the import time of the entry points of the application.
+
+Imports each module in a fresh interpreter, measures the wall time,
+and reports which parts of the plotting and data stack got loaded along with it.
+
+    PYTHONPATH=src python -m benchmarks.bench_imports --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = ["lib.utils", "ops.db_init", "lib.datahandler", "lib.charts", "plotly.express", "pandas"]
+"""Modules to benchmark. The last ones are for reference."""
+
+HEAVY = ["numpy", "pandas", "plotly", "statsmodels", "scipy", "streamlit"]
+
+_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"s": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _import(module: str) -> dict[str, object]:
+    code = _CODE.format(module=module, heavy=HEAVY)
+    res = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[1],
+                         capture_output=True, text=True, check=True)
+    return dict(json.loads(res.stdout.strip().splitlines()[-1]))
+
+
+def run(repeat: int) -> list[dict[str, object]]:
+    res: list[dict[str, object]] = []
+    for module in MODULES:
+        runs = [_import(module) for _ in range(repeat)]
+        times = [float(str(r["s"])) for r in runs]
+        res.append({
+            "module": module,
+            "median_ms": round(statistics.median(times) * 1000, 1),
+            "min_ms": round(min(times) * 1000, 1),
+            "loaded": runs[0]["loaded"],
+        })
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark import times.")
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of search latency with logging turned off and on.
+
+Runs the same mix of searches with the log level at WARNING, INFO and DEBUG,
+and once more at DEBUG with the log handlers writing synchronously on the calling thread,
+as they did before logging went through the queue listener.
+
+    PYTHONPATH=src python -m benchmarks.bench_logging --manuscripts 20000
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator
+
+from benchmarks.synthetic import make_database
+from lib import utils
+from lib.datahandler import DataHandler
+from lib.utils import SearchOptions
+
+
+def _searches(handler: DataHandler, n: int, seed: int) -> list[Callable[[], object]]:
+    rnd = random.Random(seed)
+    people = list(handler.person_names)
+    mss = list(handler.manuscripts)
+    res: list[Callable[[], object]] = []
+    for _ in range(n):
+        mode = rnd.choice(list(SearchOptions))
+        ppl, ms = rnd.sample(people, 3), rnd.sample(mss, 20)
+        res.append(partial(handler.search_manuscripts_related_to_persons, ppl, mode))
+        res.append(partial(handler.search_persons_related_to_manuscripts, ms, mode))
+        res.append(partial(handler.search_manuscript_data, ms))
+    return res
+
+
+@contextmanager
+def _synchronous_handlers() -> Iterator[None]:
+    """Temporarily replaces the queue handler of all loggers with handlers writing on the calling thread."""
+    loggers = [logging.getLogger(n) for n in logging.root.manager.loggerDict]
+    loggers = [log for log in loggers if isinstance(log, logging.Logger) and log.handlers]
+    queued = {log.name: list(log.handlers) for log in loggers}
+    log_format = logging.Formatter('%(asctime)s [ %(name)s ] - %(levelname)s:   %(message)s')
+    handlers: list[logging.Handler] = [
+        logging.FileHandler('logs/log.log', mode='a', encoding='utf-8'),
+        logging.StreamHandler(sys.stdout),
+    ]
+    for h in handlers:
+        h.setFormatter(log_format)
+    for log in loggers:
+        log.handlers = list(handlers)
+    try:
+        yield
+    finally:
+        for log in loggers:
+            log.handlers = queued[log.name]
+        for h in handlers:
+            h.close()
+
+
+def _time(searches: list[Callable[[], object]]) -> dict[str, float]:
+    times = []
+    for search in searches:
+        start = time.perf_counter()
+        search()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(times[int(len(times) * 0.95)] * 1000, 3),
+        "total_ms": round(sum(times) * 1000, 1),
+    }
+
+
+def run(n_manuscripts: int, n_searches: int, seed: int) -> dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        utils.set_log_level(verbose=False)
+        db = make_database(str(Path(tmp) / "data.db"), n_manuscripts, seed)
+        handler = DataHandler(db)
+        searches = _searches(handler, n_searches, seed)
+        _time(searches)  # warm up
+        res: dict[str, object] = {"manuscripts": n_manuscripts, "searches": len(searches)}
+        res["off"] = _time(searches)
+        utils.set_log_level(verbose=True)
+        res["info"] = _time(searches)
+        utils.set_log_level(debug=True)
+        res["debug"] = _time(searches)
+        with _synchronous_handlers():
+            res["debug_synchronous"] = _time(searches)
+        utils.set_log_level(verbose=False)
+        return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark search latency with logging on and off.")
+    parser.add_argument("--manuscripts", "-m", type=int, default=20000)
+    parser.add_argument("--searches", "-n", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    res = run(args.manuscripts, args.searches, args.seed)
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
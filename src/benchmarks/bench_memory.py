@@ -0,0 +1,146 @@
+"""
+Memory benchmark of the value objects held during a build: catalogue entries, manuscripts and people.
+
+Compares the previous plain frozen dataclasses with the current slotted ones, which intern their repeated strings
+and hold texts and people in tuples. The objects are built from fresh copies of the synthetic values,
+as if each of them had been parsed from its own XML file, and the memory retained by all of them is measured
+with `tracemalloc`.
+
+    PYTHONPATH=src python -m benchmarks.bench_memory --manuscripts 100000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import astuple, dataclass, fields
+from typing import Any, Callable, Iterator
+
+from benchmarks.synthetic import make_data
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+
+@dataclass(frozen=True)
+class LegacyCatalogueEntry:
+    catalogue_id: str
+    shelfmark: str
+    manuscript_id: str
+    catalogue_filename: str
+    title: str
+    description: str
+    date_string: str
+    terminus_post_quem: int
+    terminus_ante_quem: int
+    date_mean: int
+    dating_range: int
+    support: str
+    folio: int
+    height: str
+    width: str
+    extent: str
+    origin: str
+    creator: str
+    country: str
+    settlement: str
+    repository: str
+    texts: list[str]
+    people: list[str]
+
+
+@dataclass(frozen=True)
+class LegacyManuscript:
+    manuscript_id: str
+    shelfmark: str
+    catalogue_entries: int
+    catalogue_ids: str
+    catalogue_filenames: str
+    title: str
+    description: str
+    date_string: str
+    terminus_post_quem: int
+    termini_post_quos: str
+    terminus_ante_quem: int
+    termini_ante_quos: str
+    date_mean: int
+    date_standard_deviation: float
+    support: str
+    folio: int
+    height: str
+    width: str
+    extent: str
+    origin: str
+    creator: str
+    country: str
+    settlement: str
+    repository: str
+    texts: list[str]
+    people: list[str]
+
+
+@dataclass(frozen=True)
+class LegacyPerson:
+    pers_id: str
+    first_name: str
+    last_name: str
+
+
+def _fresh(value: Any) -> Any:
+    """A copy of the value that shares no strings with it, like a value parsed from a separate file."""
+    if isinstance(value, str):
+        return value.encode().decode()
+    if isinstance(value, (list, tuple)):
+        return [_fresh(v) for v in value]
+    return value
+
+
+def _rows(objects: list[Any]) -> Iterator[list[Any]]:
+    for o in objects:
+        yield [_fresh(v) for v in astuple(o)]
+
+
+def _measure(cls: Callable[..., Any], objects: list[Any]) -> dict[str, float]:
+    """Memory retained by the objects, including their values, and the time it takes to create them."""
+    gc.collect()
+    tracemalloc.start()
+    res = [cls(*row) for row in _rows(objects)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del res
+    rows = list(_rows(objects))
+    start = time.perf_counter()
+    res = [cls(*row) for row in rows]
+    seconds = time.perf_counter() - start
+    # the objects are freed after the timing, so that freeing them is not counted
+    del res
+    return {"bytes_per_object": round(retained / len(objects), 1), "total_mb": round(retained / 2**20, 1),
+            "create_us": round(seconds / len(objects) * 1e6, 2)}
+
+
+def run(n_manuscripts: int) -> dict[str, object]:
+    people, entries, manuscripts = make_data(n_manuscripts)
+    res: dict[str, object] = {"scale": n_manuscripts}
+    cases: list[tuple[str, type, type, list[Any]]] = [
+        ("catalogue_entries", LegacyCatalogueEntry, CatalogueEntry, entries),
+        ("manuscripts", LegacyManuscript, Manuscript, manuscripts),
+        ("people", LegacyPerson, Person, people),
+    ]
+    for name, legacy, current, objects in cases:
+        assert [f.name for f in fields(legacy)] == [f.name for f in fields(current)]
+        before, after = _measure(legacy, objects), _measure(current, objects)
+        res[name] = {"count": len(objects), "legacy": before, "current": after,
+                     "saved": round(1 - after["total_mb"] / before["total_mb"], 3)}
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the memory of catalogue entries, manuscripts and people.")
+    parser.add_argument("--manuscripts", "-m", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.manuscripts), indent=2))
+
+
+if __name__ == "__main__":
+    main()
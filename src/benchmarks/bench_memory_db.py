@@ -0,0 +1,115 @@
+"""
+Benchmark of the in-memory database against the SQLite database it is loaded from.
+
+A SQLite database is built from synthetic data (see `benchmarks.synthetic`) and loaded into a `DatabaseMemoryImpl`.
+The time and the traced memory it takes to load it are recorded, and the relation queries, `get_metadata`
+and the lookups are timed on both.
+The results are printed as JSON, one record per case with the median time of each and the ratio of memory to SQLite.
+
+    PYTHONPATH=src python -m benchmarks.bench_memory_db --scales 1000 10000 100000
+"""
+
+import argparse
+import functools
+import json
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Union
+
+from benchmarks.synthetic import make_database
+from lib import utils
+from lib.database.memory.database_memory_impl import DatabaseMemoryImpl
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+
+SCALES = [1_000, 10_000, 100_000]
+SIZES = [1, 25]
+"""Numbers of selected items per relation query"""
+METADATA_SIZE = 250
+
+Database = Union[DatabaseSQLiteImpl, DatabaseMemoryImpl]
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _cases(db: Database, seed: int) -> list[tuple[str, int, Callable[[], object]]]:
+    """The timed cases, with selections drawn from the IDs of the database, the same for both implementations."""
+    rnd = random.Random(seed)
+    ms_ids = sorted(db.ms_lookup_dict())
+    person_ids = sorted(db.persons_lookup_dict())
+    texts = sorted(db.txt_lookup_list())
+    res: list[tuple[str, int, Callable[[], object]]] = []
+    for size in SIZES:
+        mss, ppl, txts = rnd.sample(ms_ids, size), rnd.sample(person_ids, size), rnd.sample(texts, size)
+        res += [
+            ("ms_x_ppl", size, functools.partial(db.ms_x_ppl, ppl)),
+            ("ppl_x_mss", size, functools.partial(db.ppl_x_mss, mss)),
+            ("ms_x_txts", size, functools.partial(db.ms_x_txts, txts)),
+            ("txts_x_ms", size, functools.partial(db.txts_x_ms, mss)),
+        ]
+    metadata = rnd.sample(ms_ids, min(METADATA_SIZE, len(ms_ids)))
+    res += [
+        ("get_metadata", len(metadata), lambda: db.get_metadata(metadata)),
+        ("lookups", 0, lambda: (db.ms_lookup_dict(), db.persons_lookup_dict(), db.txt_lookup_list())),
+    ]
+    return res
+
+
+def run_scale(directory: Path, n_manuscripts: int, repeat: int, seed: int) -> list[dict[str, Any]]:
+    sqlite = make_database(str(directory / f"bench-{n_manuscripts}.db"), n_manuscripts, seed)
+    tracemalloc.start()
+    start = time.perf_counter()
+    memory = DatabaseMemoryImpl(sqlite)
+    load_ms = (time.perf_counter() - start) * 1000
+    load_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    res: list[dict[str, Any]] = [{"scale": n_manuscripts, "case": "load", "size": 0, "sqlite_ms": None,
+                                  "memory_ms": round(load_ms, 3), "memory_mb": round(load_mb, 1), "ratio": None}]
+    medians: dict[tuple[str, int], dict[str, float]] = {}
+    databases: list[tuple[str, Database]] = [("sqlite", sqlite), ("memory", memory)]
+    for name, db in databases:
+        for case, size, fn in _cases(db, seed):
+            fn()
+            medians.setdefault((case, size), {})[name] = _median_ms(fn, repeat)
+    sqlite.engine.dispose()
+    res += [{
+        "scale": n_manuscripts,
+        "case": case,
+        "size": size,
+        "sqlite_ms": m["sqlite"],
+        "memory_ms": m["memory"],
+        "ratio": round(m["memory"] / m["sqlite"], 3) if m["sqlite"] else None,
+    } for (case, size), m in medians.items()]
+    return res
+
+
+def run(scales: list[int], repeat: int, seed: int) -> list[dict[str, Any]]:
+    res: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            res += run_scale(Path(tmp), scale, repeat, seed)
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory database against the SQLite database.")
+    parser.add_argument("--scales", "-s", type=int, nargs="+", default=SCALES, help="numbers of manuscripts")
+    parser.add_argument("--repeat", "-r", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    print(json.dumps(run(args.scales, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
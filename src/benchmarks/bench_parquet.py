@@ -0,0 +1,109 @@
+"""
+Benchmark of reading the database for analysis from the Parquet export, against querying the SQLite database.
+
+A SQLite database is built from synthetic data (see `benchmarks.synthetic`) and exported to Parquet.
+The following is timed on both, loading into pandas as an analyst would:
+    - the full `manuscripts` table, with the joined termini split into lists of years
+    - the full `personmanuscriptjunction` table
+    - the manuscripts dated before 1400, with the filter pushed down to the Parquet row groups
+The time of the export and the sizes of the database and the dataset are recorded as well.
+The results are printed as JSON, one record per case with the median time of each and the ratio of Parquet to SQLite.
+
+    PYTHONPATH=src python -m benchmarks.bench_parquet --scales 10000 100000
+"""
+
+import argparse
+import json
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import make_database
+from lib import utils
+from lib.database import parquet
+
+SCALES = [10_000, 100_000]
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _size_mb(path: Path) -> float:
+    files = [path] if path.is_file() else list(path.iterdir())
+    return round(sum(p.stat().st_size for p in files) / 2**20, 1)
+
+
+def run_scale(directory: Path, n_manuscripts: int, repeat: int, seed: int) -> list[dict[str, Any]]:
+    db_path = directory / f"bench-{n_manuscripts}.db"
+    dataset = directory / f"parquet-{n_manuscripts}"
+    db = make_database(str(db_path), n_manuscripts, seed)
+    start = time.perf_counter()
+    parquet.export_parquet(db, str(dataset), commit="")
+    export_ms = (time.perf_counter() - start) * 1000
+    conn = sqlite3.connect(db_path)
+
+    def sqlite_manuscripts() -> pd.DataFrame:
+        df = pd.read_sql_query("SELECT * FROM manuscripts", conn)
+        for c in ("termini_post_quos", "termini_ante_quos"):
+            df[c] = df[c].map(lambda v: [int(x) for x in v.split(" | ")])
+        return df
+
+    def sqlite_query(sql: str) -> Callable[[], pd.DataFrame]:
+        return lambda: pd.read_sql_query(sql, conn)
+
+    def read(name: str, **kwargs: Any) -> Callable[[], pd.DataFrame]:
+        return lambda: pq.read_table(dataset / f"{name}.parquet", memory_map=True, **kwargs).to_pandas()
+
+    cases = [
+        ("manuscripts", sqlite_manuscripts, read("manuscripts")),
+        ("personmanuscriptjunction", sqlite_query("SELECT * FROM personmanuscriptjunction"),
+         read("personmanuscriptjunction")),
+        ("manuscripts_before_1400", sqlite_query("SELECT * FROM manuscripts WHERE date_mean < 1400"),
+         read("manuscripts", filters=[("date_mean", "<", 1400)])),
+    ]
+    res: list[dict[str, Any]] = [{
+        "scale": n_manuscripts, "case": "export", "sqlite_ms": None, "parquet_ms": round(export_ms, 3),
+        "sqlite_mb": _size_mb(db_path), "parquet_mb": _size_mb(dataset), "ratio": None,
+    }]
+    for case, sqlite_fn, parquet_fn in cases:
+        assert len(sqlite_fn()) == len(parquet_fn())
+        sqlite_ms, parquet_ms = _median_ms(sqlite_fn, repeat), _median_ms(parquet_fn, repeat)
+        res.append({"scale": n_manuscripts, "case": case, "sqlite_ms": sqlite_ms, "parquet_ms": parquet_ms,
+                    "ratio": round(parquet_ms / sqlite_ms, 3) if sqlite_ms else None})
+    conn.close()
+    db.engine.dispose()
+    return res
+
+
+def run(scales: list[int], repeat: int, seed: int) -> list[dict[str, Any]]:
+    res: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            res += run_scale(Path(tmp), scale, repeat, seed)
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark reading the Parquet export against querying SQLite.")
+    parser.add_argument("--scales", "-s", type=int, nargs="+", default=SCALES, help="numbers of manuscripts")
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    print(json.dumps(run(args.scales, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark suite of the search paths of the `DataHandler`, over synthetic databases at several scales.
+
+For each scale (number of manuscripts), a database with power-law distributed people and texts per manuscript
+is built (see `benchmarks.synthetic`), and the following are timed:
+    - every `DataHandler.search_*` method, in AND and OR mode, for several selection sizes
+    - `search_manuscript_data`, for several selection sizes
+    - loading all groups into a new handler
+    - creating a handler and loading its lookups, from the database and from the lookup snapshot
+
+Selections are drawn at random from all IDs, with a fixed seed, so the same cases are timed on every run.
+The results are printed as JSON, one record per case, keyed by `scale`, `case`, `mode` and `size`.
+Passing the output of an earlier run with `--compare` adds the ratio of the current to the earlier median to each record,
+e.g. to compare two commits:
+
+    PYTHONPATH=src python -m benchmarks.bench_search --scales 1000 10000 --output before.json
+    git checkout ...
+    PYTHONPATH=src python -m benchmarks.bench_search --scales 1000 10000 --compare before.json
+
+Building the databases takes a while at large scales. With `--cache-dir`, they are kept and reused between runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks.synthetic import make_database
+from lib import utils
+from lib.database import snapshot
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+from lib.groups import Group, GroupType
+from lib.utils import SearchOptions
+
+SCALES = [1_000, 10_000, 100_000]
+SIZES = [1, 5, 25]
+METADATA_SIZES = [1, 25, 250]
+GROUPS = 50
+"""Number of groups of each type added to the database"""
+
+
+def _time(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    p95 = statistics.quantiles(times, n=20)[-1] if len(times) > 1 else times[0]
+    return {"median_ms": round(statistics.median(times), 3), "p95_ms": round(p95, 3), "min_ms": round(min(times), 3)}
+
+
+def _database(path: Path, n_manuscripts: int, seed: int) -> DatabaseSQLiteImpl:
+    """Opens the database at `path`, building it first if it does not exist yet."""
+    if path.exists():
+        db = DatabaseSQLiteImpl(get_engine(str(path)))
+        db.setup_db()
+        return db
+    db = make_database(str(path), n_manuscripts, seed)
+    rnd = random.Random(seed)
+    ms_ids, person_ids, texts = db.ms_lookup_dict(), db.persons_lookup_dict(), db.txt_lookup_list()
+    for group_type, ids in ((GroupType.ManuscriptGroup, list(ms_ids)), (GroupType.PersonGroup, list(person_ids)),
+                            (GroupType.TextGroup, texts)):
+        for i in range(GROUPS):
+            db.add_group(Group(group_type, f"{group_type.value} {i}", set(rnd.sample(ids, min(len(ids), 1 + i * 4)))))
+    return db
+
+
+def run_scale(db_path: Path, n_manuscripts: int, sizes: list[int], metadata_sizes: list[int], repeat: int,
+              seed: int) -> list[dict[str, Any]]:
+    cached = db_path.exists()
+    start = time.perf_counter()
+    db = _database(db_path, n_manuscripts, seed)
+    build_s = time.perf_counter() - start
+    handler = DataHandler(db)
+    ms_ids, person_ids, texts = list(handler.manuscripts), list(handler.person_names), list(handler.texts)
+    rnd = random.Random(seed)
+    res: list[dict[str, Any]] = []
+
+    def add(case: str, mode: str, size: int, fn: Callable[[], object]) -> None:
+        res.append({"scale": n_manuscripts, "case": case, "mode": mode, "size": size, **_time(fn, repeat)})
+
+    searches: list[tuple[str, list[str], Callable[[list[str], SearchOptions], list[str]]]] = [
+        ("search_manuscripts_containing_texts", texts, handler.search_manuscripts_containing_texts),
+        ("search_texts_contained_by_manuscripts", ms_ids, handler.search_texts_contained_by_manuscripts),
+        ("search_persons_related_to_manuscripts", ms_ids, handler.search_persons_related_to_manuscripts),
+        ("search_manuscripts_related_to_persons", person_ids, handler.search_manuscripts_related_to_persons),
+    ]
+    for case, ids, search in searches:
+        for size in sizes:
+            selection = rnd.sample(ids, min(size, len(ids)))
+            for option in SearchOptions:
+                add(case, option.value, size, lambda: search(selection, option))
+    for size in metadata_sizes:
+        selection = rnd.sample(ms_ids, min(size, len(ms_ids)))
+        add("search_manuscript_data", "", size, lambda: handler.search_manuscript_data(selection))
+    add("get_all_groups", "", GROUPS * 3, lambda: DataHandler(db).get_all_groups())
+
+    def startup(snapshot_path: Optional[str]) -> None:
+        h = DataHandler(db, snapshot_path)
+        h.manuscripts, h.person_names, h.texts
+
+    add("handler_startup", "database", 0, lambda: startup(None))
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = str(Path(tmp) / "lookups.snapshot")
+        snapshot.write_snapshot(db, snapshot_path)
+        add("handler_startup", "snapshot", 0, lambda: startup(snapshot_path))
+    res.append({"scale": n_manuscripts, "case": "build_database", "mode": "cached" if cached else "", "size": 0,
+                "median_ms": round(build_s * 1000, 3), "p95_ms": None, "min_ms": None})
+    db.engine.dispose()
+    return res
+
+
+def _key(record: dict[str, Any]) -> tuple[Any, ...]:
+    return record["scale"], record["case"], record["mode"], record["size"]
+
+
+def compare(results: list[dict[str, Any]], baseline: dict[str, Any]) -> None:
+    """Adds the baseline median and the ratio of the current to the baseline median to each record found in the baseline."""
+    earlier = {_key(r): r for r in baseline["results"]}
+    for r in results:
+        b = earlier.get(_key(r))
+        if b and b["median_ms"]:
+            r["baseline_median_ms"] = b["median_ms"]
+            r["ratio"] = round(r["median_ms"] / b["median_ms"], 3)
+
+
+def _commit() -> Optional[str]:
+    try:
+        res = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return res.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales: list[int], sizes: list[int], metadata_sizes: list[int], repeat: int, seed: int,
+        cache_dir: Optional[str]) -> dict[str, Any]:
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(cache_dir or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+        for scale in scales:
+            results += run_scale(directory / f"search-{scale}-{seed}.db", scale, sizes, metadata_sizes, repeat, seed)
+    return {
+        "meta": {
+            "commit": _commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the searches of the DataHandler over synthetic databases.")
+    parser.add_argument("--scales", "-s", type=int, nargs="+", default=SCALES, help="numbers of manuscripts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of selected items per search")
+    parser.add_argument("--metadata-sizes", type=int, nargs="+", default=METADATA_SIZES,
+                        help="numbers of manuscripts to get the metadata of")
+    parser.add_argument("--repeat", "-r", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", help="keep the synthetic databases in this directory and reuse them")
+    parser.add_argument("--output", "-o", help="write the results to this file instead of printing them")
+    parser.add_argument("--compare", "-c", help="results of an earlier run to compare with")
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    res = run(args.scales, args.sizes, args.metadata_sizes, args.repeat, args.seed, args.cache_dir)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(res["results"], json.load(f))
+    out = json.dumps(res, indent=2)
+    if args.output:
+        Path(args.output).write_text(out, encoding="utf-8")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
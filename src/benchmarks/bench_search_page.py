@@ -0,0 +1,78 @@
+"""
+Benchmark of rendering the selection widgets of the Search page.
+
+Renders the multiselects of the four search forms with Streamlit in bare mode (without a server),
+once building option lists and labels on every rerun (the previous behaviour),
+and once with the option lists and labels precomputed by the `DataHandler`.
+
+    PYTHONPATH=src python -m benchmarks.bench_search_page --manuscripts 20000
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import streamlit as st
+
+from benchmarks.synthetic import make_database
+from lib.datahandler import DataHandler
+
+
+def _time(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(times) * 1000, 2), "min_ms": round(min(times) * 1000, 2)}
+
+
+def run(n_manuscripts: int, repeat: int) -> dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_database(str(Path(tmp) / "data.db"), n_manuscripts)
+        handler = DataHandler(db)
+        handler.manuscripts, handler.person_names, handler.texts
+
+        def render_uncached() -> None:
+            st.multiselect('Select Person', list(handler.person_names.keys()),
+                           format_func=lambda x: f"{handler.person_names[x]} ({x})")
+            for what in ("Manuscript", "Text"):
+                st.multiselect(f'Select {what}', list(handler.manuscripts.keys()),
+                               format_func=lambda x: f"{' / '.join(handler.manuscripts[x])} ({x})")
+            st.multiselect('Select Text', list(handler.texts))
+
+        def render_cached() -> None:
+            for what, options in (("Person", handler.person_options), ("Manuscript", handler.manuscript_options),
+                                  ("Text", handler.manuscript_options), ("Text", handler.text_options)):
+                st.multiselect(f'Select {what}', options.keys, format_func=options.format)
+
+        start = time.perf_counter()
+        handler.person_options, handler.manuscript_options, handler.text_options
+        build_ms = round((time.perf_counter() - start) * 1000, 2)
+        return {
+            "manuscripts": n_manuscripts,
+            "people": len(handler.person_names),
+            "texts": len(handler.texts),
+            "uncached": _time(render_uncached, repeat),
+            "cached": _time(render_cached, repeat),
+            "options_build_once_ms": build_ms,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rendering the Search page selection widgets.")
+    parser.add_argument("--manuscripts", "-m", type=int, default=20000)
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    args = parser.parse_args()
+    # silence the warnings about running without `streamlit run`
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(json.dumps(run(args.manuscripts, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
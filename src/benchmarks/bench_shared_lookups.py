@@ -0,0 +1,131 @@
+"""
+Benchmark of the memory the lookups take in each of several worker processes, mapped from the lookup snapshot
+or unpickled, as the lookup snapshot was read before it was mapped.
+
+A SQLite database is built from synthetic data (see `benchmarks.synthetic`), and its lookups written both ways.
+Each worker is a separate process, started fresh, that creates a `DataHandler` with the lookups,
+reads every entry of them and the label of every selection option,
+and reports the growth of its memory from `/proc/self/smaps_rollup` (Linux only):
+`private_mb` is the memory charged to the worker alone, `pss_mb` its proportional share of the pages shared with others.
+The median time of a lookup by key is recorded as well, and the time of formatting the labels of all person options
+once more after that, as Streamlit does on every rerun of a page with the person selection.
+
+    PYTHONPATH=src python -m benchmarks.bench_shared_lookups --manuscripts 100000 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import pickle
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+from benchmarks.synthetic import make_database
+from lib import utils
+from lib.database import snapshot
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+
+LOOKUPS = 1_000
+
+
+def _memory_mb() -> dict[str, float]:
+    res: dict[str, float] = {}
+    for line in Path("/proc/self/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":")
+        res[key] = int(value.split()[0]) / 1024
+    return {"private_mb": res["Private_Clean"] + res["Private_Dirty"], "pss_mb": res["Pss"]}
+
+
+def _read_all(handler: DataHandler) -> None:
+    for lookup in (handler.person_names, handler.person_names_inverse, handler.manuscripts):
+        for _ in lookup.items():
+            pass
+    for options in (handler.manuscript_options, handler.person_options, handler.text_options):
+        for k in options.keys:
+            options.format(k)
+
+
+def _median_us(lookup: Mapping[str, Any], keys: Sequence[str]) -> float:
+    times = []
+    for k in keys:
+        start = time.perf_counter()
+        lookup[k]
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return round(statistics.median(times), 3)
+
+
+def _worker(kind: str, db_path: str, path: str, seed: int) -> dict[str, Any]:
+    utils.set_log_level(verbose=False)
+    db = DatabaseSQLiteImpl(get_engine(db_path))
+    db.get_generation()
+    before = _memory_mb()
+    if kind == "mapped":
+        handler = DataHandler(db, path)
+    else:
+        handler = DataHandler(db)
+        lookups = pickle.loads(Path(path).read_bytes())
+        handler.person_names = lookups["person_names"]
+        handler.person_names_inverse = lookups["person_names_inverse"]
+        handler.manuscripts = lookups["manuscripts"]
+        handler.texts = lookups["texts"]
+    _read_all(handler)
+    after = _memory_mb()
+    keys = random.Random(seed).sample(list(handler.manuscripts), min(LOOKUPS, len(handler.manuscripts)))
+    res: dict[str, Any] = {k: round(after[k] - before[k], 1) for k in after}
+    res["lookup_us"] = _median_us(handler.manuscripts, keys)
+    start = time.perf_counter()
+    for k in handler.person_options.keys:
+        handler.person_options.format(k)
+    res["rerun_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return res
+
+
+def run(n_manuscripts: int, n_workers: int, seed: int) -> list[dict[str, Any]]:
+    res: list[dict[str, Any]] = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "data.db")
+        db = make_database(db_path, n_manuscripts, seed)
+        paths = {"mapped": str(Path(tmp) / "lookups.snapshot"), "pickle": str(Path(tmp) / "lookups.pickle")}
+        snapshot.write_snapshot(db, paths["mapped"])
+        lookups = snapshot.make_snapshot(db)
+        previous = {k: getattr(lookups, k)
+                    for k in ("generation", "person_names", "person_names_inverse", "manuscripts", "texts")}
+        Path(paths["pickle"]).write_bytes(pickle.dumps(previous, pickle.HIGHEST_PROTOCOL))
+        db.engine.dispose()
+        for kind, path in paths.items():
+            with context.Pool(n_workers) as pool:
+                workers = pool.starmap(_worker, [(kind, db_path, path, seed)] * n_workers)
+            res.append({
+                "manuscripts": n_manuscripts,
+                "kind": kind,
+                "workers": n_workers,
+                "file_mb": round(Path(path).stat().st_size / 2**20, 1),
+                "private_mb_per_worker": statistics.median(w["private_mb"] for w in workers),
+                "pss_mb_per_worker": statistics.median(w["pss_mb"] for w in workers),
+                "private_mb_total": round(sum(w["private_mb"] for w in workers), 1),
+                "lookup_us": statistics.median(w["lookup_us"] for w in workers),
+                "person_options": len(lookups.person_keys),
+                "rerun_ms": statistics.median(w["rerun_ms"] for w in workers),
+            })
+    return res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the memory of mapped and unpickled lookups per worker.")
+    parser.add_argument("--manuscripts", "-m", type=int, default=100_000)
+    parser.add_argument("--workers", "-w", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    utils.set_log_level(verbose=False)
+    print(json.dumps(run(args.manuscripts, args.workers, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of the `DataHandler` start-up time.
+
+Compares eagerly loading all lookups from the database (the previous behaviour),
+creating the handler with lazy lookups, and loading the lookups from the lookup snapshot.
+
+    PYTHONPATH=src python -m benchmarks.bench_startup --manuscripts 20000
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import make_database
+from lib.database import snapshot
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+
+
+def _time(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(times) * 1000, 2), "min_ms": round(min(times) * 1000, 2)}
+
+
+def run(n_manuscripts: int, repeat: int) -> dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "data.db")
+        snapshot_path = str(Path(tmp) / "lookups.snapshot")
+        make_database(db_path, n_manuscripts)
+        db = DatabaseSQLiteImpl(get_engine(db_path))
+        snapshot.write_snapshot(db, snapshot_path)
+
+        def eager() -> None:
+            h = DataHandler(db)
+            h.person_names_inverse, h.manuscripts, h.texts
+
+        def lazy() -> None:
+            DataHandler(db)
+
+        def from_snapshot() -> None:
+            h = DataHandler(db, snapshot_path)
+            h.person_names_inverse, h.manuscripts, h.texts
+
+        return {
+            "manuscripts": n_manuscripts,
+            "snapshot_bytes": Path(snapshot_path).stat().st_size,
+            "eager": _time(eager, repeat),
+            "lazy_no_access": _time(lazy, repeat),
+            "snapshot": _time(from_snapshot, repeat),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark DataHandler start-up.")
+    parser.add_argument("--manuscripts", "-m", type=int, default=20000)
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.manuscripts, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark of loading a catalogue file and running the extractors on it.
+
+Compares the previous way (a fresh default parser for every file, `find()` / `findall()` with path strings)
+with the parsing context of `lib.xml.context` (one reused parser, precompiled XPath expressions).
+Both sides do the same lookups as `tamer._parse_xml_content`, and their results are checked to be the same.
+Times are given per file, split into parsing and lookups.
+
+By default, it runs over synthetic TEI documents in the style of the handrit.is catalogue,
+written to a temporary directory. With `--xml-dir`, it runs over the XML files in that directory instead,
+e.g. `data/handrit/Manuscripts`.
+
+    PYTHONPATH=src python -m benchmarks.bench_xml --files 500
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from lxml import etree
+
+from lib.xml import tamer
+from lib.xml.context import XML_ID, ParsingContext, first
+
+MS_ITEM = """
+                        <msItem n="{n}">
+                            <locus from="{n}r" to="{n}v">{n}r-{n}v</locus>
+                            <title>{title}</title>
+                            <note>Sjá <name key="{key}" type="person">{name}</name>.</note>
+                        </msItem>"""
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+    <teiHeader>
+        <fileDesc>
+            <titleStmt><title>{title}</title></titleStmt>
+            <sourceDesc>
+                <msDesc xml:id="{ms_id}-is" xml:lang="is">
+                    <msIdentifier>
+                        <country key="IS">Ísland</country>
+                        <settlement>Reykjavík</settlement>
+                        <repository>Stofnun Árna Magnússonar</repository>
+                        <idno>{shelfmark}</idno>
+                    </msIdentifier>
+                    <head>
+                        <title>{title}</title>
+                    </head>
+                    <msContents>{items}
+                    </msContents>
+                    <physDesc>
+                        <objectDesc form="codex">
+                            <supportDesc material="{material}">
+                                <extent>
+                                    i + {folio} + i blöð
+                                    <dimensions unit="mm">
+                                        <height unit="mm">{height}</height>
+                                        <width unit="mm">{width}</width>
+                                    </dimensions>
+                                </extent>
+                            </supportDesc>
+                        </objectDesc>
+                        <handDesc hands="1">
+                            <handNote><p>Skrifari: <name key="{key}" type="person">{name}</name></p></handNote>
+                        </handDesc>
+                    </physDesc>
+                    <history>
+                        <origin>
+                            <origDate notBefore="{tp}" notAfter="{ta}"/>
+                            <origPlace><country key="IS">Ísland</country></origPlace>
+                        </origin>
+                    </history>
+                </msDesc>
+            </sourceDesc>
+        </fileDesc>
+    </teiHeader>
+    <facsimile/>
+    <text><body><p/></body></text>
+</TEI>
+"""
+
+
+def _write_documents(path: Path, n: int, seed: int) -> list[Path]:
+    rnd = random.Random(seed)
+    res = []
+    for i in range(n):
+        people = [(f"Pers{rnd.randrange(n * 2):05}", f"Nafn {i}") for _ in range(3)]
+        n_items = min(1 + int(rnd.paretovariate(1.2)), 200)
+        items = "".join(MS_ITEM.format(n=j + 1, title=f"Saga {rnd.randrange(n * 5)}", key=people[j % 3][0],
+                                       name=people[j % 3][1]) for j in range(n_items))
+        tp = rnd.randrange(1200, 1900)
+        ms_id = f"AM{i:05}"
+        xml = DOCUMENT.format(title=f"Sögubók {i}", ms_id=ms_id, shelfmark=f"AM {i} 4to", items=items,
+                              material=rnd.choice(["chart", "perg"]), folio=rnd.randrange(1, 400),
+                              height=rnd.randrange(100, 400), width=rnd.randrange(80, 300),
+                              key=people[0][0], name=people[0][1], tp=tp, ta=tp + rnd.randrange(0, 100))
+        f = path / f"{ms_id}-is.xml"
+        f.write_text(xml, encoding="utf-8")
+        res.append(f)
+    return res
+
+
+def _text(e: Optional[etree._Element]) -> Optional[str]:
+    return None if e is None else e.text
+
+
+def _legacy_lookups(root: etree._Element) -> list[Any]:
+    """The lookups of `tamer._parse_xml_content` before the parsing context, in the same order."""
+    nsmap = {None: "http://www.tei-c.org/ns/1.0", 'xml': 'http://www.w3.org/XML/1998/namespace'}
+    res: list[Any] = [_text(root.find('.//msDesc/msIdentifier/idno', root.nsmap))]
+    res.append(root.find('.//msDesc', root.nsmap).attrib[XML_ID])
+    head = root.find(".//head", root.nsmap)
+    root.find(".//summary", root.nsmap)
+    res.append(_text(head.find("title", root.nsmap)))
+    ms_id = root.find(".teiHeader/fileDesc/sourceDesc/msDesc/msIdentifier", nsmap)
+    res += [_text(ms_id.find(tag, nsmap)) for tag in ("country", "settlement", "repository")]
+    res.append(_text(root.find(".//origPlace", root.nsmap)))
+    res.append(root.find(".//origDate", root.nsmap).items())
+    res.append(root.find('.//supportDesc', root.nsmap).get("material"))
+    res.append(root.find('.//extent', root.nsmap).text.strip())
+    for _ in range(2):  # get_description looks up the support and the extent again
+        root.find('.//supportDesc', root.nsmap)
+        dimensions = root.find('.//extent', root.nsmap).find('dimensions', root.nsmap)
+    res += [_text(dimensions.find(tag, root.nsmap)) for tag in ("height", "width")]
+    res.append(root.find('.//msDesc', root.nsmap).attrib[XML_ID])
+    res.append(sorted(n.text for hand in root.findall(".//handDesc", root.nsmap)
+                      for n in hand.findall(".//name", root.nsmap)))
+    res.append(sorted(_text(t.find("title", nsmap)) for t in root.findall(".//msItem", nsmap)))
+    res.append(sorted(p.get('key') for p in root.findall(".//name", nsmap) if p.get('key') is not None))
+    return res
+
+
+def _current_lookups(root: etree._Element, ctx: ParsingContext) -> list[Any]:
+    """The same lookups, with the precompiled expressions of the parsing context."""
+    res: list[Any] = [_text(first(ctx.shelfmark, root))]
+    res.append(first(ctx.ms_desc, root).attrib[XML_ID])
+    head = first(ctx.head, root)
+    first(ctx.summary, root)
+    res.append(_text(first(ctx.title, head)))
+    ms_id = first(ctx.ms_identifier, root)
+    res += [_text(first(xpath, ms_id)) for xpath in (ctx.country, ctx.settlement, ctx.repository)]
+    res.append(_text(first(ctx.orig_place, root)))
+    res.append(first(ctx.orig_date, root).items())
+    res.append(first(ctx.support_desc, root).get("material"))
+    res.append(first(ctx.extent, root).text.strip())
+    for _ in range(2):
+        first(ctx.support_desc, root)
+        dimensions = first(ctx.dimensions, first(ctx.extent, root))
+    res += [_text(first(xpath, dimensions)) for xpath in (ctx.height, ctx.width)]
+    res.append(first(ctx.ms_desc, root).attrib[XML_ID])
+    res.append(sorted(n.text for n in ctx.hand_names(root)))
+    res.append(sorted(t.text for t in ctx.text_titles(root)))
+    res.append(sorted(ctx.name_keys(root)))
+    return res
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def _per_file(files: list[Path], parse: Callable[[Path], etree._Element],
+              lookups: Callable[[etree._Element], object], repeat: int) -> tuple[float, float]:
+    parse_s = _time(lambda: [parse(f) for f in files], repeat) / len(files)
+    roots = [parse(f) for f in files]
+    lookup_s = _time(lambda: [lookups(r) for r in roots], repeat) / len(files)
+    return parse_s, lookup_s
+
+
+def _legacy_parse(path: Path) -> etree._Element:
+    return etree.parse(str(path), None).getroot()
+
+
+def run(n_files: int, repeat: int, xml_dir: Optional[str], seed: int = 42) -> dict[str, object]:
+    ctx = ParsingContext()
+    with tempfile.TemporaryDirectory() as tmp:
+        if xml_dir:
+            files = sorted(Path(xml_dir).rglob("*.xml"))[:n_files]
+        else:
+            files = _write_documents(Path(tmp), n_files, seed)
+        mismatches = []
+        for f in files:
+            try:
+                if _legacy_lookups(_legacy_parse(f)) != _current_lookups(ctx.parse(f), ctx):
+                    mismatches.append(f.name)
+            except (AttributeError, KeyError, etree.XMLSyntaxError):
+                pass  # files without the usual structure, which the extractors handle on their own
+        legacy = _per_file(files, _legacy_parse, _legacy_lookups, repeat)
+        current = _per_file(files, ctx.parse, lambda r: _current_lookups(r, ctx), repeat)
+        roots = [ctx.parse(f) for f in files]
+        tamer.log.disabled = True
+        extract_s = _time(lambda: [tamer._parse_xml_content(r, "") for r in roots], repeat) / len(files)
+        tamer.log.disabled = False
+        size = sum(f.stat().st_size for f in files) / len(files)
+    return {
+        "files": len(files),
+        "avg_file_kb": round(size / 1024, 1),
+        "legacy": {"parse_us": round(legacy[0] * 1e6, 1), "lookups_us": round(legacy[1] * 1e6, 1),
+                   "total_us": round(sum(legacy) * 1e6, 1)},
+        "current": {"parse_us": round(current[0] * 1e6, 1), "lookups_us": round(current[1] * 1e6, 1),
+                    "total_us": round(sum(current) * 1e6, 1)},
+        "saved_per_file_us": round((sum(legacy) - sum(current)) * 1e6, 1),
+        "parse_xml_content_us": round(extract_s * 1e6, 1),
+        "mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark loading catalogue files and running the extractors.")
+    parser.add_argument("--files", "-n", type=int, default=500)
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument("--xml-dir", help="run over the XML files in this directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.repeat, args.xml_dir, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Load test for the HTTP query service (see `serve.py`).
+
+Start the server first, then run e.g.:
+
+    PYTHONPATH=src python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 16 --requests 2000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from typing import Any, Union
+from urllib.parse import urlencode
+
+SEARCHES = [
+    ("/api/manuscripts/by-people", "people"),
+    ("/api/people/by-manuscripts", "manuscripts"),
+    ("/api/manuscripts/by-texts", "texts"),
+    ("/api/texts/by-manuscripts", "manuscripts"),
+]
+
+
+def _get(url: str, headers: dict[str, str]) -> tuple[int, bytes, dict[str, str]]:
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as res:
+            return res.status, res.read(), dict(res.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, b"", dict(e.headers)
+
+
+def _load_ids(base_url: str) -> dict[str, list[str]]:
+    def ids(kind: str) -> list[str]:
+        _, body, _ = _get(f"{base_url}/api/lookups/{kind}", {})
+        data: Union[dict[str, Any], list[str]] = json.loads(body)
+        return list(data.keys()) if isinstance(data, dict) else data
+    return {k: ids(k) for k in ("manuscripts", "people", "texts")}
+
+
+def _make_urls(base_url: str, ids: dict[str, list[str]], n: int, max_selection: int, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    urls = []
+    for _ in range(n):
+        path, kind = rnd.choice(SEARCHES)
+        if not ids[kind]:
+            continue
+        selection = rnd.sample(ids[kind], min(len(ids[kind]), rnd.randint(1, max_selection)))
+        mode = rnd.choice(["AND", "OR"])
+        urls.append(f"{base_url}{path}?{urlencode({'ids': selection, 'mode': mode}, doseq=True)}")
+    return urls
+
+
+def run(base_url: str, concurrency: int, n_requests: int, max_selection: int, revalidate: bool, seed: int) -> dict[str, Any]:
+    ids = _load_ids(base_url)
+    urls = _make_urls(base_url, ids, n_requests, max_selection, seed)
+    etags: dict[str, str] = {}
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    lock = threading.Lock()
+    it = iter(urls)
+
+    def worker() -> None:
+        while True:
+            with lock:
+                url = next(it, None)
+            if url is None:
+                return
+            headers = {"Accept-Encoding": "gzip"}
+            if revalidate and url in etags:
+                headers["If-None-Match"] = etags[url]
+            start = time.perf_counter()
+            status, _, res_headers = _get(url, headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+                if "ETag" in res_headers:
+                    etags[url] = res_headers["ETag"]
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 1) if duration else 0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            "p99": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        } if latencies else {},
+        "statuses": dict(statuses),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the HTTP query service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running server")
+    parser.add_argument("--concurrency", "-c", type=int, default=8, help="Number of concurrent clients")
+    parser.add_argument("--requests", "-n", type=int, default=1000, help="Total number of requests")
+    parser.add_argument("--max-selection", type=int, default=5, help="Maximum number of IDs per search")
+    parser.add_argument("--revalidate", action="store_true", help="Send If-None-Match for repeated URLs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    res = run(args.url.rstrip("/"), args.concurrency, args.requests, args.max_selection, args.revalidate, args.seed)
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
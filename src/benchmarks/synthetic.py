@@ -0,0 +1,131 @@
+"""
+Synthetic data for benchmarks.
+
+Creates people, catalogue entries and manuscripts in the shape of the handrit.is data,
+with power-law distributed numbers of people and texts per manuscript,
+and power-law distributed popularity of people and texts.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Optional
+
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+COUNTRIES = ["Iceland", "Denmark", "Sweden", "Norway", "Faroe Islands"]
+SUPPORTS = ["Paper", "Parchment"]
+REPOSITORIES = ["Stofnun Árna Magnússonar", "Den Arnamagnæanske Samling", "Landsbókasafn", "Det Kongelige Bibliotek"]
+SETTLEMENTS = ["Reykjavík", "Copenhagen", "Stockholm", "Oslo"]
+
+
+def _power_law_count(rnd: random.Random, alpha: float, maximum: int) -> int:
+    """Draws a count >= 1 from a Pareto distribution, capped at `maximum`."""
+    return min(maximum, int(rnd.paretovariate(alpha)))
+
+
+def _power_law_pick(rnd: random.Random, population: list[str], k: int) -> list[str]:
+    """Picks `k` distinct items, where items at the front of the population are much more likely to be picked."""
+    n = len(population)
+    res: set[str] = set()
+    while len(res) < min(k, n):
+        res.add(population[min(n - 1, int(rnd.paretovariate(1.2)) - 1)])
+    return list(res)
+
+
+def make_data(
+    n_manuscripts: int,
+    n_people: Optional[int] = None,
+    n_texts: Optional[int] = None,
+    seed: int = 42
+) -> tuple[list[Person], list[CatalogueEntry], list[Manuscript]]:
+    """Creates synthetic people, catalogue entries and manuscripts.
+
+    By default, there are half as many people and texts as there are manuscripts, roughly as in the real data.
+    Every manuscript has one catalogue entry.
+    """
+    rnd = random.Random(seed)
+    n_people = n_people or max(1, n_manuscripts // 2)
+    n_texts = n_texts or max(1, n_manuscripts // 2)
+    people = [Person(f"pers{i:07d}", f"Jón{i % 997}", f"Ólafsson{i % 1009}") for i in range(n_people)]
+    pers_ids = [p.pers_id for p in people]
+    rnd.shuffle(pers_ids)
+    texts = [f"Saga no. {i}" for i in range(n_texts)]
+    rnd.shuffle(texts)
+    entries: list[CatalogueEntry] = []
+    manuscripts: list[Manuscript] = []
+    for i in range(n_manuscripts):
+        ms_id = f"AM{i:07d}"
+        tp = rnd.randint(1150, 1850)
+        ta = tp + rnd.choice([0, 25, 50, 100])
+        txts = _power_law_pick(rnd, texts, _power_law_count(rnd, 1.5, 200))
+        ppl = _power_law_pick(rnd, pers_ids, _power_law_count(rnd, 1.5, 100))
+        width, height = rnd.randint(80, 300), rnd.randint(100, 400)
+        e = CatalogueEntry(
+            catalogue_id=f"{ms_id}-is",
+            shelfmark=f"AM {i} fol.",
+            manuscript_id=ms_id,
+            catalogue_filename=f"{ms_id}-is.xml",
+            title=f"Manuscript {i}",
+            description=f"Paper / {height} x {width} mm",
+            date_string=f"{tp}-{ta}",
+            terminus_post_quem=tp,
+            terminus_ante_quem=ta,
+            date_mean=(tp + ta) // 2,
+            dating_range=ta - tp,
+            support=rnd.choice(SUPPORTS),
+            folio=rnd.randint(1, 400),
+            height=str(height),
+            width=str(width),
+            extent=f"{height} x {width} mm",
+            origin=rnd.choice(COUNTRIES),
+            creator="NULL",
+            country=rnd.choice(COUNTRIES),
+            settlement=rnd.choice(SETTLEMENTS),
+            repository=rnd.choice(REPOSITORIES),
+            texts=txts,
+            people=ppl
+        )
+        entries.append(e)
+        manuscripts.append(Manuscript(
+            manuscript_id=ms_id,
+            shelfmark=e.shelfmark,
+            catalogue_entries=1,
+            catalogue_ids=e.catalogue_id,
+            catalogue_filenames=e.catalogue_filename,
+            title=e.title,
+            description=e.description,
+            date_string=e.date_string,
+            terminus_post_quem=tp,
+            termini_post_quos=str(tp),
+            terminus_ante_quem=ta,
+            termini_ante_quos=str(ta),
+            date_mean=e.date_mean,
+            date_standard_deviation=(ta - tp) / 2 ** 0.5,
+            support=e.support,
+            folio=e.folio,
+            height=e.height,
+            width=e.width,
+            extent=e.extent,
+            origin=e.origin,
+            creator=e.creator,
+            country=e.country,
+            settlement=e.settlement,
+            repository=e.repository,
+            texts=txts,
+            people=ppl
+        ))
+    return people, entries, manuscripts
+
+
+def make_database(path: str, n_manuscripts: int, seed: int = 42) -> DatabaseSQLiteImpl:
+    """Creates a new SQLite database at `path`, filled with synthetic data."""
+    Path(path).unlink(missing_ok=True)
+    db = DatabaseSQLiteImpl(get_engine(path))
+    db.setup_db()
+    db.add_data(*make_data(n_manuscripts, seed=seed))
+    return db
@@ -1,10 +1,12 @@
 from logging import Logger
 
 import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from lib import utils
 from lib.datahandler import DataHandler
-from lib.stateHandler import StateHandler
+from lib.stateHandler import SessionStore, StateHandler
 
 
 @st.experimental_singleton
@@ -12,9 +14,19 @@ def get_log() -> Logger:
     return utils.get_logger("GUI")
 
 
-@st.experimental_singleton
 def get_state() -> StateHandler:
-    return StateHandler()
+    """Returns the state of the current browser session."""
+    ctx = get_script_run_ctx()
+    return _get_session_store().get(ctx.session_id if ctx else "default")
+
+
+@st.experimental_singleton
+def _get_session_store() -> SessionStore:
+    return SessionStore(is_active=_is_active_session)
+
+
+def _is_active_session(session_id: str) -> bool:
+    return not Runtime.exists() or session_id == "default" or Runtime.instance().is_active_session(session_id)
 
 
 @st.experimental_singleton
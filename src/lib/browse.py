@@ -0,0 +1,60 @@
+"""
+This module defines the value objects of the browse view: paginated, filtered and sorted listings of the data.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+import pandas as pd
+
+PAGE_SIZE = 50
+"""Default number of rows per page."""
+
+MAX_PAGE_SIZE = 500
+"""Largest number of rows that can be requested per page."""
+
+
+class BrowseEntity(Enum):
+    """Enum defining the kinds of objects that can be browsed"""
+    Manuscripts = "manuscript"
+    Texts = "text"
+    People = "person"
+
+    @property
+    def sort_keys(self) -> list[str]:
+        """Columns by which a listing can be sorted. The first one is the default."""
+        return _SORT_KEYS[self]
+
+
+_SORT_KEYS: dict[BrowseEntity, list[str]] = {
+    BrowseEntity.Manuscripts: ["shelfmark", "manuscript_id", "date_mean", "texts", "people"],
+    BrowseEntity.Texts: ["text_id", "manuscripts"],
+    BrowseEntity.People: ["last_name", "first_name", "pers_id", "manuscripts"],
+}
+
+
+@dataclass(frozen=True)
+class BrowsePage:
+    """One page of a listing.
+
+    Args:
+        total (int): the number of rows matching the filter, on all pages.
+        offset (int): the index of the first row of this page, among all matching rows.
+        rows (pd.DataFrame): the rows of this page, including the number of related entities of each row.
+    """
+    total: int
+    offset: int
+    rows: pd.DataFrame
+
+    def pages(self, page_size: int) -> int:
+        """Returns the number of pages of the listing, given the page size. Is at least 1, even if nothing matches."""
+        return max(1, math.ceil(self.total / page_size))
+
+
+def search_label(*names: Optional[str]) -> str:
+    """Returns the text by which a row of a listing is found: its ID and names, joined and casefolded."""
+    return " ".join(n for n in names if n).casefold()
@@ -0,0 +1,127 @@
+"""
+This module creates the charts of manuscript metadata.
+
+It is imported lazily by the GUI, so that importing the rest of the library does not load the plotting stack.
+"""
+
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objs as go
+from plotly.graph_objs import Figure
+
+SCATTER_MAX_POINTS = 5000
+"""Charts with more points than this are drawn as binned heatmaps instead of scatter plots."""
+
+HEATMAP_BIN_SIZE = 10
+"""Width of the bins of binned heatmaps, in years or millimetres."""
+
+
+def date_plotting(df: pd.DataFrame, max_points: int = SCATTER_MAX_POINTS) -> Figure:
+    ''' Plots the data of a given set of MSs. Used with MS metadata results.
+
+    Up to `max_points` manuscripts are drawn as a WebGL scatter plot with one point per manuscript,
+    more manuscripts are counted in bins and drawn as a heatmap.
+
+    Args:
+        df (DataFrame): manuscript metadata
+        max_points (int, optional): number of manuscripts above which the plot is binned
+    Returns:
+        figure for plotly to be drawn with corresponding function
+    '''
+    df = df[df['terminus_ante_quem'] != 0]
+    df = df[df['terminus_post_quem'] != 0]
+    if len(df) > max_points:
+        df = df.dropna(subset=['terminus_post_quem', 'terminus_ante_quem'])
+    x, y = df['terminus_post_quem'], df['terminus_ante_quem']
+    if len(df) > max_points:
+        fig = _binned_heatmap(x, y, hovertemplate="%{x} – %{y}: %{z} manuscripts<extra></extra>")
+    else:
+        fig = _scatter(x, y, df['shelfmark'], hovertemplate="%{text}<br>%{x} – %{y}<extra></extra>")
+    first = x.min()-20
+    last = y.max()+20
+    fig.add_shape(type='line', x0=first, y0=first, x1=last, y1=last, line=dict(color='rgba(50,50,50,0.8)'))
+    fig.update_layout(
+        title="Manuscript Dating Plot",
+        xaxis_title="Terminus Post Quem",
+        yaxis_title="Terminus Ante Quem",
+    )
+    return fig
+
+
+def dimensions_plotting(df: pd.DataFrame, max_points: int = SCATTER_MAX_POINTS) -> Optional[Figure]:
+    """Plots the dimensions of manuscripts: one WebGL scatter trace per support, or a binned heatmap above `max_points` manuscripts."""
+    df = df.assign(width=pd.to_numeric(df["width"], errors='coerce'), height=pd.to_numeric(df["height"], errors='coerce'))
+    df = df[df['height'] != 0]
+    df = df[df['width'] != 0]
+    df = df[df['date_mean'] != 0]
+    if df.empty:
+        return None
+    if len(df) > max_points:
+        df = df.dropna(subset=['width', 'height'])
+        fig = _binned_heatmap(df['width'], df['height'], hovertemplate="%{x} x %{y} mm: %{z} manuscripts<extra></extra>")
+    else:
+        fig = go.Figure([
+            go.Scattergl(x=g['width'], y=g['height'], text=g['shelfmark'], mode='markers', name=str(support),
+                         hovertemplate="%{text}<br>%{x} x %{y} mm<extra></extra>")
+            for support, g in df.groupby('support', dropna=False, sort=True)
+        ])
+        fig.update_layout(legend_title="support")
+    fig.update_layout(xaxis_title="width", yaxis_title="height")
+    return fig
+
+
+def _scatter(x: pd.Series, y: pd.Series, labels: pd.Series, hovertemplate: str) -> Figure:
+    """Single WebGL scatter trace, with the labels shown on hover instead of in a legend."""
+    return go.Figure(go.Scattergl(x=x, y=y, text=labels, mode='markers', hovertemplate=hovertemplate))
+
+
+def _binned_heatmap(x: pd.Series, y: pd.Series, hovertemplate: str, bin_size: int = HEATMAP_BIN_SIZE) -> Figure:
+    """Counts the points in square bins of `bin_size` and draws the counts as a heatmap. Empty bins are left blank."""
+    x_edges = np.arange(x.min() // bin_size * bin_size, x.max() + bin_size + 1, bin_size)
+    y_edges = np.arange(y.min() // bin_size * bin_size, y.max() + bin_size + 1, bin_size)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    z = np.where(counts.T > 0, counts.T, np.nan)
+    return go.Figure(go.Heatmap(
+        x=x_edges[:-1] + bin_size / 2, y=y_edges[:-1] + bin_size / 2, z=z,
+        colorscale="Viridis", colorbar=dict(title="manuscripts"), hovertemplate=hovertemplate, hoverongaps=False
+    ))
+
+
+def dimensions_plotting_facet(df: pd.DataFrame) -> Optional[Figure]:
+    df = df[['width', 'height', 'date_mean', 'support', 'shelfmark']].copy()
+    df["width"] = pd.to_numeric(df["width"], errors='coerce')
+    df["height"] = pd.to_numeric(df["height"], errors='coerce')
+    df = df.dropna()
+    df = df[df['height'] != 0]
+    df = df[df['width'] != 0]
+    df = df[df['date_mean'] != 0]
+    if df.empty:
+        return None
+    df['century'] = df['date_mean'].div(100).round()
+    df = df.sort_values('width')
+    intercept, slope = least_squares(df["width"].to_numpy(dtype=float), df["height"].to_numpy(dtype=float))
+    trace = go.Scatter(x=df["width"], y=intercept + slope * df["width"], line_color="gray", name="overall OLS")
+    trace.update(legendgroup="trendline", showlegend=False)
+    df = df.sort_values('century')
+    fig = px.scatter(
+        df,
+        x='width',
+        y='height',
+        color=df['support'],
+        hover_name=df['shelfmark'],
+        facet_col=df['century'],
+        facet_col_wrap=3
+    )
+    fig.add_trace(trace, row="all", col="all", exclude_empty_subplots=True)
+    fig.update_traces(selector=-1, showlegend=True)
+    return fig
+
+
+def least_squares(x: npt.NDArray[np.float64], y: npt.NDArray[np.float64]) -> tuple[float, float]:
+    """Fits the line `y = intercept + slope * x` by ordinary least squares and returns `(intercept, slope)`."""
+    coef, *_ = np.linalg.lstsq(np.column_stack([np.ones_like(x), x]), y, rcond=None)
+    return float(coef[0]), float(coef[1])
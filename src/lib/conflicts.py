@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class UnificationConflict:
+    """Values of a field that could not be unified for one manuscript.
+
+    Args:
+        manuscript_id (str): the ID of the manuscript.
+        field (str): the name of the manuscript field.
+        values (tuple[str, ...]): the values of the catalogue entries of the manuscript, in order.
+        rule (str): how the values were combined instead: `join` for strings, `mean` for numbers.
+        result (str): the combined value that ended up in the manuscript.
+    """
+    manuscript_id: str
+    field: str
+    values: tuple[str, ...]
+    rule: str
+    result: str
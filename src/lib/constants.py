@@ -1,7 +1,17 @@
+import os
+
+HANDRIT_PATH = 'data/handrit'
 XML_BASE_PATH = 'data/handrit/Manuscripts'
 PERSON_DATA_PATH = 'data/handrit/Authority Files/names.xml'
 
 DATABASE_PATH = "data/db/data.db"
+DUCKDB_DATABASE_PATH = "data/db/data.duckdb"
+DATABASE_BACKEND = os.environ.get("TOOLE_DATABASE", "sqlite")
+"""Implementation of the database used by the app: `sqlite` (default), `duckdb` or `memory`. Set by the environment variable `TOOLE_DATABASE`."""
+LOOKUP_SNAPSHOT_PATH = "data/db/lookups.snapshot"
+PARQUET_EXPORT_PATH = "data/db/parquet"
+EXPORT_CACHE_PATH = "data/exports"
+BUILD_PROFILE_PATH = "logs/build-profile.json"
 
 IMAGE_HOME = 'data/img/title.png'
 
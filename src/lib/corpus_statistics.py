@@ -0,0 +1,97 @@
+"""
+This module computes the statistics of the corpus: summary tables and histograms of the manuscripts,
+such as the number of manuscripts per century or per country, or the texts with the most witnesses.
+
+They are computed once when the database is built, from the data that is added to it, and stored with it,
+so that they can be shown without scanning the corpus.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from enum import Enum
+
+from lib.database.deduplicate import DISREGARD
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+TOP = 100
+"""Number of rows kept of the rankings of texts and people."""
+
+UNKNOWN = "Unknown"
+UNDATED = "Undated"
+
+
+class CorpusStatistic(Enum):
+    """Enum defining the statistics of the corpus. Each is a list of labels with a count each."""
+    Totals = "totals"
+    Centuries = "centuries"
+    Countries = "countries"
+    Repositories = "repositories"
+    Supports = "supports"
+    Texts = "texts"
+    People = "people"
+
+    @property
+    def title(self) -> str:
+        return _TITLES[self][0]
+
+    @property
+    def columns(self) -> list[str]:
+        """The column names of the label and the count."""
+        return list(_TITLES[self][1:])
+
+
+_TITLES: dict[CorpusStatistic, tuple[str, str, str]] = {
+    CorpusStatistic.Totals: ("Totals", "Entity", "Count"),
+    CorpusStatistic.Centuries: ("Manuscripts per century", "Century", "Manuscripts"),
+    CorpusStatistic.Countries: ("Manuscripts per country", "Country", "Manuscripts"),
+    CorpusStatistic.Repositories: ("Manuscripts per repository", "Repository", "Manuscripts"),
+    CorpusStatistic.Supports: ("Manuscripts per support", "Support", "Manuscripts"),
+    CorpusStatistic.Texts: (f"{TOP} texts with the most witnesses", "Text", "Manuscripts"),
+    CorpusStatistic.People: (f"{TOP} people related to the most manuscripts", "Person", "Manuscripts"),
+}
+
+CorpusStatistics = dict[CorpusStatistic, list[tuple[str, int]]]
+"""All statistics of the corpus, each with its rows of label and count, in order."""
+
+
+def compute(people: list[Person], catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> CorpusStatistics:
+    """Computes all statistics of the corpus from the data that is added to the database."""
+    texts = Counter(t for ms in manuscripts for t in set(ms.texts))
+    ppl = Counter(p for ms in manuscripts for p in set(ms.people))
+    names = {p.pers_id: " ".join(n for n in (p.first_name, p.last_name) if n) for p in people}
+    return {
+        CorpusStatistic.Totals: [
+            ("Manuscripts", len(manuscripts)),
+            ("Catalogue entries", len(catalogue_entries)),
+            ("Texts", len(texts)),
+            ("People", len(people)),
+            ("Dated manuscripts", sum(1 for ms in manuscripts if ms.date_mean > 0)),
+        ],
+        CorpusStatistic.Centuries: _centuries(manuscripts),
+        CorpusStatistic.Countries: _ranking(Counter(_label(ms.country) for ms in manuscripts)),
+        CorpusStatistic.Repositories: _ranking(Counter(_label(ms.repository) for ms in manuscripts)),
+        CorpusStatistic.Supports: _ranking(Counter(_label(ms.support) for ms in manuscripts)),
+        CorpusStatistic.Texts: _ranking(texts, TOP),
+        CorpusStatistic.People: [(f"{names.get(p) or p} ({p})", n) for p, n in _ranking(ppl, TOP)],
+    }
+
+
+def _centuries(manuscripts: list[Manuscript]) -> list[tuple[str, int]]:
+    """Histogram of the mean dates of the manuscripts by century, in chronological order, and the undated ones last."""
+    counts = Counter(ms.date_mean // 100 * 100 for ms in manuscripts if ms.date_mean > 0)
+    res = [(f"{c}–{c + 99}", n) for c, n in sorted(counts.items())]
+    undated = len(manuscripts) - sum(counts.values())
+    return res + [(UNDATED, undated)] if undated else res
+
+
+def _label(value: str) -> str:
+    value = value.strip()
+    return UNKNOWN if not value or value.lower() in DISREGARD else value
+
+
+def _ranking(counts: Counter[str], limit: int = 0) -> list[tuple[str, int]]:
+    """The counted values, most frequent first, then by value."""
+    res = sorted(counts.items(), key=lambda x: (-x[1], x[0]))
+    return res[:limit] if limit else res
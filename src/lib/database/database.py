@@ -1,8 +1,11 @@
-from typing import Protocol
+from typing import Optional, Protocol
 from uuid import UUID
 
 import pandas as pd
 
+from lib.browse import BrowseEntity, BrowsePage
+from lib.conflicts import UnificationConflict
+from lib.corpus_statistics import CorpusStatistics
 from lib.groups import Group
 from lib.manuscripts import CatalogueEntry, Manuscript
 from lib.people import Person
@@ -29,6 +32,14 @@ class Database(Protocol):
         """Get a list of texts contained by a given list of manuscripts."""
         ...
 
+    def browse(self, entity: BrowseEntity, search: str, sort_by: str, descending: bool, offset: int, limit: int) -> BrowsePage:
+        """Get one page of a listing of manuscripts, texts or people, with the number of related entities per row.
+
+        Only rows whose ID or name contains `search` (case-insensitively) are listed, if it is not empty.
+        `sort_by` must be one of the `sort_keys` of the entity.
+        """
+        ...
+
     def persons_lookup_dict(self) -> dict[str, str]:
         """Returns the lookup-dict for the IDs of people to their full names."""
         ...
@@ -65,6 +76,54 @@ class Database(Protocol):
         """Updates a group in the database, either replacing its previous version, or creating it anew."""
         ...
 
+    def add_group_items(self, group_id: UUID, items: set[str]) -> None:
+        """Adds items to a group, if it exists. Items already in the group are ignored."""
+        ...
+
+    def remove_group_items(self, group_id: UUID, items: set[str]) -> None:
+        """Removes items from an existing group. Items not in the group are ignored."""
+        ...
+
+    def union_groups(self, group_ids: list[UUID]) -> list[str]:
+        """Gets the items contained by at least one of the given groups."""
+        ...
+
+    def intersect_groups(self, group_ids: list[UUID]) -> list[str]:
+        """Gets the items contained by all of the given groups."""
+        ...
+
+    def delete_group(self, group_id: UUID) -> None:
+        """Deletes a group from the database, if it exists."""
+        ...
+
+    def get_groups_version(self) -> int:
+        """Returns a counter that is incremented with every change to the groups in the database."""
+        ...
+
+    def get_generation(self) -> str:
+        """Returns the generation of the data in the database. The generation changes whenever the data is (re-)built."""
+        ...
+
     def add_data(self, people: list[Person], catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
         """Adds all the data to the database, used for initialization."""
         ...
+
+    def add_unification_conflicts(self, conflicts: list[UnificationConflict]) -> None:
+        """Replaces the stored unification conflicts by the ones of the current build."""
+        ...
+
+    def get_unification_conflicts_summary(self) -> pd.DataFrame:
+        """Get the number of unification conflicts per field and rule, most frequent first."""
+        ...
+
+    def get_unification_conflicts(self, field: Optional[str], offset: int, limit: int) -> pd.DataFrame:
+        """Get unification conflicts, optionally of one field only, ordered by manuscript ID."""
+        ...
+
+    def add_corpus_statistics(self, statistics: CorpusStatistics) -> None:
+        """Replaces the stored statistics of the corpus by the ones of the current build."""
+        ...
+
+    def get_corpus_statistics(self) -> CorpusStatistics:
+        """Get the statistics of the corpus, computed when the database was built, each with its rows in order."""
+        ...
@@ -1,13 +1,34 @@
 from __future__ import annotations
 
-import statistics
+import math
+import sys
+from dataclasses import dataclass
 from logging import Logger
+from operator import attrgetter
+from typing import Any, Callable, Optional, TypeVar
 
 from lib import utils
+from lib.conflicts import UnificationConflict
 from lib.manuscripts import CatalogueEntry, Manuscript
 
 log: Logger = utils.get_logger(__name__)
 
+T = TypeVar("T")
+
+
+DISREGARD = {"origin unknown", "n/a", "null"}
+"""Placeholder values that give way to any other value, compared in lower case."""
+
+SYNONYMS = {frozenset({"Danmark", "Denmark"}): "Denmark", frozenset({"København", "Copenhagen"}): "Copenhagen"}
+"""Well-known pairs of values that are unified to one of them."""
+
+
+@dataclass(frozen=True)
+class Unification:
+    """The result of unifying catalogue entries: the manuscripts, and the conflicts that occurred along the way."""
+    manuscripts: list[Manuscript]
+    conflicts: list[UnificationConflict]
+
 
 def get_unified_metadata(entries: list[CatalogueEntry]) -> list[Manuscript]:
     """Combine all metadata with of the same ID into single entries.
@@ -21,62 +42,163 @@ def get_unified_metadata(entries: list[CatalogueEntry]) -> list[Manuscript]:
 
     The result also contains some information on the differences of input.
     """
-    log.info(f"Unifying catalogue info: {len(entries)}")
-    entries_per_ms: dict[str, list[CatalogueEntry]] = {}
-    for e in entries:
-        k = e.manuscript_id
-        g = entries_per_ms.get(k, [])
-        entries_per_ms[k] = g + [e]
-    res = [_unify_metadata_entries(m) for m in entries_per_ms.values()]
-    log.info(f"Created unifies manuscript entries: {len(res)}")
-    return res
-
-
-def _unify_metadata_entries(entries: list[CatalogueEntry]) -> Manuscript:
-    """Combines a list of handrit catalogue entries *with the same ID* into one unified entry."""
-    if len(entries) > 3:
-        ms_id = entries[0].manuscript_id
-        cat_ids = [e.catalogue_id for e in entries]
-        log.warning(f"Trouble deduplicating '{len(entries)}' entries for {ms_id} ({cat_ids})")
-    tps = [e.terminus_post_quem for e in entries]
-    tas = [e.terminus_ante_quem for e in entries]
-    return Manuscript(
-        manuscript_id=combine_strs(*[e.manuscript_id for e in entries]),
-        shelfmark=combine_strs(*[e.shelfmark for e in entries]),
-        catalogue_entries=len(entries),
-        catalogue_ids=" | ".join(e.catalogue_id for e in entries),
-        catalogue_filenames=" | ".join(e.catalogue_filename for e in entries),
-        title=combine_strs(*[e.title for e in entries]),
-        description=combine_strs(*[e.description for e in entries]),
-        date_string=combine_strs(*[e.date_string for e in entries]),
-        terminus_post_quem=max(tps),
-        termini_post_quos=combine_strs(*[str(t) for t in tps]),
-        terminus_ante_quem=min(tas),
-        termini_ante_quos=combine_strs(*[str(t) for t in tas]),
-        date_mean=int(statistics.mean(tps + tas)),
-        date_standard_deviation=statistics.stdev(tps + tas),
-        support=combine_strs(*[e.support for e in entries]),
-        folio=combine_ints(*[e.folio for e in entries]),
-        height=combine_strs(*[e.height for e in entries]),
-        width=combine_strs(*[e.width for e in entries]),
-        extent=combine_strs(*[e.extent for e in entries]),
-        origin=combine_strs(*[e.origin for e in entries]),
-        creator=combine_strs(*[e.creator for e in entries]),
-        country=combine_strs(*[e.country for e in entries]),
-        settlement=combine_strs(*[e.settlement for e in entries]),
-        repository=combine_strs(*[e.repository for e in entries]),
-        texts=list(set.union(*[set(e.texts) for e in entries])),
-        people=list(set.union(*[set(e.people) for e in entries]))
-    )
+    return unify(entries).manuscripts
+
+
+def unify(entries: list[CatalogueEntry]) -> Unification:
+    """Combine all metadata of the same ID into single entries, like `get_unified_metadata()`,
+    and collect the values that could not be unified.
+
+    The entries are grouped by manuscript ID in one pass, in order of first occurrence,
+    and laid out so that the entries of each manuscript are next to each other.
+    Then each field is unified for all manuscripts at once, from a column holding the values of all entries,
+    according to the merge rule of the field (see `_RULES`).
+    Manuscripts with a single entry, or with the same value in all entries, take the value as is.
+    """
+    log.info("Unifying catalogue info: %s", len(entries))
+    groups: dict[str, list[int]] = {}
+    for i, e in enumerate(entries):
+        groups.setdefault(e.manuscript_id, []).append(i)
+    ms_ids = list(groups)
+    ordered = [entries[i] for idx in groups.values() for i in idx]
+    bounds: list[tuple[int, int]] = []
+    start = 0
+    for ms_id, idx in groups.items():
+        bounds.append((start, start + len(idx)))
+        start += len(idx)
+        if len(idx) > 3:
+            cat_ids = [entries[i].catalogue_id for i in idx]
+            log.warning("Trouble deduplicating '%s' entries for %s (%s)", len(idx), ms_id, cat_ids)
+    conflicts: list[UnificationConflict] = []
+    columns: dict[str, list[Any]] = {}
+    fields: dict[str, list[Any]] = {}
+    for field, source, rule in _RULES:
+        if source not in columns:
+            columns[source] = list(map(attrgetter(source), ordered))
+        fields[field] = rule(columns[source], bounds, _Conflicts(ms_ids, field, conflicts))
+    tps, tas = columns["terminus_post_quem"], columns["terminus_ante_quem"]
+    dates = [_date_stats(tps[a:b] + tas[a:b]) for a, b in bounds]
+    fields["date_mean"] = [d[0] for d in dates]
+    fields["date_standard_deviation"] = [d[1] for d in dates]
+    names = list(fields)
+    res = [Manuscript(**dict(zip(names, row))) for row in zip(*fields.values())]
+    log.info("Created unifies manuscript entries: %s", len(res))
+    if conflicts:
+        log.info("Values that could not be unified: %s", len(conflicts))
+    return Unification(res, conflicts)
+
+
+class _Conflicts:
+    """Records the conflicts of one field, given the index of the manuscript for which they occurred."""
+
+    def __init__(self, ms_ids: list[str], field: str, conflicts: list[UnificationConflict]) -> None:
+        self.ms_ids = ms_ids
+        self.field = field
+        self.conflicts = conflicts
+
+    def add(self, group: int, values: list[Any], rule: str, result: Any) -> None:
+        conflict = UnificationConflict(self.ms_ids[group], self.field, tuple(str(v) for v in values), rule, str(result))
+        self.conflicts.append(conflict)
+
+
+_Rule = Callable[[list[Any], list[tuple[int, int]], _Conflicts], list[Any]]
+"""A merge rule. Gets the column of an entry field and the bounds of the entries of each manuscript in it,
+and returns the unified value for each manuscript."""
+
+
+def _folded(combine: Callable[[Any, Any], tuple[Any, bool]], rule: str) -> _Rule:
+    """Creates a rule that combines differing values pairwise from right to left, recording failed combinations."""
+    def fold(column: list[Any], bounds: list[tuple[int, int]], conflicts: _Conflicts) -> list[Any]:
+        res: list[Any] = []
+        for g, (a, b) in enumerate(bounds):
+            first = column[a]
+            if b - a == 1:
+                res.append(first)
+                continue
+            values = column[a:b]
+            if values.count(first) == len(values):
+                res.append(first)
+                continue
+            unified, failed = _fold(values, combine)
+            if failed:
+                conflicts.add(g, values, rule, unified)
+            res.append(unified)
+        return res
+    return fold
+
+
+def _int_strs(column: list[int], bounds: list[tuple[int, int]], conflicts: _Conflicts) -> list[str]:
+    return _strs([str(v) for v in column], bounds, conflicts)
+
+
+def _join(column: list[str], bounds: list[tuple[int, int]], _: _Conflicts) -> list[str]:
+    return [" | ".join(column[a:b]) for a, b in bounds]
+
+
+def _count(_: list[Any], bounds: list[tuple[int, int]], __: _Conflicts) -> list[int]:
+    return [b - a for a, b in bounds]
+
+
+def _first(column: list[Any], bounds: list[tuple[int, int]], _: _Conflicts) -> list[Any]:
+    return [column[a] for a, _ in bounds]
+
+
+def _max(column: list[int], bounds: list[tuple[int, int]], _: _Conflicts) -> list[int]:
+    return [column[a] if b - a == 1 else max(column[a:b]) for a, b in bounds]
+
+
+def _min(column: list[int], bounds: list[tuple[int, int]], _: _Conflicts) -> list[int]:
+    return [column[a] if b - a == 1 else min(column[a:b]) for a, b in bounds]
+
+
+def _union(column: list[list[str]], bounds: list[tuple[int, int]], _: _Conflicts) -> list[list[str]]:
+    return [list(set.union(*[set(v) for v in column[a:b]])) for a, b in bounds]
+
+
+def _date_stats(dates: list[int]) -> tuple[int, float]:
+    """Returns the mean, truncated to an integer, and the sample standard deviation of the termini of a manuscript.
+
+    The variance is computed exactly, as a fraction of integers, and the standard deviation is its square root,
+    rounded once. This is what `statistics.stdev()` returns since Python 3.11, on every version of Python,
+    but without going through `Fraction`s.
+    """
+    n, total = len(dates), sum(dates)
+    squares = sum(d * d for d in dates)
+    return int(total / n), _sqrt_of_fraction(n * squares - total * total, n * (n - 1))
+
+
+_SQRT_BITS = 2 * sys.float_info.mant_dig + 3
+"""Bits of the integer square root that is rounded to a float, enough for the float to be correctly rounded."""
+
+
+def _sqrt_of_fraction(p: int, q: int) -> float:
+    """Returns the square root of the fraction `p / q`, correctly rounded to a float."""
+    # the fraction is scaled by a power of four, so that its integer square root has about `_SQRT_BITS` bits,
+    # and that root is rounded to odd, so that converting it to a float rounds the same as the exact root would
+    shift = (p.bit_length() - q.bit_length() - _SQRT_BITS) // 2
+    if shift >= 0:
+        return float(_isqrt_to_odd(p, q << 2 * shift) << shift)
+    return _isqrt_to_odd(p << -2 * shift, q) / (1 << -shift)
+
+
+def _isqrt_to_odd(p: int, q: int) -> int:
+    """Square root of `p / q`, rounded down to an integer, and then to an odd one if it is not exact."""
+    root = math.isqrt(p // q)
+    return root | (root * root * q != p)
+
+
+def _fold(values: list[T], combine: Callable[[T, T], tuple[T, bool]]) -> tuple[T, bool]:
+    """Combines values from right to left, returning the result and whether any of the combinations failed."""
+    res = values[-1]
+    failed = False
+    for v in reversed(values[:-1]):
+        res, ok = combine(v, res)
+        failed = failed or not ok
+    return res, failed
 
 
 def combine_strs(s: str, *ss: str) -> str:
-    if len(ss) < 1:
-        return s
-    elif len(ss) == 1:
-        return combine_str(s, ss[0])
-    else:
-        return combine_str(s, combine_strs(*ss))
+    return _fold([s, *ss], _combine_str)[0]
 
 
 def combine_str(x: str, y: str) -> str:
@@ -93,35 +215,28 @@ def combine_str(x: str, y: str) -> str:
           then one of the values (here "Copenhagen") is returned.
         - if none of these conditions are met, then the two strings are combined with the ` | ` seperator
     """
-    disregard = {"origin unknown", "n/a", "null"}
-    dk = {"Danmark", "Denmark"}
-    cph = {"København", "Copenhagen"}
+    return _combine_str(x, y)[0]
+
+
+def _combine_str(x: str, y: str) -> tuple[str, bool]:
     if x == y:
-        return x
+        return x, True
     if y in x:
-        return x
+        return x, True
     if x in y:
-        return y
-    if x.lower() in disregard:
-        return y
-    if y.lower() in disregard:
-        return x
-    if {x, y} == dk:
-        return "Denmark"
-    if {x, y} == cph:
-        return "Copenhagen"
-    r = ' | '.join((x, y))
-    print(f"Failed to unify: {r}")
-    return r
+        return y, True
+    if x.lower() in DISREGARD:
+        return y, True
+    if y.lower() in DISREGARD:
+        return x, True
+    synonym: Optional[str] = SYNONYMS.get(frozenset((x, y)))
+    if synonym:
+        return synonym, True
+    return ' | '.join((x, y)), False
 
 
 def combine_ints(x: int, *xx: int) -> int:
-    if len(xx) < 1:
-        return x
-    elif len(xx) == 1:
-        return combine_int(x, xx[0])
-    else:
-        return combine_int(x, combine_ints(*xx))
+    return _fold([x, *xx], _combine_int)[0]
 
 
 def combine_int(x: int, y: int) -> int:
@@ -133,11 +248,49 @@ def combine_int(x: int, y: int) -> int:
         - if one value is 0, return the other one (even though that may be 0 too)
         - otherwise, return the mean of the two
     """
+    return _combine_int(x, y)[0]
+
+
+def _combine_int(x: int, y: int) -> tuple[int, bool]:
     if x == y:
-        return x
+        return x, True
     if x == 0:
-        return y
+        return y, True
     if y == 0:
-        return x
-    print(f"Failed to unify: {x} != {y}")
-    return int((x + y) / 2)
+        return x, True
+    return int((x + y) / 2), False
+
+
+_strs = _folded(_combine_str, "join")
+_ints = _folded(_combine_int, "mean")
+
+_RULES: list[tuple[str, str, _Rule]] = [
+    ("manuscript_id", "manuscript_id", _first),
+    ("shelfmark", "shelfmark", _strs),
+    ("catalogue_entries", "catalogue_id", _count),
+    ("catalogue_ids", "catalogue_id", _join),
+    ("catalogue_filenames", "catalogue_filename", _join),
+    ("title", "title", _strs),
+    ("description", "description", _strs),
+    ("date_string", "date_string", _strs),
+    ("terminus_post_quem", "terminus_post_quem", _max),
+    ("termini_post_quos", "terminus_post_quem", _int_strs),
+    ("terminus_ante_quem", "terminus_ante_quem", _min),
+    ("termini_ante_quos", "terminus_ante_quem", _int_strs),
+    ("support", "support", _strs),
+    ("folio", "folio", _ints),
+    ("height", "height", _strs),
+    ("width", "width", _strs),
+    ("extent", "extent", _strs),
+    ("origin", "origin", _strs),
+    ("creator", "creator", _strs),
+    ("country", "country", _strs),
+    ("settlement", "settlement", _strs),
+    ("repository", "repository", _strs),
+    ("texts", "texts", _union),
+    ("people", "people", _union),
+]
+"""Merge rule of each manuscript field: the field, the catalogue entry field it is made from, and the rule.
+
+The date mean and standard deviation are computed from both termini together.
+"""
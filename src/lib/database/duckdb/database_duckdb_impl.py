@@ -0,0 +1,584 @@
+import operator
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from logging import Logger
+from typing import Any, Callable, Iterator, Optional, Sequence, TypeVar
+from uuid import UUID, uuid4
+
+import duckdb
+import pandas as pd
+
+from lib import latency, profiling, utils
+from lib.browse import BrowseEntity, BrowsePage, search_label
+from lib.conflicts import UnificationConflict
+from lib.constants import DUCKDB_DATABASE_PATH
+from lib.corpus_statistics import CorpusStatistic, CorpusStatistics
+from lib.groups import Group, GroupType
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+log: Logger = utils.get_logger(__name__)
+
+
+GENERATION_KEY = "generation"
+GROUPS_VERSION_KEY = "groups_version"
+
+SLOW_QUERY_MS = 100.0
+"""Statements taking longer than this are logged with their query plan."""
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    pers_id VARCHAR PRIMARY KEY,
+    first_name VARCHAR,
+    last_name VARCHAR
+);
+CREATE TABLE IF NOT EXISTS texts (
+    text_id VARCHAR PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS catalogueentries (
+    catalogue_id VARCHAR PRIMARY KEY,
+    shelfmark VARCHAR,
+    manuscript_id VARCHAR,
+    catalogue_filename VARCHAR,
+    title VARCHAR,
+    description VARCHAR,
+    date_string VARCHAR,
+    terminus_post_quem INTEGER,
+    terminus_ante_quem INTEGER,
+    date_mean INTEGER,
+    dating_range INTEGER,
+    support VARCHAR,
+    folio INTEGER,
+    height VARCHAR,
+    width VARCHAR,
+    extent VARCHAR,
+    origin VARCHAR,
+    creator VARCHAR,
+    country VARCHAR,
+    settlement VARCHAR,
+    repository VARCHAR
+);
+CREATE TABLE IF NOT EXISTS manuscripts (
+    manuscript_id VARCHAR PRIMARY KEY,
+    shelfmark VARCHAR,
+    catalogue_entries INTEGER,
+    catalogue_ids VARCHAR,
+    catalogue_filenames VARCHAR,
+    title VARCHAR,
+    description VARCHAR,
+    date_string VARCHAR,
+    terminus_post_quem INTEGER,
+    termini_post_quos VARCHAR,
+    terminus_ante_quem INTEGER,
+    termini_ante_quos VARCHAR,
+    date_mean INTEGER,
+    date_standard_deviation DOUBLE,
+    support VARCHAR,
+    folio INTEGER,
+    height VARCHAR,
+    width VARCHAR,
+    extent VARCHAR,
+    origin VARCHAR,
+    creator VARCHAR,
+    country VARCHAR,
+    settlement VARCHAR,
+    repository VARCHAR
+);
+CREATE TABLE IF NOT EXISTS personcataloguejunction (pers_id VARCHAR, catalogue_id VARCHAR);
+CREATE TABLE IF NOT EXISTS personmanuscriptjunction (pers_id VARCHAR, manuscript_id VARCHAR);
+CREATE TABLE IF NOT EXISTS textcataloguejunction (text_id VARCHAR, catalogue_id VARCHAR);
+CREATE TABLE IF NOT EXISTS textmanuscriptjunction (text_id VARCHAR, manuscript_id VARCHAR);
+CREATE TABLE IF NOT EXISTS browse_index (entity VARCHAR, key VARCHAR, label VARCHAR);
+CREATE TABLE IF NOT EXISTS groups (
+    group_id UUID PRIMARY KEY,
+    group_type VARCHAR,
+    name VARCHAR,
+    date DOUBLE
+);
+CREATE TABLE IF NOT EXISTS group_items (
+    group_id UUID,
+    item_id VARCHAR,
+    PRIMARY KEY (group_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS databaseinfo (
+    key VARCHAR PRIMARY KEY,
+    value VARCHAR
+);
+CREATE TABLE IF NOT EXISTS unification_conflicts (
+    conflict_id INTEGER,
+    manuscript_id VARCHAR,
+    field VARCHAR,
+    "values" VARCHAR[],
+    rule VARCHAR,
+    result VARCHAR
+);
+CREATE TABLE IF NOT EXISTS corpus_statistics (
+    statistic VARCHAR,
+    position INTEGER,
+    label VARCHAR,
+    value BIGINT,
+    PRIMARY KEY (statistic, position)
+);
+"""
+
+_CATALOGUE_COLUMNS = [f.name for f in fields(CatalogueEntry) if f.name not in ("texts", "people")]
+_MANUSCRIPT_COLUMNS = [f.name for f in fields(Manuscript) if f.name not in ("texts", "people")]
+
+_BROWSE_TABLES: dict[BrowseEntity, tuple[str, str]] = {
+    BrowseEntity.Manuscripts: ("manuscripts", "manuscript_id"),
+    BrowseEntity.Texts: ("texts", "text_id"),
+    BrowseEntity.People: ("people", "pers_id"),
+}
+
+
+def _count(junction: str, foreign_key: str, key: str) -> str:
+    """Returns a column counting the rows of a junction table related to each row."""
+    return f"(SELECT count(*) FROM {junction} AS j WHERE j.{foreign_key} = t.{key})"
+
+
+_BROWSE_COLUMNS: dict[BrowseEntity, dict[str, str]] = {
+    BrowseEntity.Manuscripts: {
+        "manuscript_id": "t.manuscript_id",
+        "shelfmark": "t.shelfmark",
+        "title": "t.title",
+        "date_string": "t.date_string",
+        "date_mean": "t.date_mean",
+        "repository": "t.repository",
+        "texts": _count("textmanuscriptjunction", "manuscript_id", "manuscript_id"),
+        "people": _count("personmanuscriptjunction", "manuscript_id", "manuscript_id"),
+    },
+    BrowseEntity.Texts: {
+        "text_id": "t.text_id",
+        "manuscripts": _count("textmanuscriptjunction", "text_id", "text_id"),
+    },
+    BrowseEntity.People: {
+        "pers_id": "t.pers_id",
+        "first_name": "t.first_name",
+        "last_name": "t.last_name",
+        "manuscripts": _count("personmanuscriptjunction", "pers_id", "pers_id"),
+    },
+}
+"""SQL expressions of the columns of the listing of each entity, by name. `t` is the table of the entity."""
+
+
+def get_connection(db_path: str = DUCKDB_DATABASE_PATH, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+    """Opens a DuckDB database, given a DB path. Can be `:memory:` for an in-memory database.
+
+    A database file can be opened by multiple processes only if all of them open it in read-only mode.
+    """
+    log.info("Get DuckDB connection to: %s", db_path)
+    return duckdb.connect(db_path, read_only=read_only)
+
+
+@dataclass(frozen=True)
+class DatabaseDuckDBImpl:
+    """DuckDB implementation of the `Database` protocol.
+
+    DuckDB stores the tables column by column and executes queries vectorized,
+    which suits the aggregations over whole tables of the browse view and of analytical queries.
+    It is built from the same data as the SQLite database, see `add_data()`.
+
+    Every call runs on its own cursor of the connection, so the instance can be shared between threads.
+    Writes are serialized by a lock, as DuckDB aborts conflicting concurrent transactions instead of waiting.
+    """
+    connection: duckdb.DuckDBPyConnection = field(default_factory=get_connection)
+    slow_ms: float = SLOW_QUERY_MS
+    _write_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def setup_db(self) -> None:
+        log.info("Create Database Metadata")
+        with self._cursor() as cur:
+            cur.execute(_SCHEMA)
+            tables = [r[0] for r in cur.execute("SELECT table_name FROM duckdb_tables() ORDER BY table_name").fetchall()]
+        log.info("Database has tables: %s", tables)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @contextmanager
+    def _cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """A new cursor of the connection, which can be used on this thread independently of other threads."""
+        cur = self.connection.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """A cursor in a transaction, which is committed at the end of the `with` block, or rolled back on an error."""
+        with self._write_lock, self._cursor() as cur:
+            cur.begin()
+            try:
+                yield cur
+            except BaseException:
+                cur.rollback()
+                raise
+            cur.commit()
+
+    def _query(self, statement: str, parameters: Optional[list[Any]] = None) -> list[tuple[Any, ...]]:
+        """Executes a query on a new cursor."""
+        with self._cursor() as cur:
+            return self._execute(cur, statement, parameters)
+
+    def _execute(self, cur: duckdb.DuckDBPyConnection, statement: str, parameters: Optional[list[Any]] = None) -> list[tuple[Any, ...]]:
+        """Executes a statement on the cursor and fetches its result, recording its latency in `latency.statements`."""
+        start = time.perf_counter()
+        res = cur.execute(statement, parameters).fetchall()
+        ms = (time.perf_counter() - start) * 1000
+        latency.statements.add(statement, ms)
+        if ms > self.slow_ms:
+            plan = _query_plan(cur, statement, parameters)
+            log.warning("Slow query (%.1f ms): %s %s\nPlan: %s", ms, statement, parameters, plan)
+            latency.statements.add_slow(latency.SlowQuery(time.time(), ms, statement, str(parameters), plan))
+        return res
+
+    def get_metadata(self, ms_ids: list[str]) -> pd.DataFrame:
+        log.debug("Loading metadata for manuscripts: %s", ms_ids)
+        rows = self._query(
+            f"SELECT {', '.join(_MANUSCRIPT_COLUMNS)} FROM manuscripts "
+            "WHERE manuscript_id IN (SELECT unnest(?::VARCHAR[])) ORDER BY manuscript_id",
+            [ms_ids]
+        )
+        log.debug("Retrieved metadata entries: %s", len(rows))
+        return pd.DataFrame(rows, columns=_MANUSCRIPT_COLUMNS)
+
+    def ms_x_ppl(self, pers_ids: list[str]) -> list[str]:
+        log.debug("Loading manuscripts by people: %s", pers_ids)
+        mss = self._related("personmanuscriptjunction", "manuscript_id", "pers_id", pers_ids)
+        log.debug("Retrieved manuscripts: %s", len(mss))
+        return mss
+
+    def ppl_x_mss(self, ms_ids: list[str]) -> list[str]:
+        log.debug("Loading people by manuscripts: %s", ms_ids)
+        ppl = self._related("personmanuscriptjunction", "pers_id", "manuscript_id", ms_ids)
+        log.debug("Retrieved people: %s", len(ppl))
+        return ppl
+
+    def ms_x_txts(self, txts: list[str]) -> list[str]:
+        log.debug("Loading manuscripts by texts: %s", txts)
+        mss = self._related("textmanuscriptjunction", "manuscript_id", "text_id", txts)
+        log.debug("Retrieved manuscripts: %s", len(mss))
+        return mss
+
+    def txts_x_ms(self, ms_ids: list[str]) -> list[str]:
+        log.debug("Loading texts by manuscripts: %s", ms_ids)
+        txts = self._related("textmanuscriptjunction", "text_id", "manuscript_id", ms_ids)
+        log.debug("Retrieved texts: %s", len(txts))
+        return txts
+
+    def _related(self, junction: str, column: str, by: str, ids: list[str]) -> list[str]:
+        """Returns the distinct values of `column` of the rows of a junction table where `by` is one of `ids`."""
+        rows = self._query(f"SELECT DISTINCT {column} FROM {junction} WHERE {by} IN (SELECT unnest(?::VARCHAR[]))", [ids])
+        return [r[0] for r in rows]
+
+    def browse(self, entity: BrowseEntity, search: str, sort_by: str, descending: bool, offset: int, limit: int) -> BrowsePage:
+        table, key = _BROWSE_TABLES[entity]
+        columns = _BROWSE_COLUMNS[entity]
+        if sort_by not in columns:
+            raise ValueError(f"Cannot sort {entity.name} by: {sort_by}")
+        where, parameters = "", []
+        if search:
+            where = f"WHERE t.{key} IN (SELECT key FROM browse_index WHERE entity = ? AND contains(label, ?))"
+            parameters = [entity.value, search.casefold()]
+        # NULL sorts first in ascending order, as in SQLite
+        order = f"{columns[sort_by]} {'DESC NULLS LAST' if descending else 'ASC NULLS FIRST'}, t.{key}"
+        select = ", ".join(f"{expression} AS {name}" for name, expression in columns.items())
+        with self._cursor() as cur:
+            total = self._execute(cur, f"SELECT count(*) FROM {table} AS t {where}", parameters)[0][0]
+            rows = self._execute(
+                cur,
+                f"SELECT {select} FROM {table} AS t {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                parameters + [limit, offset]
+            )
+        log.debug("Browsing %s: %s of %s rows at offset %s", entity.name, len(rows), total, offset)
+        return BrowsePage(total, offset, pd.DataFrame(rows, columns=list(columns)))
+
+    def persons_lookup_dict(self) -> dict[str, str]:
+        ppl = self._query("SELECT pers_id, first_name, last_name FROM people")
+        res = {p[0]: f"{p[1]} {p[2]}" for p in ppl}
+        log.info("Created person lookup dict: %s", len(res.keys()))
+        return res
+
+    def ms_lookup_dict(self) -> dict[str, list[str]]:
+        mss = self._query("SELECT manuscript_id, shelfmark, title FROM manuscripts")
+        res = {x[0]: [x[1], x[2]] for x in mss}
+        log.info("Created manuscript lookup dict: %s", len(res.keys()))
+        return res
+
+    def txt_lookup_list(self) -> list[str]:
+        res = [t[0] for t in self._query("SELECT text_id FROM texts")]
+        log.info("Created text lookup list: %s", len(res))
+        return res
+
+    def get_ms_groups(self) -> list[Group]:
+        res = self._get_groups(GroupType.ManuscriptGroup)
+        log.debug("Retrieved manuscript groups: %s", len(res))
+        return res
+
+    def get_ppl_groups(self) -> list[Group]:
+        res = self._get_groups(GroupType.PersonGroup)
+        log.debug("Retrieved people groups: %s", len(res))
+        return res
+
+    def get_txt_groups(self) -> list[Group]:
+        res = self._get_groups(GroupType.TextGroup)
+        log.debug("Retrieved text groups: %s", len(res))
+        return res
+
+    def get_all_groups(self) -> list[Group]:
+        res = self._get_groups()
+        log.debug("Retrieved groups: %s", len(res))
+        return res
+
+    def _get_groups(self, group_type: Optional[GroupType] = None) -> list[Group]:
+        """Loads groups with their items in a single query, optionally restricted to one group type."""
+        where, parameters = ("WHERE g.group_type = ?", [group_type.name]) if group_type is not None else ("", [])
+        rows = self._query(
+            "SELECT g.group_id, g.group_type, g.name, g.date, list(i.item_id) FILTER (WHERE i.item_id IS NOT NULL) "
+            f"FROM groups AS g LEFT JOIN group_items AS i ON i.group_id = g.group_id {where} "
+            "GROUP BY g.group_id, g.group_type, g.name, g.date ORDER BY g.date, g.group_id",
+            parameters
+        )
+        return [Group(
+            group_type=GroupType[t],
+            name=name,
+            items=set(items or ()),
+            date=datetime.fromtimestamp(date, timezone.utc).astimezone(),
+            group_id=group_id,
+        ) for group_id, t, name, date, items in rows]
+
+    def add_group(self, group: Group) -> None:
+        def write(cur: duckdb.DuckDBPyConnection) -> None:
+            self._insert_group(cur, group)
+        self._write(write)
+        log.debug("Added group: %s", group.group_id)
+
+    def update_group(self, group: Group, group_id: UUID) -> None:
+        def write(cur: duckdb.DuckDBPyConnection) -> Optional[tuple[int, int]]:
+            exists = self._execute(cur, "SELECT count(*) FROM groups WHERE group_id = ?", [group_id])[0][0]
+            if not exists or group.group_id != group_id:
+                if exists:
+                    self._delete_group(cur, group_id)
+                self._insert_group(cur, group)
+                return None
+            self._execute(
+                cur,
+                "UPDATE groups SET group_type = ?, name = ?, date = ? WHERE group_id = ?",
+                [group.group_type.name, group.name, group.date.timestamp(), group_id]
+            )
+            items_old = {r[0] for r in self._execute(cur, "SELECT item_id FROM group_items WHERE group_id = ?", [group_id])}
+            removed = self._remove_items(cur, group_id, items_old - group.items)
+            added = self._add_items(cur, group_id, group.items - items_old)
+            return added, removed
+        res = self._write(write)
+        if res is None:
+            log.debug("Replaced group: %s", group_id)
+        else:
+            log.debug("Updated group: %s (+%s/-%s items)", group_id, res[0], res[1])
+
+    def add_group_items(self, group_id: UUID, items: set[str]) -> None:
+        def write(cur: duckdb.DuckDBPyConnection) -> Optional[int]:
+            # the group may have been deleted by another session, and its items would then be left behind
+            if not self._execute(cur, "SELECT count(*) FROM groups WHERE group_id = ?", [group_id])[0][0]:
+                return None
+            existing = self._execute(
+                cur,
+                "SELECT item_id FROM group_items WHERE group_id = ? AND item_id IN (SELECT unnest(?::VARCHAR[]))",
+                [group_id, list(items)]
+            )
+            return self._add_items(cur, group_id, items - {r[0] for r in existing})
+        added = self._write(write)
+        if added is None:
+            log.warning("No items added to missing group: %s", group_id)
+        else:
+            log.debug("Added %s items to group: %s", added, group_id)
+
+    def remove_group_items(self, group_id: UUID, items: set[str]) -> None:
+        def write(cur: duckdb.DuckDBPyConnection) -> int:
+            return self._remove_items(cur, group_id, items)
+        removed = self._write(write)
+        log.debug("Removed %s items from group: %s", removed, group_id)
+
+    def _insert_group(self, cur: duckdb.DuckDBPyConnection, group: Group) -> None:
+        self._execute(
+            cur,
+            "INSERT INTO groups (group_id, group_type, name, date) VALUES (?, ?, ?, ?)",
+            [group.group_id, group.group_type.name, group.name, group.date.timestamp()]
+        )
+        self._add_items(cur, group.group_id, group.items)
+
+    def _delete_group(self, cur: duckdb.DuckDBPyConnection, group_id: UUID) -> None:
+        self._execute(cur, "DELETE FROM group_items WHERE group_id = ?", [group_id])
+        self._execute(cur, "DELETE FROM groups WHERE group_id = ?", [group_id])
+
+    def _add_items(self, cur: duckdb.DuckDBPyConnection, group_id: UUID, items: set[str]) -> int:
+        if items:
+            self._execute(cur, "INSERT INTO group_items SELECT ?, unnest(?::VARCHAR[])", [group_id, list(items)])
+        return len(items)
+
+    def _remove_items(self, cur: duckdb.DuckDBPyConnection, group_id: UUID, items: set[str]) -> int:
+        if not items:
+            return 0
+        res = self._execute(
+            cur,
+            "DELETE FROM group_items WHERE group_id = ? AND item_id IN (SELECT unnest(?::VARCHAR[]))",
+            [group_id, list(items)]
+        )
+        return int(res[0][0])
+
+    def union_groups(self, group_ids: list[UUID]) -> list[str]:
+        rows = self._query("SELECT DISTINCT item_id FROM group_items WHERE group_id IN (SELECT unnest(?::UUID[]))", [group_ids])
+        log.debug("Union of %s groups: %s", len(group_ids), len(rows))
+        return [r[0] for r in rows]
+
+    def intersect_groups(self, group_ids: list[UUID]) -> list[str]:
+        n = len(set(group_ids))
+        rows = self._query(
+            "SELECT item_id FROM group_items WHERE group_id IN (SELECT unnest(?::UUID[])) GROUP BY item_id HAVING count(*) = ?",
+            [group_ids, n]
+        )
+        log.debug("Intersection of %s groups: %s", n, len(rows))
+        return [r[0] for r in rows]
+
+    def delete_group(self, group_id: UUID) -> None:
+        def write(cur: duckdb.DuckDBPyConnection) -> None:
+            self._delete_group(cur, group_id)
+        self._write(write)
+        log.debug("Deleted group: %s", group_id)
+
+    def _write(self, operation: Callable[[duckdb.DuckDBPyConnection], T]) -> T:
+        """Executes a group change in a transaction, incrementing the groups version with it."""
+        with self._transaction() as cur:
+            res = operation(cur)
+            self._execute(
+                cur,
+                "INSERT INTO databaseinfo (key, value) VALUES (?, '1') "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + 1 AS VARCHAR)",
+                [GROUPS_VERSION_KEY]
+            )
+        return res
+
+    def get_groups_version(self) -> int:
+        rows = self._query("SELECT value FROM databaseinfo WHERE key = ?", [GROUPS_VERSION_KEY])
+        return int(rows[0][0]) if rows else 0
+
+    def get_generation(self) -> str:
+        rows = self._query("SELECT value FROM databaseinfo WHERE key = ?", [GENERATION_KEY])
+        return str(rows[0][0]) if rows else ""
+
+    def add_data(self, people: list[Person], catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
+        """Adds all data in a single transaction, loading each table in bulk from a data frame."""
+        log.info("Adding data to database...")
+        texts = list({t for ms in manuscripts for t in ms.texts})
+        generation = uuid4().hex
+        with self._transaction() as cur:
+            self._add_entities(cur, people, texts, catalogue_entries, manuscripts)
+            log.info("People, texts, catalogue entries and manuscripts added: %s, %s, %s, %s",
+                     len(people), len(texts), len(catalogue_entries), len(manuscripts))
+            self._create_junction_tables(cur, catalogue_entries, manuscripts)
+            log.info("Junction tables created.")
+            self._build_browse_index(cur, people, texts, manuscripts)
+            self._execute(cur, "INSERT OR REPLACE INTO databaseinfo (key, value) VALUES (?, ?)", [GENERATION_KEY, generation])
+        log.info("Database generation: %s", generation)
+
+    @profiling.profiled
+    def _add_entities(self, cur: duckdb.DuckDBPyConnection, people: list[Person], texts: list[str],
+                      catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
+        _insert(cur, "people", ["pers_id", "first_name", "last_name"],
+                [(p.pers_id, p.first_name, p.last_name) for p in people])
+        _insert(cur, "texts", ["text_id"], [(t,) for t in texts])
+        _insert(cur, "catalogueentries", _CATALOGUE_COLUMNS,
+                list(map(operator.attrgetter(*_CATALOGUE_COLUMNS), catalogue_entries)))
+        _insert(cur, "manuscripts", _MANUSCRIPT_COLUMNS,
+                list(map(operator.attrgetter(*_MANUSCRIPT_COLUMNS), manuscripts)))
+
+    @profiling.profiled
+    def _create_junction_tables(self, cur: duckdb.DuckDBPyConnection, catalogue_entries: list[CatalogueEntry],
+                                manuscripts: list[Manuscript]) -> None:
+        _insert(cur, "textcataloguejunction", ["text_id", "catalogue_id"],
+                [(t, c.catalogue_id) for c in catalogue_entries for t in c.texts])
+        _insert(cur, "personcataloguejunction", ["pers_id", "catalogue_id"],
+                [(p, c.catalogue_id) for c in catalogue_entries for p in c.people])
+        _insert(cur, "textmanuscriptjunction", ["text_id", "manuscript_id"],
+                [(t, m.manuscript_id) for m in manuscripts for t in m.texts])
+        _insert(cur, "personmanuscriptjunction", ["pers_id", "manuscript_id"],
+                [(p, m.manuscript_id) for m in manuscripts for p in m.people])
+
+    @profiling.profiled
+    def _build_browse_index(self, cur: duckdb.DuckDBPyConnection, people: list[Person], texts: list[str],
+                            manuscripts: list[Manuscript]) -> None:
+        rows = [(BrowseEntity.Manuscripts.value, m.manuscript_id, search_label(m.manuscript_id, m.shelfmark, m.title))
+                for m in manuscripts]
+        rows += [(BrowseEntity.People.value, p.pers_id, search_label(p.pers_id, p.first_name, p.last_name))
+                 for p in people]
+        rows += [(BrowseEntity.Texts.value, t, search_label(t)) for t in texts]
+        _insert(cur, "browse_index", ["entity", "key", "label"], rows)
+        log.info("Browse index created: %s", len(rows))
+
+    def add_unification_conflicts(self, conflicts: list[UnificationConflict]) -> None:
+        rows = [(i, c.manuscript_id, c.field, list(c.values), c.rule, c.result) for i, c in enumerate(conflicts)]
+        with self._transaction() as cur:
+            self._execute(cur, "DELETE FROM unification_conflicts")
+            _insert(cur, "unification_conflicts", ["conflict_id", "manuscript_id", "field", "values", "rule", "result"], rows)
+        log.info("Unification conflicts added: %s", len(rows))
+
+    def get_unification_conflicts_summary(self) -> pd.DataFrame:
+        rows = self._query(
+            "SELECT field, rule, count(*) AS manuscripts FROM unification_conflicts "
+            "GROUP BY field, rule ORDER BY manuscripts DESC, field"
+        )
+        return pd.DataFrame(rows, columns=["field", "rule", "manuscripts"])
+
+    def get_unification_conflicts(self, field: Optional[str], offset: int, limit: int) -> pd.DataFrame:
+        columns = ["manuscript_id", "field", "values", "rule", "result"]
+        where, parameters = ("WHERE field = ?", [field]) if field else ("", [])
+        rows = self._query(
+            'SELECT manuscript_id, field, "values", rule, result FROM unification_conflicts '
+            f"{where} ORDER BY manuscript_id, field, conflict_id LIMIT ? OFFSET ?",
+            parameters + [limit, offset]
+        )
+        return pd.DataFrame(rows, columns=columns)
+
+    def add_corpus_statistics(self, statistics: CorpusStatistics) -> None:
+        rows = [(s.value, i, label, value) for s, values in statistics.items() for i, (label, value) in enumerate(values)]
+        with self._transaction() as cur:
+            self._execute(cur, "DELETE FROM corpus_statistics")
+            _insert(cur, "corpus_statistics", ["statistic", "position", "label", "value"], rows)
+        log.info("Corpus statistics added: %s", len(statistics))
+
+    def get_corpus_statistics(self) -> CorpusStatistics:
+        res: CorpusStatistics = {}
+        for statistic, label, value in self._query(
+                "SELECT statistic, label, value FROM corpus_statistics ORDER BY statistic, position"):
+            res.setdefault(CorpusStatistic(statistic), []).append((label, value))
+        return res
+
+
+def _insert(cur: duckdb.DuckDBPyConnection, table: str, columns: list[str], rows: Sequence[tuple[Any, ...]]) -> None:
+    """Inserts the rows into the table in bulk, by scanning them as a data frame."""
+    if not rows:
+        return
+    names = ", ".join(f'"{c}"' for c in columns)
+    cur.register("_rows", pd.DataFrame(rows, columns=columns))
+    try:
+        cur.execute(f"INSERT INTO {table} ({names}) SELECT * FROM _rows")
+    finally:
+        cur.unregister("_rows")
+
+
+def _query_plan(cur: duckdb.DuckDBPyConnection, statement: str, parameters: Optional[list[Any]]) -> list[str]:
+    """Gets the physical plan of a query from DuckDB, as lines of its rendered operator tree."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    try:
+        rows = cur.execute(f"EXPLAIN {statement}", parameters).fetchall()
+    except Exception:
+        log.exception("Failed to get the query plan")
+        return []
+    return [line for _, plan in rows for line in plan.splitlines()]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from logging import Logger
+from typing import Any, Iterable, Mapping, Optional
+from uuid import UUID
+
+import numpy.typing as npt
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.future import Engine
+
+from lib import utils
+from lib.browse import BrowseEntity, BrowsePage
+from lib.conflicts import UnificationConflict
+from lib.corpus_statistics import CorpusStatistics
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+from lib.groups import Group
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+log: Logger = utils.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class MemoryTables:
+    """The data of one generation of the database, as held in memory.
+
+    Args:
+        generation (str): the generation of the database the data was loaded from.
+        metadata (dict[str, npt.NDArray]): the columns of the `manuscripts` table, by name, all in the same row order.
+        rows (dict[str, int]): hash index from manuscript ID to its row in the metadata columns.
+        people (dict[str, tuple[Optional[str], Optional[str]]]): first and last name of each person, by ID.
+        texts (list[str]): all text IDs.
+        ppl_by_ms, mss_by_person, txts_by_ms, mss_by_txt (dict[str, tuple[str, ...]]):
+            adjacency lists of the relations between manuscripts and people and between manuscripts and texts,
+            in both directions.
+    """
+    generation: str
+    metadata: dict[str, npt.NDArray[Any]]
+    rows: dict[str, int]
+    people: dict[str, tuple[Optional[str], Optional[str]]]
+    texts: list[str]
+    ppl_by_ms: dict[str, tuple[str, ...]]
+    mss_by_person: dict[str, tuple[str, ...]]
+    txts_by_ms: dict[str, tuple[str, ...]]
+    mss_by_txt: dict[str, tuple[str, ...]]
+
+    @staticmethod
+    def load(engine: Engine, generation: str) -> MemoryTables:
+        """Loads all manuscripts, people, texts and their relations from a SQLite database."""
+        with engine.connect() as conn:
+            result = conn.execute(text("SELECT * FROM manuscripts ORDER BY manuscript_id"))
+            mss = pd.DataFrame(result.all(), columns=list(result.keys()))
+            people = conn.execute(text("SELECT pers_id, first_name, last_name FROM people")).all()
+            texts = conn.execute(text("SELECT text_id FROM texts")).all()
+            pxm = conn.execute(text("SELECT manuscript_id, pers_id FROM personmanuscriptjunction")).all()
+            txm = conn.execute(text("SELECT manuscript_id, text_id FROM textmanuscriptjunction")).all()
+        ms_ids = mss["manuscript_id"].tolist()
+        return MemoryTables(
+            generation=generation,
+            metadata={c: mss[c].to_numpy() for c in mss.columns},
+            rows={ms_id: i for i, ms_id in enumerate(ms_ids)},
+            people={p[0]: (p[1], p[2]) for p in people},
+            texts=[t[0] for t in texts],
+            ppl_by_ms=_adjacency((ms, p) for ms, p in pxm),
+            mss_by_person=_adjacency((p, ms) for ms, p in pxm),
+            txts_by_ms=_adjacency((ms, t) for ms, t in txm),
+            mss_by_txt=_adjacency((t, ms) for ms, t in txm),
+        )
+
+
+def _adjacency(pairs: Iterable[tuple[str, str]]) -> dict[str, tuple[str, ...]]:
+    res: defaultdict[str, list[str]] = defaultdict(list)
+    for a, b in pairs:
+        res[a].append(b)
+    return {k: tuple(v) for k, v in res.items()}
+
+
+def _related(adjacency: Mapping[str, tuple[str, ...]], ids: list[str]) -> list[str]:
+    """The distinct items related to any of the IDs, in the order they are first found."""
+    return list(dict.fromkeys(x for i in ids for x in adjacency.get(i, ())))
+
+
+class DatabaseMemoryImpl:
+    """In-memory implementation of the `Database` protocol, on top of a SQLite database, for read-heavy serving.
+
+    All manuscripts, people, texts and their relations are loaded from the SQLite database once, when it is created.
+    The relation queries, the metadata of manuscripts and the lookups are then answered from memory, without SQL:
+    the metadata is held column by column in arrays, with a hash index from manuscript ID to row,
+    and the relations in adjacency lists in both directions.
+
+    Everything else, i.e. browsing, groups, unification conflicts and corpus statistics,
+    is delegated to the SQLite database, and so are all writes. After `add_data()`, the data is loaded anew.
+    """
+
+    def __init__(self, sqlite: DatabaseSQLiteImpl) -> None:
+        self.sqlite = sqlite
+        self.tables = self._load()
+
+    def _load(self) -> MemoryTables:
+        tables = MemoryTables.load(self.sqlite.engine, self.sqlite.get_generation())
+        log.info("Loaded database into memory: %s manuscripts, %s people, %s texts",
+                 len(tables.rows), len(tables.people), len(tables.texts))
+        return tables
+
+    def get_metadata(self, ms_ids: list[str]) -> pd.DataFrame:
+        log.debug("Loading metadata for manuscripts: %s", ms_ids)
+        tables = self.tables
+        rows = sorted(tables.rows[i] for i in set(ms_ids) if i in tables.rows)
+        log.debug("Retrieved metadata entries: %s", len(rows))
+        return pd.DataFrame({c: column[rows] for c, column in tables.metadata.items()})
+
+    def ms_x_ppl(self, pers_ids: list[str]) -> list[str]:
+        return _related(self.tables.mss_by_person, pers_ids)
+
+    def ppl_x_mss(self, ms_ids: list[str]) -> list[str]:
+        return _related(self.tables.ppl_by_ms, ms_ids)
+
+    def ms_x_txts(self, txts: list[str]) -> list[str]:
+        return _related(self.tables.mss_by_txt, txts)
+
+    def txts_x_ms(self, ms_ids: list[str]) -> list[str]:
+        return _related(self.tables.txts_by_ms, ms_ids)
+
+    def browse(self, entity: BrowseEntity, search: str, sort_by: str, descending: bool, offset: int, limit: int) -> BrowsePage:
+        return self.sqlite.browse(entity, search, sort_by, descending, offset, limit)
+
+    def persons_lookup_dict(self) -> dict[str, str]:
+        return {pers_id: f"{first} {last}" for pers_id, (first, last) in self.tables.people.items()}
+
+    def ms_lookup_dict(self) -> dict[str, list[str]]:
+        metadata = self.tables.metadata
+        return {ms_id: [shelfmark, title] for ms_id, shelfmark, title
+                in zip(metadata["manuscript_id"], metadata["shelfmark"], metadata["title"])}
+
+    def txt_lookup_list(self) -> list[str]:
+        return list(self.tables.texts)
+
+    def get_ms_groups(self) -> list[Group]:
+        return self.sqlite.get_ms_groups()
+
+    def get_ppl_groups(self) -> list[Group]:
+        return self.sqlite.get_ppl_groups()
+
+    def get_txt_groups(self) -> list[Group]:
+        return self.sqlite.get_txt_groups()
+
+    def get_all_groups(self) -> list[Group]:
+        return self.sqlite.get_all_groups()
+
+    def add_group(self, group: Group) -> None:
+        self.sqlite.add_group(group)
+
+    def update_group(self, group: Group, group_id: UUID) -> None:
+        self.sqlite.update_group(group, group_id)
+
+    def add_group_items(self, group_id: UUID, items: set[str]) -> None:
+        self.sqlite.add_group_items(group_id, items)
+
+    def remove_group_items(self, group_id: UUID, items: set[str]) -> None:
+        self.sqlite.remove_group_items(group_id, items)
+
+    def union_groups(self, group_ids: list[UUID]) -> list[str]:
+        return self.sqlite.union_groups(group_ids)
+
+    def intersect_groups(self, group_ids: list[UUID]) -> list[str]:
+        return self.sqlite.intersect_groups(group_ids)
+
+    def delete_group(self, group_id: UUID) -> None:
+        self.sqlite.delete_group(group_id)
+
+    def get_groups_version(self) -> int:
+        return self.sqlite.get_groups_version()
+
+    def get_generation(self) -> str:
+        return self.tables.generation
+
+    def add_data(self, people: list[Person], catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
+        self.sqlite.add_data(people, catalogue_entries, manuscripts)
+        self.tables = self._load()
+
+    def add_unification_conflicts(self, conflicts: list[UnificationConflict]) -> None:
+        self.sqlite.add_unification_conflicts(conflicts)
+
+    def get_unification_conflicts_summary(self) -> pd.DataFrame:
+        return self.sqlite.get_unification_conflicts_summary()
+
+    def get_unification_conflicts(self, field: Optional[str], offset: int, limit: int) -> pd.DataFrame:
+        return self.sqlite.get_unification_conflicts(field, offset, limit)
+
+    def add_corpus_statistics(self, statistics: CorpusStatistics) -> None:
+        self.sqlite.add_corpus_statistics(statistics)
+
+    def get_corpus_statistics(self) -> CorpusStatistics:
+        return self.sqlite.get_corpus_statistics()
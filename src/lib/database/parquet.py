@@ -0,0 +1,173 @@
+"""
+This module exports the built database to a Parquet dataset, for analysis outside of the app.
+
+The dataset is a directory with one Parquet file per table, and a `manifest.json` that lists them.
+The columns are typed: the joined lists of the manuscripts (`catalogue_ids`, `termini_post_quos`, ...)
+become list columns, and columns with few distinct values are read back as categoricals.
+All columns are dictionary-encoded in the files, as long as their dictionaries stay small.
+The rows are sorted by their keys, and written in row groups with statistics, so readers can skip row groups
+when filtering on these keys. Every file and the manifest are tagged with the handrit commit the database was built from,
+and the database generation.
+
+    pq.read_table("data/db/parquet/manuscripts.parquet", memory_map=True)
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from logging import Logger
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from lib import utils
+from lib.constants import HANDRIT_PATH, PARQUET_EXPORT_PATH
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+
+log: Logger = utils.get_logger(__name__)
+
+ROW_GROUP_SIZE = 10_000
+MANIFEST = "manifest.json"
+
+_SEPARATOR = " | "
+"""Separator of the values that were joined when unifying catalogue entries to manuscripts"""
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+_PLACE = [("origin", _DICT), ("creator", _DICT), ("country", _DICT), ("settlement", _DICT), ("repository", _DICT)]
+_DESCRIPTION = [("support", _DICT), ("folio", pa.int32()), ("height", _DICT), ("width", _DICT), ("extent", _DICT)]
+
+TABLES: dict[str, tuple[list[str], pa.Schema]] = {
+    "manuscripts": (["manuscript_id"], pa.schema([
+        ("manuscript_id", pa.string()),
+        ("shelfmark", pa.string()),
+        ("catalogue_entries", pa.int32()),
+        ("catalogue_ids", pa.list_(pa.string())),
+        ("catalogue_filenames", pa.list_(pa.string())),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("date_string", _DICT),
+        ("terminus_post_quem", pa.int32()),
+        ("termini_post_quos", pa.list_(pa.int32())),
+        ("terminus_ante_quem", pa.int32()),
+        ("termini_ante_quos", pa.list_(pa.int32())),
+        ("date_mean", pa.int32()),
+        ("date_standard_deviation", pa.float64()),
+        *_DESCRIPTION,
+        *_PLACE,
+    ])),
+    "catalogueentries": (["catalogue_id"], pa.schema([
+        ("catalogue_id", pa.string()),
+        ("shelfmark", pa.string()),
+        ("manuscript_id", pa.string()),
+        ("catalogue_filename", pa.string()),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("date_string", _DICT),
+        ("terminus_post_quem", pa.int32()),
+        ("terminus_ante_quem", pa.int32()),
+        ("date_mean", pa.int32()),
+        ("dating_range", pa.int32()),
+        *_DESCRIPTION,
+        *_PLACE,
+    ])),
+    "people": (["pers_id"], pa.schema([("pers_id", pa.string()), ("first_name", _DICT), ("last_name", pa.string())])),
+    "texts": (["text_id"], pa.schema([("text_id", pa.string())])),
+    "personmanuscriptjunction": (["manuscript_id", "pers_id"],
+                                 pa.schema([("manuscript_id", pa.string()), ("pers_id", pa.string())])),
+    "textmanuscriptjunction": (["manuscript_id", "text_id"],
+                               pa.schema([("manuscript_id", pa.string()), ("text_id", pa.string())])),
+    "personcataloguejunction": (["catalogue_id", "pers_id"],
+                                pa.schema([("catalogue_id", pa.string()), ("pers_id", pa.string())])),
+    "textcataloguejunction": (["catalogue_id", "text_id"],
+                              pa.schema([("catalogue_id", pa.string()), ("text_id", pa.string())])),
+}
+"""The exported tables of the database: the columns they are sorted by, and their schema."""
+
+
+def _split(value: str) -> list[str]:
+    return value.split(_SEPARATOR) if value else []
+
+
+def _ints(value: str) -> list[int]:
+    res = []
+    for v in _split(value):
+        try:
+            res.append(int(v))
+        except ValueError:
+            log.warning("Not a year, left out of the Parquet export: %s", v)
+    return res
+
+
+_CONVERSIONS: dict[str, Callable[[str], Any]] = {
+    "catalogue_ids": _split,
+    "catalogue_filenames": _split,
+    "termini_post_quos": _ints,
+    "termini_ante_quos": _ints,
+}
+"""Conversions of the values of columns that are stored as strings in the database, by column name."""
+
+
+def handrit_commit(path: str = HANDRIT_PATH) -> str:
+    """The commit of the handrit.is data checked out at `path`, or an empty string if it cannot be determined."""
+    try:
+        res = subprocess.run(["git", "-C", path, "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        log.warning("Could not determine the handrit commit of %s", path)
+        return ""
+    return res.stdout.strip()
+
+
+def export_parquet(db: DatabaseSQLiteImpl, path: str = PARQUET_EXPORT_PATH, commit: Optional[str] = None) -> None:
+    """Exports the tables of the database to a Parquet dataset at `path`, replacing the previous one.
+
+    `commit` is the handrit commit the database was built from. By default, it is taken from the handrit submodule.
+    """
+    commit = handrit_commit() if commit is None else commit
+    generation = db.get_generation()
+    metadata = {"toole.handrit_commit": commit, "toole.generation": generation}
+    target = Path(path)
+    tmp = target.with_name(f"{target.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    tables: dict[str, dict[str, Any]] = {}
+    with db.engine.connect() as conn:
+        for name, (order_by, schema) in TABLES.items():
+            columns = schema.names
+            rows = conn.execute(text(f"SELECT {', '.join(columns)} FROM {name} ORDER BY {', '.join(order_by)}")).all()
+            table = pa.table([_column(field, [r[i] for r in rows]) for i, field in enumerate(schema)],
+                             schema=schema.with_metadata({**metadata, "toole.table": name}))
+            pq.write_table(
+                table, tmp / f"{name}.parquet",
+                row_group_size=ROW_GROUP_SIZE,
+                use_dictionary=True,
+                write_statistics=True,
+                compression="zstd",
+            )
+            tables[name] = {"file": f"{name}.parquet", "rows": table.num_rows, "sorted_by": order_by}
+    manifest = {"handrit_commit": commit, "generation": generation, "tables": tables}
+    (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    old = target.with_name(f"{target.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        target.rename(old)
+    tmp.rename(target)
+    shutil.rmtree(old, ignore_errors=True)
+    log.info("Exported database to Parquet: %s (%s tables, handrit commit %s)", path, len(tables), commit or "unknown")
+
+
+def read_manifest(path: str = PARQUET_EXPORT_PATH) -> dict[str, Any]:
+    """Reads the manifest of the Parquet dataset at `path`: the handrit commit, the generation and the tables."""
+    manifest: dict[str, Any] = json.loads((Path(path) / MANIFEST).read_text(encoding="utf-8"))
+    return manifest
+
+
+def _column(field: pa.Field, values: list[Any]) -> pa.Array:
+    convert = _CONVERSIONS.get(field.name)
+    if convert:
+        values = [None if v is None else convert(v) for v in values]
+    return pa.array(values, type=field.type)
@@ -0,0 +1,364 @@
+"""
+This module handles the lookup snapshot: a binary file holding all lookup tables of the `DataHandler`
+and the order of its selection options, written at build time.
+
+The snapshot is not unpickled, but memory-mapped read-only, and the lookups are answered from the mapped file directly:
+the strings of each lookup are stored as UTF-8 in one block, with an array of their offsets,
+and the keys in an open-addressing hash table of row numbers.
+All worker processes of a host that map the same snapshot share its pages in the page cache,
+so the memory of the lookups is charged once per host, instead of once per worker.
+
+A new snapshot is written to a temporary file and moved into place,
+so processes that still map the previous one keep reading it, unchanged, until they close it,
+or drop their last reference to it.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import zlib
+from dataclasses import dataclass, field
+from logging import Logger
+from pathlib import Path
+from typing import (Any, Callable, Iterator, Mapping, Optional, Sequence,
+                    TypeVar, Union, overload)
+
+import numpy as np
+import numpy.typing as npt
+
+from lib import utils
+from lib.database.database import Database
+
+log: Logger = utils.get_logger(__name__)
+
+MAGIC = b"TOOLE-LOOKUPS-2\n"
+_ALIGNMENT = 8
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class LookupSnapshot:
+    """All lookup tables of a given database generation.
+
+    `manuscript_keys`, `person_keys` and `text_keys` are the keys of the selection options, sorted by their labels.
+    Read from a file, the lookups are read-only mappings and sequences backed by the mapped file,
+    until the snapshot is closed.
+    """
+    generation: str
+    person_names: Mapping[str, str]
+    person_names_inverse: Mapping[str, list[str]]
+    manuscripts: Mapping[str, list[str]]
+    texts: Sequence[str]
+    manuscript_keys: Sequence[str]
+    person_keys: Sequence[str]
+    text_keys: Sequence[str]
+    mapped: Optional[_MappedFile] = field(default=None, repr=False, compare=False)
+
+    def close(self) -> None:
+        """Unmaps the snapshot file, if the snapshot was read from one. The lookups must not be used afterwards."""
+        if self.mapped is not None:
+            self.mapped.close()
+
+
+def manuscript_label(ms_id: str, names: Sequence[str]) -> str:
+    """The label of a manuscript in selection options: `shelfmark / nickname (ID)`."""
+    return f"{' / '.join(names)} ({ms_id})"
+
+
+def person_label(pers_id: str, name: str) -> str:
+    """The label of a person in selection options: `name (ID)`."""
+    return f"{name} ({pers_id})"
+
+
+def sort_by_label(labels: Mapping[str, str]) -> list[str]:
+    """The keys of the labels, sorted by their labels, case-insensitively."""
+    return sorted(labels, key=lambda k: labels[k].casefold())
+
+
+def make_snapshot(database: Database) -> LookupSnapshot:
+    """Loads all lookup tables from the database."""
+    person_names = database.persons_lookup_dict()
+    manuscripts = database.ms_lookup_dict()
+    texts = database.txt_lookup_list()
+    return LookupSnapshot(
+        generation=database.get_generation(),
+        person_names=person_names,
+        person_names_inverse=get_person_names_inverse(person_names),
+        manuscripts=manuscripts,
+        texts=texts,
+        manuscript_keys=sort_by_label({k: manuscript_label(k, v) for k, v in manuscripts.items()}),
+        person_keys=sort_by_label({k: person_label(k, v) for k, v in person_names.items()}),
+        text_keys=sort_by_label({t: t for t in texts}),
+    )
+
+
+def write_snapshot(database: Database, path: str) -> None:
+    """Writes the lookup snapshot of the database to the given path, replacing the previous one atomically."""
+    snapshot = make_snapshot(database)
+    arrays = _to_arrays(snapshot)
+    layout: dict[str, tuple[int, int, str]] = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = (offset, len(array), array.dtype.str)
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({"generation": snapshot.generation, "arrays": layout}).encode("utf-8")
+    start = len(MAGIC) + 8 + len(header)
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header + bytes(_align(start) - start))
+        for name, array in arrays.items():
+            f.write(array.tobytes())
+            f.write(bytes(_align(array.nbytes) - array.nbytes))
+    os.replace(tmp, target)
+    log.info("Wrote lookup snapshot for generation %s: %s (%s bytes)",
+             snapshot.generation, path, target.stat().st_size)
+
+
+def read_snapshot(path: str, generation: str) -> Optional[LookupSnapshot]:
+    """Maps the lookup snapshot at the given path.
+
+    Returns `None` if there is no valid snapshot, or if the snapshot belongs to a different database generation.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        log.info("No lookup snapshot found: %s", path)
+        return None
+    if data[:len(MAGIC)] != MAGIC:
+        log.warning("Invalid lookup snapshot: %s", path)
+        data.close()
+        return None
+    try:
+        start = len(MAGIC) + 8
+        end = start + int.from_bytes(data[len(MAGIC):start], "little")
+        header = json.loads(data[start:end])
+        mapped = _MappedFile(data, _align(end), header["arrays"])
+    except Exception:
+        log.exception("Failed to read lookup snapshot: %s", path)
+        data.close()
+        return None
+    if not generation or header["generation"] != generation:
+        log.info("Lookup snapshot is outdated: %s != %s", header["generation"], generation)
+        mapped.close()
+        return None
+    return _from_mapped(header["generation"], mapped)
+
+
+def get_person_names_inverse(person_names: Mapping[str, str]) -> dict[str, list[str]]:
+    """Creates the inverse name lookup dictionary, mapping names to the IDs of all persons with this name."""
+    res: dict[str, list[str]] = {}
+    for k, v in person_names.items():
+        res.setdefault(v, []).append(k)
+    return res
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _strings(name: str, values: Sequence[str]) -> dict[str, npt.NDArray[Any]]:
+    """A column of strings: the UTF-8 bytes of all values, and the offsets of each value in them."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return {f"{name}.offsets": offsets, f"{name}.data": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+def _hash_table(keys: Sequence[str]) -> npt.NDArray[np.int32]:
+    """An open-addressing hash table of the row numbers of the keys, with linear probing. Empty slots are -1."""
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    table = np.full(size, -1, dtype=np.int32)
+    for row, key in enumerate(keys):
+        slot = zlib.crc32(key.encode("utf-8")) & (size - 1)
+        while table[slot] >= 0:
+            slot = (slot + 1) & (size - 1)
+        table[slot] = row
+    return table
+
+
+def _to_arrays(snapshot: LookupSnapshot) -> dict[str, npt.NDArray[Any]]:
+    ms_ids = list(snapshot.manuscripts)
+    person_ids = list(snapshot.person_names)
+    names = list(snapshot.person_names_inverse)
+    person_rows = {k: i for i, k in enumerate(person_ids)}
+    ms_rows = {k: i for i, k in enumerate(ms_ids)}
+    text_rows = {k: i for i, k in enumerate(snapshot.texts)}
+    name_ids = [person_rows[k] for n in names for k in snapshot.person_names_inverse[n]]
+    name_starts = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(snapshot.person_names_inverse[n]) for n in names], out=name_starts[1:])
+    return {
+        **_strings("person.ids", person_ids),
+        **_strings("person.names", [snapshot.person_names[k] for k in person_ids]),
+        "person.index": _hash_table(person_ids),
+        "person.order": np.array([person_rows[k] for k in snapshot.person_keys], dtype=np.int32),
+        **_strings("name.keys", names),
+        "name.index": _hash_table(names),
+        "name.starts": name_starts,
+        "name.ids": np.array(name_ids, dtype=np.int32),
+        **_strings("ms.ids", ms_ids),
+        **_strings("ms.shelfmarks", [snapshot.manuscripts[k][0] for k in ms_ids]),
+        **_strings("ms.titles", [snapshot.manuscripts[k][1] for k in ms_ids]),
+        "ms.index": _hash_table(ms_ids),
+        "ms.order": np.array([ms_rows[k] for k in snapshot.manuscript_keys], dtype=np.int32),
+        **_strings("text.ids", snapshot.texts),
+        "text.order": np.array([text_rows[k] for k in snapshot.text_keys], dtype=np.int32),
+    }
+
+
+class _MappedFile:
+    """A snapshot file mapped read-only, with a typed view of each of its arrays.
+
+    The views are memoryviews rather than numpy arrays, so that they can be released, and the file unmapped, on `close()`.
+    """
+
+    def __init__(self, data: mmap.mmap, base: int, layout: dict[str, Any]) -> None:
+        self.data = data
+        self.base = base
+        self.layout = layout
+        self._views = [memoryview(data)]
+        self.arrays: dict[str, memoryview] = {}
+        try:
+            for name, (offset, count, dtype) in layout.items():
+                dt = np.dtype(dtype)
+                if not dt.isnative:
+                    raise ValueError(f"Array {name} is not in the byte order of this host: {dtype}")
+                raw = self._views[0][base + offset:base + offset + count * dt.itemsize]
+                self.arrays[name] = raw.cast(dt.char)
+                self._views += [raw, self.arrays[name]]
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self.data.close()
+
+
+def _from_mapped(generation: str, mapped: _MappedFile) -> LookupSnapshot:
+    arrays = mapped.arrays
+
+    def strings(name: str) -> _Strings:
+        return _Strings(arrays[f"{name}.offsets"], mapped.data, mapped.base + mapped.layout[f"{name}.data"][0])
+
+    def ordered(column: _Strings, order: memoryview) -> _Rows[str]:
+        return _Rows(len(order), lambda i: column[order[i]])
+
+    person_ids, person_names, names = strings("person.ids"), strings("person.names"), strings("name.keys")
+    ms_ids, shelfmarks, titles = strings("ms.ids"), strings("ms.shelfmarks"), strings("ms.titles")
+    texts = strings("text.ids")
+    name_starts, name_ids = arrays["name.starts"], arrays["name.ids"]
+    return LookupSnapshot(
+        generation=generation,
+        person_names=_Lookup(person_ids, arrays["person.index"], person_names.__getitem__),
+        person_names_inverse=_Lookup(names, arrays["name.index"], lambda i: [
+            person_ids[j] for j in name_ids[name_starts[i]:name_starts[i + 1]]]),
+        manuscripts=_Lookup(ms_ids, arrays["ms.index"], lambda i: [shelfmarks[i], titles[i]]),
+        texts=texts,
+        manuscript_keys=ordered(ms_ids, arrays["ms.order"]),
+        person_keys=ordered(person_ids, arrays["person.order"]),
+        text_keys=ordered(texts, arrays["text.order"]),
+        mapped=mapped,
+    )
+
+
+class _Rows(Sequence[T]):
+    """Read-only sequence of `length` rows, each computed by `row` from its row number when it is accessed."""
+
+    def __init__(self, length: int, row: Callable[[int], T]) -> None:
+        self._length = length
+        self._row = row
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, i: int) -> T: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[T]: ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[T, list[T]]:
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        return self._row(i)
+
+    def __iter__(self) -> Iterator[T]:
+        return map(self._row, range(self._length))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class _Strings(_Rows[str]):
+    """Column of strings in a mapped file: UTF-8 bytes starting at `start`, with the offsets of each string in them."""
+
+    def __init__(self, offsets: memoryview, data: mmap.mmap, start: int) -> None:
+        # rows are decoded by the `_row` method, not a bound method stored on the instance,
+        # which would be a reference cycle that keeps the file mapped until the next garbage collection
+        self._length = len(offsets) - 1
+        self._offsets = offsets
+        self._data = data
+        self._start = start
+
+    def raw(self, i: int) -> bytes:
+        return self._data[self._start + self._offsets[i]:self._start + self._offsets[i + 1]]
+
+    def _row(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+
+class _Lookup(Mapping[str, T]):
+    """Read-only mapping from the strings of a column to the values of their rows, found through a hash table."""
+
+    def __init__(self, keys: _Strings, table: memoryview, value: Callable[[int], T]) -> None:
+        self._keys = keys
+        self._table = table
+        self._value = value
+
+    def _find(self, key: object) -> int:
+        if not isinstance(key, str):
+            return -1
+        encoded = key.encode("utf-8")
+        mask = len(self._table) - 1
+        slot = zlib.crc32(encoded) & mask
+        while (row := self._table[slot]) >= 0:
+            if self._keys.raw(row) == encoded:
+                return row
+            slot = (slot + 1) & mask
+        return -1
+
+    def __getitem__(self, key: str) -> T:
+        row = self._find(key)
+        if row < 0:
+            raise KeyError(key)
+        return self._value(row)
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
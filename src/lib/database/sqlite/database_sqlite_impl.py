@@ -1,19 +1,36 @@
+import json
+import re
+import sqlite3
+import time
 from dataclasses import dataclass, field
+from functools import cached_property
 from logging import Logger
-from uuid import UUID
+from typing import Any, Callable, Optional, TypeVar
+from uuid import UUID, uuid4
 
 import pandas as pd
+from sqlalchemy import column, delete, event, func, inspect
+from sqlalchemy import select as sa_select
+from sqlalchemy import table, text
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.future import Engine
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, SQLModel, col, create_engine, select
 
-from lib import utils
+from lib import latency, profiling, utils
+from lib.browse import BrowseEntity, BrowsePage, search_label
+from lib.conflicts import UnificationConflict
 from lib.constants import DATABASE_PATH
-from lib.database.sqlite.models import (CatalogueEntries, Groups,
+from lib.corpus_statistics import CorpusStatistic
+from lib.database.sqlite.models import (CatalogueEntries, CorpusStatistics,
+                                        DatabaseInfo, GroupItems, Groups,
                                         Manuscripts, People,
                                         PersonCatalogueJunction,
                                         PersonManuscriptJunction,
                                         TextCatalogueJunction,
-                                        TextManuscriptJunction, Texts)
+                                        TextManuscriptJunction, Texts,
+                                        UnificationConflicts)
+from lib.database.sqlite.writer import BackgroundWriter
 from lib.groups import Group, GroupType
 from lib.manuscripts import CatalogueEntry, Manuscript
 from lib.people import Person
@@ -21,69 +38,257 @@ from lib.people import Person
 log: Logger = utils.get_logger(__name__)
 
 
-def get_engine(db_path: str = DATABASE_PATH) -> Engine:
-    """Creates a SQLAlchemy Engine, given a DB path. Can be `:memory:` for an in-memory database."""
-    log.info(f"Get DB Engine from: {db_path}")
-    sqlite_url = f"sqlite:///{db_path}"
-    return create_engine(sqlite_url)
+GENERATION_KEY = "generation"
+GROUPS_VERSION_KEY = "groups_version"
+BUSY_TIMEOUT_MS = 10_000
+
+SLOW_QUERY_MS = 100.0
+"""Statements taking longer than this are logged with their query plan."""
+
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+BROWSE_INDEX = "browse_index"
+"""Full text index over the casefolded IDs and names of all manuscripts, texts and people, used to filter listings."""
+
+_browse_index = table(BROWSE_INDEX, column("entity"), column("key"), column("label"))
+
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+"""First version of SQLite with the trigram tokenizer, which the browse index uses to answer substring searches."""
+
+T = TypeVar("T")
+
+
+def get_engine(db_path: str = DATABASE_PATH, read_only: bool = False) -> Engine:
+    """Creates a SQLAlchemy Engine, given a DB path. Can be `:memory:` for an in-memory database.
+
+    Database files are switched to write-ahead logging, so that reads never wait for writes,
+    and connections wait for the write lock instead of failing right away.
+
+    If `read_only` is set, the database file is opened in read-only mode,
+    so that multiple processes can safely share it.
+    """
+    log.info("Get DB Engine from: %s", db_path)
+    if read_only:
+        sqlite_url = f"sqlite:///file:{db_path}?mode=ro&uri=true"
+    else:
+        sqlite_url = f"sqlite:///{db_path}"
+    engine = create_engine(sqlite_url)
+    if db_path != ":memory:":
+        _set_pragmas(engine, wal=not read_only)
+    return engine
+
+
+def _set_pragmas(engine: Engine, wal: bool) -> None:
+    def on_connect(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        if wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
+
+def time_queries(engine: Engine, slow_ms: float = SLOW_QUERY_MS) -> None:
+    """Records the latency of every SQL statement executed by the engine in `latency.statements`.
+
+    Statements are told apart by their SQL, with lists of placeholders (e.g. from `IN`) collapsed,
+    so that a statement counts as the same regardless of the number of parameters.
+    Queries taking longer than `slow_ms` are logged and kept with their query plan.
+
+    A statement is timed until the cursor returns from executing it, before its rows are fetched.
+    SQLite computes the rows of most queries step by step while they are fetched,
+    so the time of a query that returns many rows is under-reported here.
+    The data handler calls that run these queries are timed as a whole in `latency.methods`.
+    """
+    def before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        latency.statements.add(_PLACEHOLDER_LISTS.sub("?, ...", statement), ms)
+        if ms > slow_ms:
+            plan = [] if executemany else _query_plan(cursor, statement, parameters)
+            log.warning("Slow query (%.1f ms): %s %s\nPlan: %s", ms, statement, parameters, plan)
+            latency.statements.add_slow(latency.SlowQuery(time.time(), ms, statement, str(parameters), plan))
+
+    def on_error(context: Any) -> None:
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    event.listen(engine, "handle_error", on_error)
+
+
+def _query_plan(cursor: Any, statement: str, parameters: Any) -> list[str]:
+    """Gets the plan of a query from SQLite, as one line per step, indented by depth."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    try:
+        rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    except Exception:
+        log.exception("Failed to get the query plan")
+        return []
+    depth: dict[int, int] = {0: -1}
+    res = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        res.append("  " * depth[node_id] + detail)
+    return res
 
 
 @dataclass(frozen=True)
 class DatabaseSQLiteImpl:
-    """SQLite implementation of the `Database`protocol."""
+    """SQLite implementation of the `Database`protocol.
+
+    If a `writer` is given, group writes are executed by its background thread.
+    Otherwise, they are executed on the calling thread.
+    """
     engine: Engine = field(default_factory=get_engine)
+    writer: Optional[BackgroundWriter] = None
 
     def setup_db(self) -> None:
         log.info("Create Database Metadata")
         SQLModel.metadata.create_all(self.engine)
-        log.info(f"Database has tables: {list(SQLModel.metadata.tables.keys())}")
+        self._create_missing_indexes()
+        self._create_browse_index()
+        self._migrate_group_items()
+        log.info("Database has tables: %s", list(SQLModel.metadata.tables.keys()))
+
+    def _create_missing_indexes(self) -> None:
+        """Creates indexes that were added to the models after the tables of an existing database were created."""
+        with self.engine.begin() as conn:
+            for tbl in SQLModel.metadata.sorted_tables:
+                for idx in tbl.indexes:
+                    idx.create(conn, checkfirst=True)
+
+    def _create_browse_index(self) -> None:
+        """Creates the browse index, filling it from the data if the database was built before it existed.
+
+        Before SQLite 3.34, there is no trigram tokenizer: the index is created with the default one,
+        and all searches scan the labels.
+        An index with the trigram tokenizer cannot be read by these versions at all.
+        """
+        trigram = sqlite3.sqlite_version_info >= TRIGRAM_SQLITE_VERSION
+        with self.engine.begin() as conn:
+            if inspect(conn).has_table(BROWSE_INDEX):
+                if _is_trigram_index(conn) and not trigram:
+                    raise RuntimeError(
+                        "The browse index of the database uses the trigram tokenizer, which needs SQLite "
+                        f"{'.'.join(map(str, TRIGRAM_SQLITE_VERSION))} or later, but this is SQLite {sqlite3.sqlite_version}. "
+                        "Rebuild the database with this version of SQLite, or upgrade SQLite."
+                    )
+                return
+            if not trigram:
+                log.warning("SQLite %s has no trigram tokenizer, browse searches scan the labels", sqlite3.sqlite_version)
+            tokenize = ", tokenize='trigram'" if trigram else ""
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {BROWSE_INDEX} USING fts5(entity UNINDEXED, key UNINDEXED, label{tokenize})"
+            ))
+        self._build_browse_index()
+
+    @cached_property
+    def _trigram_browse_index(self) -> bool:
+        """Whether the browse index uses the trigram tokenizer, as it does unless it was created by an older SQLite."""
+        with self.engine.connect() as conn:
+            return _is_trigram_index(conn)
+
+    @profiling.profiled
+    def _build_browse_index(self) -> None:
+        with Session(self.engine) as session:
+            mss = session.exec(select(Manuscripts.manuscript_id, Manuscripts.shelfmark, Manuscripts.title)).all()
+            ppl = session.exec(select(People.pers_id, People.first_name, People.last_name)).all()
+            txts = session.exec(select(Texts.text_id)).all()
+        rows = [_browse_label(BrowseEntity.Manuscripts, m[0], *m) for m in mss]
+        rows += [_browse_label(BrowseEntity.People, p[0], *p) for p in ppl]
+        rows += [_browse_label(BrowseEntity.Texts, t, t) for t in txts]
+        with self.engine.begin() as conn:
+            conn.execute(_browse_index.delete())
+            if rows:
+                conn.execute(_browse_index.insert(), rows)
+        log.info("Browse index created: %s", len(rows))
+
+    def _migrate_group_items(self) -> None:
+        """Moves group items from the legacy `|`-joined `groups.items` column to the `group_items` table."""
+        with self.engine.begin() as conn:
+            if "items" not in {c["name"] for c in inspect(conn).get_columns("groups")}:
+                return
+            log.warning("Migrating group items to the group_items table")
+            rows = conn.execute(text("SELECT group_id, items FROM groups")).all()
+            items = [{"group_id": UUID(g), "item_id": i} for g, joined in rows if joined for i in set(joined.split("|"))]
+            if items:
+                conn.execute(GroupItems.__table__.insert(), items)  # type: ignore
+            conn.execute(text("ALTER TABLE groups DROP COLUMN items"))
+            log.warning("Migrated %s items of %s groups", len(items), len(rows))
 
     def get_metadata(self, ms_ids: list[str]) -> pd.DataFrame:
-        log.debug(f"Loading metadata for manuscripts: {ms_ids}")
+        log.debug("Loading metadata for manuscripts: %s", ms_ids)
         with Session(self.engine) as session:
             statement = select(Manuscripts).where(col(Manuscripts.manuscript_id).in_(ms_ids))
             mss = session.exec(statement).all()
-            log.debug(f"Retrieved metadata entries: {len(mss)}")
+            log.debug("Retrieved metadata entries: %s", len(mss))
             ms_dicts = [ms.dict() for ms in mss]
             return pd.DataFrame(ms_dicts)
 
     def ms_x_ppl(self, pers_ids: list[str]) -> list[str]:
-        log.debug(f"Loading manuscripts by people: {pers_ids}")
+        log.debug("Loading manuscripts by people: %s", pers_ids)
         with Session(self.engine) as session:
             statement = select(Manuscripts.manuscript_id).where(col(Manuscripts.people).any(col(People.pers_id).in_(pers_ids)))
             mss = session.exec(statement).all()
-            log.debug(f"Retrieved manuscripts: {len(mss)}")
+            log.debug("Retrieved manuscripts: %s", len(mss))
             return mss
 
     def ppl_x_mss(self, ms_ids: list[str]) -> list[str]:
-        log.debug(f"Loading people by manuscripts: {ms_ids}")
+        log.debug("Loading people by manuscripts: %s", ms_ids)
         with Session(self.engine) as session:
             statement = select(People.pers_id).where(col(People.manuscripts).any(col(Manuscripts.manuscript_id).in_(ms_ids)))
             ppl = session.exec(statement).all()
-            log.debug(f"Retrieved people: {len(ppl)}")
+            log.debug("Retrieved people: %s", len(ppl))
             return ppl
 
     def ms_x_txts(self, txts: list[str]) -> list[str]:
-        log.debug(f"Loading manuscripts by texts: {txts}")
+        log.debug("Loading manuscripts by texts: %s", txts)
         with Session(self.engine) as session:
             statement = select(Manuscripts.manuscript_id).where(col(Manuscripts.texts).any(col(Texts.text_id).in_(txts)))
             mss = session.exec(statement).all()
-            log.debug(f"Retrieved manuscripts: {len(mss)}")
+            log.debug("Retrieved manuscripts: %s", len(mss))
             return mss
 
     def txts_x_ms(self, ms_ids: list[str]) -> list[str]:
-        log.debug(f"Loading texts by manuscripts: {ms_ids}")
+        log.debug("Loading texts by manuscripts: %s", ms_ids)
         with Session(self.engine) as session:
             statement = select(Texts.text_id).where(col(Texts.manuscripts).any(col(Manuscripts.manuscript_id).in_(ms_ids)))
             txts = session.exec(statement).all()
-            log.debug(f"Retrieved texts: {len(txts)}")
+            log.debug("Retrieved texts: %s", len(txts))
             return txts
 
+    def browse(self, entity: BrowseEntity, search: str, sort_by: str, descending: bool, offset: int, limit: int) -> BrowsePage:
+        model, key, columns = _browse_columns(entity)
+        if sort_by not in columns:
+            raise ValueError(f"Cannot sort {entity.name} by: {sort_by}")
+        statement = sa_select(*columns.values())
+        count = sa_select(func.count()).select_from(model)
+        if search:
+            condition = _browse_filter(search, self._trigram_browse_index)
+            matches = sa_select(_browse_index.c.key).where(_browse_index.c.entity == entity.value, condition)
+            statement = statement.where(key.in_(matches))
+            count = count.where(key.in_(matches))
+        order = columns[sort_by]
+        statement = statement.order_by(order.desc() if descending else order.asc(), key).offset(offset).limit(limit)
+        with self.engine.connect() as conn:
+            total = conn.execute(count).scalar_one()
+            rows = conn.execute(statement).all()
+        log.debug("Browsing %s: %s of %s rows at offset %s", entity.name, len(rows), total, offset)
+        return BrowsePage(total, offset, pd.DataFrame(rows, columns=list(columns)))
+
     def persons_lookup_dict(self) -> dict[str, str]:
         with Session(self.engine) as session:
-            ppl = session.exec(select(People)).all()
-            res = {p.pers_id: f"{p.first_name} {p.last_name}" for p in ppl}
-            log.info(f"Created person lookup dict: {len(res.keys())}")
+            ppl = session.exec(select(People.pers_id, People.first_name, People.last_name)).all()
+            res = {p[0]: f"{p[1]} {p[2]}" for p in ppl}
+            log.info("Created person lookup dict: %s", len(res.keys()))
             return res
 
     def ms_lookup_dict(self) -> dict[str, list[str]]:
@@ -91,102 +296,280 @@ class DatabaseSQLiteImpl:
             statement = select(Manuscripts.manuscript_id, Manuscripts.shelfmark, Manuscripts.title)
             mss = session.exec(statement).all()
             res = {x[0]: [x[1], x[2]] for x in mss}
-            log.info(f"Created manuscript lookup dict: {len(res.keys())}")
+            log.info("Created manuscript lookup dict: %s", len(res.keys()))
             return res
 
     def txt_lookup_list(self) -> list[str]:
         with Session(self.engine) as session:
             res = session.exec(select(Texts.text_id)).all()
-            log.info(f"Created text lookup list: {len(res)}")
+            log.info("Created text lookup list: %s", len(res))
             return res
 
     def get_ms_groups(self) -> list[Group]:
-        with Session(self.engine) as session:
-            statement = select(Groups).where(Groups.group_type == GroupType.ManuscriptGroup)
-            groups = session.exec(statement)
-            res = [g.to_group() for g in groups]
-            log.debug(f"Retrieved manuscript groups: {len(res)}")
-            return res
+        res = self._get_groups(GroupType.ManuscriptGroup)
+        log.debug("Retrieved manuscript groups: %s", len(res))
+        return res
 
     def get_ppl_groups(self) -> list[Group]:
-        with Session(self.engine) as session:
-            statement = select(Groups).where(Groups.group_type == GroupType.PersonGroup)
-            groups = session.exec(statement)
-            res = [g.to_group() for g in groups]
-            log.debug(f"Retrieved people groups: {len(res)}")
-            return res
+        res = self._get_groups(GroupType.PersonGroup)
+        log.debug("Retrieved people groups: %s", len(res))
+        return res
 
     def get_txt_groups(self) -> list[Group]:
+        res = self._get_groups(GroupType.TextGroup)
+        log.debug("Retrieved text groups: %s", len(res))
+        return res
+
+    def get_all_groups(self) -> list[Group]:
+        res = self._get_groups()
+        log.debug("Retrieved groups: %s", len(res))
+        return res
+
+    def _get_groups(self, group_type: Optional[GroupType] = None) -> list[Group]:
+        """Loads groups with their items in two queries, optionally restricted to one group type."""
+        with Session(self.engine) as session:
+            statement = select(Groups).options(selectinload(Groups.items))
+            if group_type is not None:
+                statement = statement.where(Groups.group_type == group_type)
+            return [g.to_group() for g in session.exec(statement)]
+
+    def add_group(self, group: Group) -> None:
+        def write(session: Session) -> None:
+            session.add(Groups.make(group))
+            self._bump_groups_version(session)
+        self._write(write)
+        log.debug("Added group: %s", group.group_id)
+
+    def update_group(self, group: Group, group_id: UUID) -> None:
+        def write(session: Session) -> Optional[tuple[int, int]]:
+            group_old = session.get(Groups, group_id)
+            if group_old is None or group.group_id != group_id:
+                if group_old is not None:
+                    session.delete(group_old)
+                session.add(Groups.make(group))
+                self._bump_groups_version(session)
+                return None
+            group_old.group_type = group.group_type
+            group_old.name = group.name
+            group_old.date = str(group.date.timestamp())
+            session.add(group_old)
+            statement = select(GroupItems.item_id).where(GroupItems.group_id == group_id)
+            items_old = set(session.exec(statement).all())
+            removed = self._remove_items(session, group_id, items_old - group.items)
+            added = self._add_items(session, group_id, group.items - items_old)
+            self._bump_groups_version(session)
+            return added, removed
+        res = self._write(write)
+        if res is None:
+            log.debug("Replaced group: %s", group_id)
+        else:
+            log.debug("Updated group: %s (+%s/-%s items)", group_id, res[0], res[1])
+
+    def add_group_items(self, group_id: UUID, items: set[str]) -> None:
+        def write(session: Session) -> Optional[int]:
+            # the group may have been deleted by another session, and its items would then be left behind
+            if session.get(Groups, group_id) is None:
+                return None
+            statement = select(GroupItems.item_id).where(GroupItems.group_id == group_id).where(col(GroupItems.item_id).in_(items))
+            existing = set(session.exec(statement).all())
+            added = self._add_items(session, group_id, items - existing)
+            self._bump_groups_version(session)
+            return added
+        added = self._write(write)
+        if added is None:
+            log.warning("No items added to missing group: %s", group_id)
+        else:
+            log.debug("Added %s items to group: %s", added, group_id)
+
+    def remove_group_items(self, group_id: UUID, items: set[str]) -> None:
+        def write(session: Session) -> int:
+            removed = self._remove_items(session, group_id, items)
+            self._bump_groups_version(session)
+            return removed
+        removed = self._write(write)
+        log.debug("Removed %s items from group: %s", removed, group_id)
+
+    @staticmethod
+    def _add_items(session: Session, group_id: UUID, items: set[str]) -> int:
+        session.add_all([GroupItems(group_id=group_id, item_id=i) for i in items])
+        return len(items)
+
+    @staticmethod
+    def _remove_items(session: Session, group_id: UUID, items: set[str]) -> int:
+        if not items:
+            return 0
+        statement = delete(GroupItems).where(col(GroupItems.group_id) == group_id).where(col(GroupItems.item_id).in_(items))
+        res: CursorResult = session.execute(statement)  # type: ignore
+        return int(res.rowcount)
+
+    def union_groups(self, group_ids: list[UUID]) -> list[str]:
         with Session(self.engine) as session:
-            statement = select(Groups).where(Groups.group_type == GroupType.TextGroup)
-            groups = session.exec(statement)
-            res = [g.to_group() for g in groups]
-            log.debug(f"Retrieved text groups: {len(res)}")
+            statement = select(GroupItems.item_id).where(col(GroupItems.group_id).in_(group_ids)).distinct()
+            res = session.exec(statement).all()
+            log.debug("Union of %s groups: %s", len(group_ids), len(res))
             return res
 
-    def get_all_groups(self) -> list[Group]:
+    def intersect_groups(self, group_ids: list[UUID]) -> list[str]:
+        n = len(set(group_ids))
         with Session(self.engine) as session:
-            statement = select(Groups)
-            groups = session.exec(statement)
-            res = [g.to_group() for g in groups]
-            log.debug(f"Retrieved groups: {len(res)}")
+            statement = select(GroupItems.item_id).where(
+                col(GroupItems.group_id).in_(group_ids)
+            ).group_by(GroupItems.item_id).having(func.count() == n)
+            res = session.exec(statement).all()
+            log.debug("Intersection of %s groups: %s", n, len(res))
             return res
 
-    def add_group(self, group: Group) -> None:
+    def delete_group(self, group_id: UUID) -> None:
+        def write(session: Session) -> None:
+            session.execute(delete(GroupItems).where(col(GroupItems.group_id) == group_id))
+            group = session.get(Groups, group_id)
+            if group is not None:
+                session.delete(group)
+            self._bump_groups_version(session)
+        self._write(write)
+        log.debug("Deleted group: %s", group_id)
+
+    def _write(self, operation: Callable[[Session], T]) -> T:
+        """Executes a write operation in a transaction, through the background writer if there is one."""
+        if self.writer is not None:
+            return self.writer.write(operation)
         with Session(self.engine) as session:
-            db_model = Groups.make(group)
-            session.add(db_model)
+            res = operation(session)
             session.commit()
-            log.debug(f"Added group: {group.group_id}")
+            return res
 
-    def update_group(self, group: Group, group_id: UUID) -> None:
+    def get_groups_version(self) -> int:
         with Session(self.engine) as session:
-            group_old = session.get(Groups, group_id)
-            if group_old is not None:
-                session.delete(group_old)
-            group_new = Groups.make(group)
-            session.add(group_new)
-            session.commit()
-            log.debug(f"Updated group: {group_id}")
+            info = session.get(DatabaseInfo, GROUPS_VERSION_KEY)
+            return int(info.value) if info else 0
+
+    @staticmethod
+    def _bump_groups_version(session: Session) -> None:
+        """Increments the groups version within the transaction of a group change."""
+        session.execute(
+            text("INSERT INTO databaseinfo (key, value) VALUES (:key, '1') "
+                 "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"),
+            {"key": GROUPS_VERSION_KEY}
+        )
+
+    def get_generation(self) -> str:
+        with Session(self.engine) as session:
+            info = session.get(DatabaseInfo, GENERATION_KEY)
+            return info.value if info else ""
 
     def add_data(self, people: list[Person], catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
         log.info("Adding data to database...")
         self._add_people(people)
-        log.info(f"People data added: {len(people)}")
+        log.info("People data added: %s", len(people))
         texts = list({t for ms in manuscripts for t in ms.texts})
         self._add_texts(texts)
-        log.info(f"Text data added: {len(texts)}")
+        log.info("Text data added: %s", len(texts))
         self._add_catalogue_entries(catalogue_entries)
-        log.info(f"Catalogue entries added: {len(catalogue_entries)}")
+        log.info("Catalogue entries added: %s", len(catalogue_entries))
         self._add_manuscripts(manuscripts)
-        log.info(f"Manuscripts added: {len(manuscripts)}")
+        log.info("Manuscripts added: %s", len(manuscripts))
         self._create_junction_tables(catalogue_entries, manuscripts)
         log.info("Junction tables created.")
+        self._build_browse_index()
+        generation = self._new_generation()
+        log.info("Database generation: %s", generation)
 
+    def add_unification_conflicts(self, conflicts: list[UnificationConflict]) -> None:
+        rows = [{
+            "manuscript_id": c.manuscript_id,
+            "field": c.field,
+            "values": json.dumps(c.values, ensure_ascii=False),
+            "rule": c.rule,
+            "result": c.result,
+        } for c in conflicts]
+        table = UnificationConflicts.__table__  # type: ignore
+        with self.engine.begin() as conn:
+            conn.execute(table.delete())
+            if rows:
+                conn.execute(table.insert(), rows)
+        log.info("Unification conflicts added: %s", len(rows))
+
+    def get_unification_conflicts_summary(self) -> pd.DataFrame:
+        manuscripts = func.count(col(UnificationConflicts.conflict_id)).label("manuscripts")
+        statement = (
+            sa_select(col(UnificationConflicts.field), col(UnificationConflicts.rule), manuscripts)
+            .group_by(col(UnificationConflicts.field), col(UnificationConflicts.rule))
+            .order_by(manuscripts.desc(), col(UnificationConflicts.field))
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(statement).all()
+        return pd.DataFrame(rows, columns=["field", "rule", "manuscripts"])
+
+    def get_unification_conflicts(self, field: Optional[str], offset: int, limit: int) -> pd.DataFrame:
+        columns = ["manuscript_id", "field", "values", "rule", "result"]
+        statement = sa_select(*[UnificationConflicts.__table__.c[c] for c in columns])  # type: ignore
+        if field:
+            statement = statement.where(col(UnificationConflicts.field) == field)
+        statement = statement.order_by(col(UnificationConflicts.manuscript_id), col(UnificationConflicts.field))
+        with self.engine.connect() as conn:
+            rows = conn.execute(statement.offset(offset).limit(limit)).all()
+        res = pd.DataFrame(rows, columns=columns)
+        res["values"] = [json.loads(v) for v in res["values"]]
+        return res
+
+    def add_corpus_statistics(self, statistics: dict[CorpusStatistic, list[tuple[str, int]]]) -> None:
+        rows = [{"statistic": s.value, "position": i, "label": label, "value": value}
+                for s, values in statistics.items() for i, (label, value) in enumerate(values)]
+        table = CorpusStatistics.__table__  # type: ignore
+        with self.engine.begin() as conn:
+            conn.execute(table.delete())
+            if rows:
+                conn.execute(table.insert(), rows)
+        log.info("Corpus statistics added: %s", len(statistics))
+
+    def get_corpus_statistics(self) -> dict[CorpusStatistic, list[tuple[str, int]]]:
+        statement = (
+            sa_select(col(CorpusStatistics.statistic), col(CorpusStatistics.label), col(CorpusStatistics.value))
+            .order_by(col(CorpusStatistics.statistic), col(CorpusStatistics.position))
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(statement).all()
+        res: dict[CorpusStatistic, list[tuple[str, int]]] = {}
+        for statistic, label, value in rows:
+            res.setdefault(CorpusStatistic(statistic), []).append((label, value))
+        return res
+
+    def _new_generation(self) -> str:
+        generation = uuid4().hex
+        with Session(self.engine) as session:
+            session.merge(DatabaseInfo(key=GENERATION_KEY, value=generation))
+            session.commit()
+        return generation
+
+    @profiling.profiled
     def _add_people(self, people: list[Person]) -> None:
         ppl = [People.make(p) for p in people]
         with Session(self.engine) as session:
             session.add_all(ppl)
             session.commit()
 
+    @profiling.profiled
     def _add_texts(self, texts: list[str]) -> None:
         txt = [Texts(text_id=t) for t in texts]
         with Session(self.engine) as session:
             session.add_all(txt)
             session.commit()
 
+    @profiling.profiled
     def _add_catalogue_entries(self, catalogue_entries: list[CatalogueEntry]) -> None:
         entries = [CatalogueEntries.make(e) for e in catalogue_entries]
         with Session(self.engine) as session:
             session.add_all(entries)
             session.commit()
 
+    @profiling.profiled
     def _add_manuscripts(self, manuscripts: list[Manuscript]) -> None:
         mss = [Manuscripts.make(ms) for ms in manuscripts]
         with Session(self.engine) as session:
             session.add_all(mss)
             session.commit()
 
+    @profiling.profiled
     def _create_junction_tables(self, catalogue_entries: list[CatalogueEntry], manuscripts: list[Manuscript]) -> None:
         txc = [TextCatalogueJunction(text_id=t, catalogue_id=c.catalogue_id) for c in catalogue_entries for t in c.texts]
         with Session(self.engine) as session:
@@ -204,3 +587,59 @@ class DatabaseSQLiteImpl:
         with Session(self.engine) as session:
             session.add_all(pxm)
             session.commit()
+
+
+def _browse_label(entity: BrowseEntity, key: str, *names: Optional[str]) -> dict[str, str]:
+    return {"entity": entity.value, "key": key, "label": search_label(*names)}
+
+
+def _is_trigram_index(conn: Any) -> bool:
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": BROWSE_INDEX}).scalar()
+    return "tokenize='trigram'" in (sql or "")
+
+
+def _browse_filter(search: str, trigram: bool) -> Any:
+    """Returns the condition on the browse index for rows containing `search`.
+
+    Searches of at least three characters are answered by the index, if it uses the trigram tokenizer.
+    Shorter ones cannot use it, and fall back to scanning the labels, as do all searches without the trigram tokenizer.
+    """
+    search = search.casefold()
+    if trigram and len(search) >= 3:
+        return _browse_index.c.label.op("MATCH")('"' + search.replace('"', '""') + '"')
+    pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return _browse_index.c.label.like(f"%{pattern}%", escape="\\")
+
+
+def _count(foreign_key: Any, key: Any, name: str) -> Any:
+    """Returns a column counting the rows of a junction table related to each row."""
+    return sa_select(func.count()).where(foreign_key == key).scalar_subquery().label(name)
+
+
+def _browse_columns(entity: BrowseEntity) -> tuple[Any, Any, dict[str, Any]]:
+    """Returns the table model, the key column and the columns of the listing of an entity, by name."""
+    if entity == BrowseEntity.Manuscripts:
+        key = col(Manuscripts.manuscript_id)
+        return Manuscripts, key, {
+            "manuscript_id": key,
+            "shelfmark": col(Manuscripts.shelfmark),
+            "title": col(Manuscripts.title),
+            "date_string": col(Manuscripts.date_string),
+            "date_mean": col(Manuscripts.date_mean),
+            "repository": col(Manuscripts.repository),
+            "texts": _count(TextManuscriptJunction.manuscript_id, key, "texts"),
+            "people": _count(PersonManuscriptJunction.manuscript_id, key, "people"),
+        }
+    if entity == BrowseEntity.Texts:
+        key = col(Texts.text_id)
+        return Texts, key, {
+            "text_id": key,
+            "manuscripts": _count(TextManuscriptJunction.text_id, key, "manuscripts"),
+        }
+    key = col(People.pers_id)
+    return People, key, {
+        "pers_id": key,
+        "first_name": col(People.first_name),
+        "last_name": col(People.last_name),
+        "manuscripts": _count(PersonManuscriptJunction.pers_id, key, "manuscripts"),
+    }
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import dataclasses
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID, uuid4
 
 from sqlmodel import Field, Relationship, SQLModel
@@ -11,19 +12,31 @@ from lib.manuscripts import CatalogueEntry, Manuscript
 from lib.people import Person
 
 
+def _fields(obj: Any) -> dict[str, Any]:
+    """The fields of a dataclass instance as a dict, without copying their values like `dataclasses.asdict()`."""
+    return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+
+
+class GroupItems(SQLModel, table=True):
+    """Model for the `group_items` table. Junction table holding the items of each group."""
+    __tablename__ = "group_items"
+    group_id: Optional[UUID] = Field(default=None, foreign_key="groups.group_id", primary_key=True)
+    item_id: str = Field(primary_key=True, index=True)
+
+
 class Groups(SQLModel, table=True):
     """Model for the `groups` table."""
     group_id: UUID = Field(primary_key=True, default_factory=uuid4)
     group_type: GroupType
     name: str
     date: str
-    items: str
+    items: list[GroupItems] = Relationship(sa_relationship_kwargs={"cascade": "all, delete-orphan"})
 
     def to_group(self) -> Group:
         """Turns a given row of the table into a `Group` value object."""
         data = self.dict()
         data["date"] = datetime.fromtimestamp(float(self.date), timezone.utc).astimezone()
-        data["items"] = set(self.items.split("|")) if data["items"] else set()
+        data["items"] = {i.item_id for i in self.items}
         return Group(**data)
 
     @staticmethod
@@ -31,10 +44,42 @@ class Groups(SQLModel, table=True):
         """Creates a table row from a `Group` value object."""
         data = {**group.__dict__}
         data["date"] = group.date.timestamp()
-        data["items"] = '|'.join(group.items)
+        data["items"] = [GroupItems(item_id=i) for i in group.items]
         return Groups(**data)
 
 
+class DatabaseInfo(SQLModel, table=True):
+    """Model for the `databaseinfo` table. Key-value store for information about the database itself."""
+    key: str = Field(primary_key=True)
+    value: str
+
+
+class CorpusStatistics(SQLModel, table=True):
+    """Model for the `corpus_statistics` table. Statistics of the corpus, computed when the database is built.
+
+    Each row is one label of a statistic with its count, at its position in the statistic.
+    """
+    __tablename__ = "corpus_statistics"
+    statistic: str = Field(primary_key=True)
+    position: int = Field(primary_key=True)
+    label: str
+    value: int
+
+
+class UnificationConflicts(SQLModel, table=True):
+    """Model for the `unification_conflicts` table. Values that could not be unified when building the manuscripts.
+
+    `values` holds the JSON list of the values of the catalogue entries.
+    """
+    __tablename__ = "unification_conflicts"
+    conflict_id: Optional[int] = Field(default=None, primary_key=True)
+    manuscript_id: str = Field(index=True)
+    field: str = Field(index=True)
+    values: str
+    rule: str
+    result: str
+
+
 class PersonCatalogueJunction(SQLModel, table=True):
     pers_id: Optional[str] = Field(default=None, foreign_key="people.pers_id", primary_key=True)
     catalogue_id: Optional[str] = Field(
@@ -49,7 +94,8 @@ class PersonManuscriptJunction(SQLModel, table=True):
     manuscript_id: Optional[str] = Field(
         default=None,
         foreign_key="manuscripts.manuscript_id",
-        primary_key=True
+        primary_key=True,
+        index=True
     )
 
 
@@ -67,7 +113,8 @@ class TextManuscriptJunction(SQLModel, table=True):
     manuscript_id: Optional[str] = Field(
         default=None,
         foreign_key="manuscripts.manuscript_id",
-        primary_key=True
+        primary_key=True,
+        index=True
     )
 
 
@@ -82,7 +129,7 @@ class People(SQLModel, table=True):
     """Model for the `people` table."""
     pers_id: str = Field(primary_key=True)
     first_name: str | None = None
-    last_name: str | None = None
+    last_name: str | None = Field(default=None, index=True)
     catalogue_entries: list["CatalogueEntries"] = Relationship(back_populates="people", link_model=PersonCatalogueJunction)
     manuscripts: list["Manuscripts"] = Relationship(back_populates="people", link_model=PersonManuscriptJunction)
 
@@ -123,7 +170,7 @@ class CatalogueEntries(SQLModel, table=True):
 
     @staticmethod
     def make(entry: CatalogueEntry) -> CatalogueEntries:
-        data = {**entry.__dict__}
+        data = _fields(entry)
         data["texts"] = []
         data["people"] = []
         return CatalogueEntries(**data)
@@ -132,7 +179,7 @@ class CatalogueEntries(SQLModel, table=True):
 class Manuscripts(SQLModel, table=True):
     """Model for the `manuscripts` table. Represents one manuscript with potentially multiple entries on handrit.is."""
     manuscript_id: str = Field(primary_key=True)
-    shelfmark: str
+    shelfmark: str = Field(index=True)
     catalogue_entries: int
     catalogue_ids: str
     catalogue_filenames: str
@@ -143,7 +190,7 @@ class Manuscripts(SQLModel, table=True):
     termini_post_quos: str
     terminus_ante_quem: int
     termini_ante_quos: str
-    date_mean: int
+    date_mean: int = Field(index=True)
     date_standard_deviation: float
     support: str
     folio: int
@@ -160,7 +207,7 @@ class Manuscripts(SQLModel, table=True):
 
     @staticmethod
     def make(entry: Manuscript) -> Manuscripts:
-        data = {**entry.__dict__}
+        data = _fields(entry)
         data["texts"] = []
         data["people"] = []
         return Manuscripts(**data)
@@ -0,0 +1,129 @@
+"""
+This module serializes runtime writes to a SQLite database.
+
+All writes are handed to a single background thread, which commits them in batches.
+Together with the write-ahead log, this means that writers never compete for the database lock within a process,
+and readers never wait for writers.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from logging import Logger
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.future import Engine
+from sqlmodel import Session
+
+from lib import utils
+
+log: Logger = utils.get_logger(__name__)
+
+T = TypeVar("T")
+
+MAX_BATCH_SIZE = 64
+"""Maximum number of writes committed in one transaction."""
+
+MAX_RETRIES = 5
+"""Number of times a batch is retried, if the database is locked by another process."""
+
+
+class BackgroundWriter:
+    """Executes write operations on a single background thread.
+
+    A write operation is a function that receives a `Session` and must not commit it.
+    Operations queued while a transaction is in progress are committed together in the next transaction.
+    If a batch fails, its operations are retried one by one, so that a failing operation does not affect the others.
+
+    The thread is started on the first write, so the writer can be created before forking.
+    """
+
+    def __init__(self, engine: Engine, max_batch_size: int = MAX_BATCH_SIZE) -> None:
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self._queue: queue.Queue[Optional[tuple[Callable[[Session], Any], Future[Any]]]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def write(self, operation: Callable[[Session], T]) -> T:
+        """Executes a write operation and waits until it is committed.
+
+        Raises:
+            Exception: any exception raised by the operation or by committing it.
+        """
+        return self.submit(operation).result()
+
+    def submit(self, operation: Callable[[Session], T]) -> Future[T]:
+        """Queues a write operation. The returned future is resolved once the operation is committed."""
+        future: Future[T] = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((operation, future))
+        return future
+
+    def close(self) -> None:
+        """Commits all queued writes and stops the background thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch: list[tuple[Callable[[Session], Any], Future[Any]]]) -> None:
+        try:
+            results = self._transaction([op for op, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            log.warning("Batch of %s writes failed, retrying them one by one: %s", len(batch), e)
+            for item in batch:
+                self._commit_batch([item])
+            return
+        for (_, future), res in zip(batch, results):
+            future.set_result(res)
+        log.debug("Committed batch of %s writes", len(batch))
+
+    def _transaction(self, operations: list[Callable[[Session], Any]]) -> list[Any]:
+        """Runs operations in one transaction, waiting and retrying while another process holds the write lock."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                with Session(self.engine) as session:
+                    # take the write lock up front, so the transaction cannot fail halfway through on a stale read
+                    session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                    results = [op(session) for op in operations]
+                    session.commit()
+                    return results
+            except OperationalError as e:
+                if "locked" not in str(e) or attempt == MAX_RETRIES:
+                    raise
+                log.warning("Database is locked, retrying write (attempt %s)", attempt + 1)
+                time.sleep(0.05 * 2 ** attempt)
+        raise AssertionError("unreachable")
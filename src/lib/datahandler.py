@@ -4,56 +4,280 @@ This module handles data and provides convenient and efficient access to it.
 
 from __future__ import annotations
 
-from typing import Callable
+import dataclasses
+import threading
+from functools import cached_property
+from typing import (Callable, Generic, Iterator, Mapping, Optional, Sequence,
+                    TypeVar, Union, overload)
+from uuid import UUID
 
 import pandas as pd
 
-from lib import utils
+from lib import latency, utils
+from lib.browse import MAX_PAGE_SIZE, PAGE_SIZE, BrowseEntity, BrowsePage
+from lib.constants import (DATABASE_BACKEND, DUCKDB_DATABASE_PATH,
+                           LOOKUP_SNAPSHOT_PATH)
+from lib.corpus_statistics import CorpusStatistic
+from lib.database import snapshot
 from lib.database.database import Database
-from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
-from lib.groups import Group
+from lib.database.memory.database_memory_impl import DatabaseMemoryImpl
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine, time_queries)
+from lib.database.sqlite.writer import BackgroundWriter
+from lib.groups import Group, GroupCatalogue, GroupType
 from lib.utils import SearchOptions
 
 log = utils.get_logger(__name__)
 
+T = TypeVar("T")
 
-class DataHandler:
 
-    manuscripts: dict[str, list[str]]
-    """Lookup dictionary mapping full msIDs (handrit-IDs) to Shelfmarks, Nicknames of manuscripts."""
+@dataclasses.dataclass(frozen=True)
+class SelectOptions:
+    """Options of a selection widget: the keys, sorted by their display labels, and the labels themselves,
+    or `None` if the keys are their own labels."""
+
+    keys: Sequence[str]
+    labels: Optional[Mapping[str, str]]
+
+    @staticmethod
+    def make(labels: dict[str, str]) -> SelectOptions:
+        return SelectOptions(snapshot.sort_by_label(labels), labels)
+
+    def format(self, key: str) -> str:
+        """Returns the display label of a key. Meant to be passed as `format_func` to Streamlit."""
+        return key if self.labels is None else self.labels[key]
+
+
+class _Labels(Mapping[str, str], Generic[T]):
+    """Labels of selection options, computed from a lookup table when the first of them is needed.
+
+    Streamlit formats every option of a selection widget on every rerun, so all labels are computed at once,
+    and kept in the memory of the process.
+    """
+
+    def __init__(self, lookup: Mapping[str, T], label: Callable[[str, T], str]) -> None:
+        self._lookup = lookup
+        self._label = label
+        self._labels: Optional[dict[str, str]] = None
+
+    @property
+    def labels(self) -> dict[str, str]:
+        if self._labels is None:
+            self._labels = {k: self._label(k, v) for k, v in self._lookup.items()}
+        return self._labels
+
+    def __getitem__(self, key: str) -> str:
+        return self.labels[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lookup)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+
+class _Keys(Sequence[str]):
+    """Keys of selection options, read from a sequence when the first of them is needed.
+
+    Streamlit copies the options of a selection widget on every rerun, so the keys are read once,
+    and kept in the memory of the process.
+    """
+
+    def __init__(self, keys: Sequence[str]) -> None:
+        self._source = keys
+        self._keys: Optional[list[str]] = None
+
+    @property
+    def keys(self) -> list[str]:
+        if self._keys is None:
+            self._keys = list(self._source)
+        return self._keys
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
 
-    texts: list[str]
-    """Temporary lookup tool for search"""
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
 
-    person_names: dict[str, str]
-    """Name lookup dictionary mapping person IDs to the full name of the person"""
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, list[str]]:
+        return self.keys[index]
 
-    person_names_inverse: dict[str, list[str]]
-    """Inverse name lookup dictionary, mapping person names to a list of IDs of persons with said name"""
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys)
+
+    def __len__(self) -> int:
+        return len(self._source)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return self.keys == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.keys!r})"
+
+
+class DataHandler:
 
     database: Database
     """Database connector"""
 
-    def __init__(self, database: Database) -> None:
+    generation: str
+    """Generation of the loaded data. Changes whenever the database is rebuilt."""
+
+    def __init__(self, database: Database, snapshot_path: Optional[str] = None) -> None:
+        """Creates a new handler.
+
+        The lookup tables and the selection options are mapped from the lookup snapshot at `snapshot_path`,
+        if it matches the database generation, and shared with all other processes that map it.
+        Otherwise, each of them is loaded from the database on first access.
+        """
         log.info("Creating new handler")
         self.database = database
         log.info("Databases up and running")
-        self.person_names = self.database.persons_lookup_dict()
-        self.person_names_inverse = _get_person_names_inverse(self.person_names)
-        log.info("Loaded Person Info")
-        self.manuscripts = self.database.ms_lookup_dict()
-        log.info("Loaded MS Info")
-        self.texts = self.database.txt_lookup_list()
-        log.info("Loaded Text Info")
+        self.generation = self.database.get_generation()
+        log.info("Database generation: %s", self.generation)
+        self._group_catalogue: Optional[GroupCatalogue] = None
+        self._group_lock = threading.Lock()
+        if snapshot_path:
+            lookups = snapshot.read_snapshot(snapshot_path, self.generation)
+            if lookups:
+                self.person_names = lookups.person_names
+                self.person_names_inverse = lookups.person_names_inverse
+                self.manuscripts = lookups.manuscripts
+                self.texts = lookups.texts
+                self.manuscript_options = SelectOptions(
+                    _Keys(lookups.manuscript_keys), _Labels(lookups.manuscripts, snapshot.manuscript_label))
+                self.person_options = SelectOptions(
+                    _Keys(lookups.person_keys), _Labels(lookups.person_names, snapshot.person_label))
+                self.text_options = SelectOptions(_Keys(lookups.text_keys), None)
+                log.info("Mapped lookups from snapshot")
         log.info("Successfully created a Datahandler instance.")
 
     @staticmethod
-    def make() -> DataHandler:
-        """Create a DataHandler instance with a readily set-up database"""
-        db = DatabaseSQLiteImpl()
+    def make(backend: str = DATABASE_BACKEND) -> DataHandler:
+        """Create a DataHandler instance with a readily set-up database, writing groups through a background writer.
+
+        `backend` selects the implementation of the database: `sqlite`, `duckdb` or `memory`.
+        The DuckDB database is built by `rebuild.py --duckdb`. It writes groups on the calling thread
+        and loads the lookups itself, as the lookup snapshot belongs to the SQLite database.
+        With `memory`, the SQLite database is loaded into memory to answer searches, and still used for everything else.
+
+        The latencies of the database statements are recorded in `latency.statements`.
+        """
+        if backend == "duckdb":
+            # DuckDB is only imported when it is used
+            from lib.database.duckdb.database_duckdb_impl import (
+                DatabaseDuckDBImpl, get_connection)
+            duck = DatabaseDuckDBImpl(get_connection(DUCKDB_DATABASE_PATH))
+            duck.setup_db()
+            return DataHandler(duck)
+        if backend not in ("sqlite", "memory"):
+            raise ValueError(f"Unknown database backend: {backend}")
+        engine = get_engine()
+        time_queries(engine)
+        db = DatabaseSQLiteImpl(engine, BackgroundWriter(engine))
         db.setup_db()
-        return DataHandler(db)
+        if backend == "memory":
+            return DataHandler(DatabaseMemoryImpl(db), LOOKUP_SNAPSHOT_PATH)
+        return DataHandler(db, LOOKUP_SNAPSHOT_PATH)
+
+    @cached_property
+    def manuscripts(self) -> Mapping[str, list[str]]:
+        """Lookup dictionary mapping full msIDs (handrit-IDs) to Shelfmarks, Nicknames of manuscripts."""
+        res = self.database.ms_lookup_dict()
+        log.info("Loaded MS Info")
+        return res
 
+    @cached_property
+    def texts(self) -> Sequence[str]:
+        """Temporary lookup tool for search"""
+        res = self.database.txt_lookup_list()
+        log.info("Loaded Text Info")
+        return res
+
+    @cached_property
+    def person_names(self) -> Mapping[str, str]:
+        """Name lookup dictionary mapping person IDs to the full name of the person"""
+        res = self.database.persons_lookup_dict()
+        log.info("Loaded Person Info")
+        return res
+
+    @cached_property
+    def person_names_inverse(self) -> Mapping[str, list[str]]:
+        """Inverse name lookup dictionary, mapping person names to a list of IDs of persons with said name"""
+        return snapshot.get_person_names_inverse(self.person_names)
+
+    @cached_property
+    def manuscript_options(self) -> SelectOptions:
+        """Manuscript IDs with labels of the form `shelfmark / nickname (ID)`, sorted by label"""
+        return SelectOptions.make({k: snapshot.manuscript_label(k, v) for k, v in self.manuscripts.items()})
+
+    @cached_property
+    def person_options(self) -> SelectOptions:
+        """Person IDs with labels of the form `name (ID)`, sorted by label"""
+        return SelectOptions.make({k: snapshot.person_label(k, v) for k, v in self.person_names.items()})
+
+    @cached_property
+    def text_options(self) -> SelectOptions:
+        """Text names, sorted alphabetically"""
+        return SelectOptions.make({t: t for t in self.texts})
+
+    @latency.timed
+    def browse(self, entity: BrowseEntity, search: str = "", sort_by: Optional[str] = None, descending: bool = False,
+               page: int = 1, page_size: int = PAGE_SIZE) -> BrowsePage:
+        """Get one page of a listing of manuscripts, texts or people.
+
+        Filtering, sorting and pagination happen in the database, so only the rows of the requested page are loaded.
+
+        Args:
+            entity (BrowseEntity): what to list
+            search (str, optional): only list rows whose ID or name contains this, ignoring case. Defaults to "".
+            sort_by (str, optional): one of `entity.sort_keys`. Defaults to the first of them.
+            descending (bool, optional): sort in descending order. Defaults to False.
+            page (int, optional): the page to return, starting at 1. Defaults to 1.
+            page_size (int, optional): the number of rows per page, at most `MAX_PAGE_SIZE`. Defaults to `PAGE_SIZE`.
+
+        Returns:
+            BrowsePage: the rows of the page and the total number of matching rows.
+        """
+        sort_by = sort_by or entity.sort_keys[0]
+        if sort_by not in entity.sort_keys:
+            raise ValueError(f"Cannot sort {entity.name} by: {sort_by}")
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        offset = (max(page, 1) - 1) * page_size
+        res = self.database.browse(entity, search.strip(), sort_by, descending, offset, page_size)
+        log.info("Browsing %s: page %s of %s matching rows", entity.name, page, res.total)
+        return res
+
+    @cached_property
+    def unification_conflicts_summary(self) -> pd.DataFrame:
+        """Number of manuscripts whose catalogue entries had values that could not be unified, per field and rule"""
+        return self.database.get_unification_conflicts_summary()
+
+    @cached_property
+    def corpus_statistics(self) -> dict[CorpusStatistic, pd.DataFrame]:
+        """Statistics of the corpus, computed when the database was built: a table of labels and counts for each"""
+        statistics = self.database.get_corpus_statistics()
+        return {s: pd.DataFrame(statistics.get(s, []), columns=s.columns) for s in CorpusStatistic}
+
+    @latency.timed
+    def get_unification_conflicts(self, field: Optional[str] = None, page: int = 1, page_size: int = PAGE_SIZE) -> pd.DataFrame:
+        """Get one page of the values that could not be unified when building the manuscripts, ordered by manuscript.
+
+        Args:
+            field (str, optional): only get conflicts of this manuscript field. Defaults to None.
+            page (int, optional): the page to return, starting at 1. Defaults to 1.
+            page_size (int, optional): the number of rows per page, at most `MAX_PAGE_SIZE`. Defaults to `PAGE_SIZE`.
+
+        Returns:
+            pd.DataFrame: the manuscript ID, field, values of the catalogue entries, merge rule and result of each conflict.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        return self.database.get_unification_conflicts(field, (max(page, 1) - 1) * page_size, page_size)
+
+    @latency.timed
     def search_manuscript_data(self, ms_ids: list[str]) -> pd.DataFrame:
         """Search manuscript metadata for manuscripts, given a list of manuscript IDs.
 
@@ -64,9 +288,10 @@ class DataHandler:
             pd.DataFrame: A dataframe containing the metadata for the requested manuscripts.
         """
         res = self.database.get_metadata(ms_ids)
-        log.info(f"Found {len(res.index)} metadata entries for manuscripts: {ms_ids}")
+        log.info("Found %s metadata entries for manuscripts: %s", len(res.index), ms_ids)
         return res
 
+    @latency.timed
     def search_manuscripts_containing_texts(self, texts: list[str], searchOption: SearchOptions) -> list[str]:
         """Search manuscripts containing certain texts
 
@@ -78,7 +303,7 @@ class DataHandler:
             list[str]: A list of manuscripts IDs containing either one or all of the passed texts, depending on the chosen searchOption.
                 Returns an empty list, if none were found.
         """
-        log.info(f'Searching for manuscripts with texts: {texts} ({searchOption})')
+        log.info('Searching for manuscripts with texts: %s (%s)', texts, searchOption)
         if not texts:
             log.debug('Searched texts are empty list')
             return []
@@ -87,6 +312,7 @@ class DataHandler:
         else:
             return _and_search(texts, self.database.ms_x_txts)
 
+    @latency.timed
     def search_texts_contained_by_manuscripts(self, ms_ids: list[str], searchOption: SearchOptions) -> list[str]:
         """Search the texts contained by certain manuscripts.
 
@@ -102,7 +328,7 @@ class DataHandler:
         Returns:
             list[str]: A list of text names.
         """
-        log.info(f'Searching for texts contained by manuscripts: {ms_ids} ({searchOption})')
+        log.info('Searching for texts contained by manuscripts: %s (%s)', ms_ids, searchOption)
         if not ms_ids:
             log.debug('Searched for empty list of mss')
             return []
@@ -111,6 +337,7 @@ class DataHandler:
         else:
             return _and_search(ms_ids, self.database.txts_x_ms)
 
+    @latency.timed
     def search_persons_related_to_manuscripts(self, ms_ids: list[str], searchOption: SearchOptions) -> list[str]:
         """Search for people related to a given list of manuscripts.
 
@@ -121,7 +348,7 @@ class DataHandler:
         Returns:
             list[str]: a list of person IDs
         """
-        log.info(f'Searching for persons related to manuscripts: {ms_ids} ({searchOption})')
+        log.info('Searching for persons related to manuscripts: %s (%s)', ms_ids, searchOption)
         if not ms_ids:
             log.debug('Searched for empty list of mss')
             return []
@@ -130,6 +357,7 @@ class DataHandler:
         else:
             return _and_search(ms_ids, self.database.ppl_x_mss)
 
+    @latency.timed
     def search_manuscripts_related_to_persons(self, person_ids: list[str], search_option: SearchOptions) -> list[str]:
         """Search for manuscript related to a given list of people.
 
@@ -140,7 +368,7 @@ class DataHandler:
         Returns:
             list[str]: a list of manuscript IDs
         """
-        log.info(f'Searching for manuscript related to people: {person_ids} ({search_option})')
+        log.info('Searching for manuscript related to people: %s (%s)', person_ids, search_option)
         if not person_ids:
             log.debug('Searched for empty list of people')
             return []
@@ -149,36 +377,110 @@ class DataHandler:
         else:
             return _and_search(person_ids, self.database.ms_x_ppl)
 
+    @latency.timed
     def get_all_groups(self) -> list[Group]:
         """Gets all groups from the DB"""
-        return self.database.get_all_groups()
+        return self._get_group_catalogue().get_all()
 
+    @latency.timed
     def get_ms_groups(self) -> list[Group]:
         """Gets all manuscript groups from the DB"""
-        return self.database.get_ms_groups()
+        return self._get_group_catalogue().get_by_type(GroupType.ManuscriptGroup)
 
+    @latency.timed
     def get_ppl_groups(self) -> list[Group]:
         """Gets all people groups from the DB"""
-        return self.database.get_ppl_groups()
+        return self._get_group_catalogue().get_by_type(GroupType.PersonGroup)
 
+    @latency.timed
     def get_txt_groups(self) -> list[Group]:
         """Gets all text groups from the DB"""
-        return self.database.get_txt_groups()
+        return self._get_group_catalogue().get_by_type(GroupType.TextGroup)
 
+    @latency.timed
+    def get_group(self, group_id: UUID) -> Optional[Group]:
+        """Gets a single group from the DB, or `None` if no group with that ID exists"""
+        return self._get_group_catalogue().get(group_id)
+
+    @latency.timed
     def put_group(self, group: Group) -> None:
         """Puts a group to the DB, replacing it if it already existed"""
         self.database.update_group(group, group.group_id)
+        self._write_through(lambda c: c.put(group))
 
+    @latency.timed
     def add_group(self, group: Group) -> None:
         """Adds a new group to the DB."""
         self.database.add_group(group)
+        self._write_through(lambda c: c.put(group))
 
+    @latency.timed
+    def add_group_items(self, group_id: UUID, items: set[str]) -> None:
+        """Adds items to an existing group in the DB, without rewriting the group."""
+        self.database.add_group_items(group_id, items)
+        self._write_through(lambda c: _update_group_items(c, group_id, lambda old: old | items))
 
-def _get_person_names_inverse(person_names: dict[str, str]) -> dict[str, list[str]]:
-    res: dict[str, list[str]] = {}
-    for k, v in person_names.items():
-        res[v] = res.get(v, []) + [k]
-    return res
+    @latency.timed
+    def remove_group_items(self, group_id: UUID, items: set[str]) -> None:
+        """Removes items from an existing group in the DB, without rewriting the group."""
+        self.database.remove_group_items(group_id, items)
+        self._write_through(lambda c: _update_group_items(c, group_id, lambda old: old - items))
+
+    @latency.timed
+    def combine_groups(self, group_ids: list[UUID], search_option: SearchOptions) -> set[str]:
+        """Combines the items of several groups.
+
+        Args:
+            group_ids (list[UUID]): the IDs of the groups to combine
+            search_option (SearchOptions): wether to get the union (OR) or the intersection (AND) of the groups
+
+        Returns:
+            set[str]: the combined items
+        """
+        if not group_ids:
+            return set()
+        if search_option == SearchOptions.CONTAINS_ONE:
+            return set(self.database.union_groups(group_ids))
+        else:
+            return set(self.database.intersect_groups(group_ids))
+
+    @latency.timed
+    def delete_group(self, group_id: UUID) -> None:
+        """Deletes a group from the DB."""
+        self.database.delete_group(group_id)
+        self._write_through(lambda c: c.remove(group_id))
+
+    def _get_group_catalogue(self) -> GroupCatalogue:
+        """Returns the cached group catalogue, reloading it only if the groups in the DB have changed in the meantime."""
+        with self._group_lock:
+            version = self.database.get_groups_version()
+            if self._group_catalogue is None or self._group_catalogue.version != version:
+                self._group_catalogue = GroupCatalogue(version, self.database.get_all_groups())
+                log.debug("Loaded group catalogue at version %s: %s", version, len(self._group_catalogue))
+            return self._group_catalogue
+
+    def _write_through(self, update: Callable[[GroupCatalogue], None]) -> None:
+        """Applies a change, that has just been written to the DB, to the cached group catalogue.
+
+        If the groups have been changed by someone else in the meantime, the catalogue is dropped instead,
+        so that it gets reloaded on the next access.
+        """
+        with self._group_lock:
+            catalogue = self._group_catalogue
+            if catalogue is None:
+                return
+            version = self.database.get_groups_version()
+            if version == catalogue.version + 1:
+                update(catalogue)
+                catalogue.version = version
+            else:
+                self._group_catalogue = None
+
+
+def _update_group_items(catalogue: GroupCatalogue, group_id: UUID, update: Callable[[set[str]], set[str]]) -> None:
+    group = catalogue.get(group_id)
+    if group is not None:
+        catalogue.put(dataclasses.replace(group, items=update(group.items)))
 
 
 def _and_search(params: list[str], search_fn: Callable[[list[str]], list[str]]) -> list[str]:
@@ -188,12 +490,12 @@ def _and_search(params: list[str], search_fn: Callable[[list[str]], list[str]])
         log.info('nothing found')
         return []
     res = list(set.intersection(*sets))
-    log.info(f'Search results: {len(res)}')
+    log.info('Search results: %s', len(res))
     return res
 
 
 def _or_search(params: list[str], search_fn: Callable[[list[str]], list[str]]) -> list[str]:
     """Helper method to do a logical OR search, provided a list of search parameters (IDs) and a search function to call."""
     res = search_fn(params)
-    log.info(f'Search results: {len(res)}')
+    log.info('Search results: %s', len(res))
     return res
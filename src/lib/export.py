@@ -0,0 +1,178 @@
+"""
+This module exports manuscript metadata to files.
+
+Exports are generated on request, chunk by chunk, so that memory use does not grow with the size of the result set.
+Generated files are cached on disk per result set, database generation and format,
+so that downloading the same results again does not generate them again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from lib import utils
+from lib.constants import EXPORT_CACHE_PATH
+from lib.datahandler import DataHandler
+
+log = utils.get_logger(__name__)
+
+CHUNK_SIZE = 2000
+"""Number of manuscripts loaded from the database and written at a time."""
+
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+"""Size up to which the export cache may grow, before the least recently used exports are removed."""
+
+
+class ExportFormat(Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    EXCEL = "xlsx"
+
+    @property
+    def label(self) -> str:
+        return {"csv": "CSV", "parquet": "Parquet", "xlsx": "Excel"}[self.value]
+
+    @property
+    def mime(self) -> str:
+        return {
+            "csv": "text/csv",
+            "parquet": "application/vnd.apache.parquet",
+            "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        }[self.value]
+
+
+class ExportCache:
+    """Directory of generated exports, bounded in size.
+
+    Args:
+        path (str): the cache directory. Created if it does not exist.
+        max_bytes (int, optional): size up to which the cache may grow.
+    """
+
+    def __init__(self, path: str = EXPORT_CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+
+    def get(self, key: str, fmt: ExportFormat) -> Optional[Path]:
+        """Returns the cached export, or `None` if there is none."""
+        path = self.path / f"{key}.{fmt.value}"
+        if not path.exists():
+            return None
+        os.utime(path)
+        return path
+
+    def put(self, key: str, fmt: ExportFormat, tmp_file: Path) -> Path:
+        """Moves a generated export into the cache and evicts old exports if the cache has grown too large."""
+        path = self.path / f"{key}.{fmt.value}"
+        os.replace(tmp_file, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        files = sorted((p for p in self.path.iterdir() if p.is_file() and not p.name.startswith(".")),
+                       key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for p in files:
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+            log.debug("Evicted export from cache: %s", p.name)
+
+
+def result_key(handler: DataHandler, ms_ids: list[str]) -> str:
+    """Identifies a result set of the current database generation, independent of order and duplicates."""
+    h = hashlib.sha1(handler.generation.encode("utf-8"))
+    for ms_id in sorted(set(ms_ids)):
+        h.update(b"\0" + ms_id.encode("utf-8"))
+    return h.hexdigest()
+
+
+def export_manuscripts(handler: DataHandler, ms_ids: list[str], fmt: ExportFormat, cache: Optional[ExportCache] = None) -> Path:
+    """Exports the metadata of manuscripts to a file and returns its path.
+
+    The file is taken from the cache, if the same manuscripts have been exported to the same format before.
+    """
+    cache = cache or ExportCache()
+    key = result_key(handler, ms_ids)
+    cached = cache.get(key, fmt)
+    if cached:
+        log.info("Export of %s manuscripts to %s served from cache", len(ms_ids), fmt.label)
+        return cached
+    cache.path.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache.path, prefix=".", suffix=f".{fmt.value}")
+    os.close(fd)
+    tmp_file = Path(tmp)
+    try:
+        chunks = iter_metadata(handler, ms_ids)
+        if fmt == ExportFormat.CSV:
+            _write_csv(chunks, tmp_file)
+        elif fmt == ExportFormat.PARQUET:
+            _write_parquet(chunks, tmp_file)
+        else:
+            _write_excel(chunks, tmp_file)
+        path = cache.put(key, fmt, tmp_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+    log.info("Exported %s manuscripts to %s: %s bytes", len(ms_ids), fmt.label, path.stat().st_size)
+    return path
+
+
+def iter_metadata(handler: DataHandler, ms_ids: list[str], chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Loads the metadata of manuscripts from the database, `chunk_size` manuscripts at a time, in order of their IDs."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    ids = sorted(set(ms_ids))
+    for i in range(0, len(ids), chunk_size):
+        chunk = handler.search_manuscript_data(ids[i:i + chunk_size])
+        if not chunk.empty:
+            yield chunk.sort_values("manuscript_id")
+
+
+def _write_csv(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # columns that are empty in the first chunk are not necessarily empty in later ones
+                schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+        if writer is None:
+            pq.write_table(pa.table({}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_excel(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Manuscripts")
+    header = True
+    for chunk in chunks:
+        if header:
+            ws.append(list(chunk.columns))
+            header = False
+        for row in chunk.itertuples(index=False):
+            ws.append([None if pd.isna(v) else v for v in row])
+    wb.save(path)
@@ -4,7 +4,7 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Set
+from typing import Optional, Set
 
 from lib import utils
 
@@ -46,3 +46,44 @@ class Group:
     items: Set[str]
     date: datetime = field(default_factory=lambda: datetime.now(timezone.utc).astimezone())
     group_id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+
+class GroupCatalogue:
+    """In-memory index of groups by ID and by type.
+
+    Holds the state of the groups at a given groups version of the database.
+    """
+
+    def __init__(self, version: int, groups: list[Group]) -> None:
+        self.version = version
+        self._by_id: dict[uuid.UUID, Group] = {}
+        self._by_type: dict[GroupType, dict[uuid.UUID, Group]] = {t: {} for t in GroupType}
+        for g in groups:
+            self.put(g)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, group_id: uuid.UUID) -> Optional[Group]:
+        """Gets a group by ID, or `None` if it is not in the catalogue."""
+        return self._by_id.get(group_id)
+
+    def get_all(self) -> list[Group]:
+        """Gets all groups."""
+        return list(self._by_id.values())
+
+    def get_by_type(self, group_type: GroupType) -> list[Group]:
+        """Gets all groups of a given type."""
+        return list(self._by_type[group_type].values())
+
+    def put(self, group: Group) -> None:
+        """Adds a group, replacing any group with the same ID."""
+        self.remove(group.group_id)
+        self._by_id[group.group_id] = group
+        self._by_type[group.group_type][group.group_id] = group
+
+    def remove(self, group_id: uuid.UUID) -> None:
+        """Removes a group, if it is in the catalogue."""
+        group = self._by_id.pop(group_id, None)
+        if group is not None:
+            del self._by_type[group.group_type][group_id]
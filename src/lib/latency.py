@@ -0,0 +1,150 @@
+"""
+This module keeps latency statistics of the running application.
+
+Latencies are collected in histograms with fixed, roughly logarithmic buckets, so that recording is cheap
+and memory does not grow with the number of calls. There are two collections per process:
+`methods`, fed by the `@timed` decorator on `DataHandler` methods,
+and `statements`, fed by the SQL statement timing of the database engine.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T", bound=Callable[..., Any])
+
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+"""Upper bounds of the histogram buckets, in milliseconds. Slower calls go into a last, unbounded bucket."""
+
+SLOW_QUERIES_KEPT = 50
+"""Number of the most recent slow queries kept for display."""
+
+
+@dataclass
+class Histogram:
+    """Latency histogram of a single method or statement."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile as the upper bound of the bucket it falls into. The last bucket is bounded by the maximum."""
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """A statement that took longer than the threshold, with its query plan."""
+
+    timestamp: float
+    ms: float
+    statement: str
+    parameters: str
+    plan: list[str]
+
+
+class LatencyStats:
+    """Thread-safe collection of latency histograms, by name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[str, Histogram] = {}
+        self._slow: deque[SlowQuery] = deque(maxlen=SLOW_QUERIES_KEPT)
+
+    def add(self, name: str, ms: float) -> None:
+        with self._lock:
+            h = self._histograms.get(name)
+            if h is None:
+                h = self._histograms[name] = Histogram()
+            h.add(ms)
+
+    def add_slow(self, query: SlowQuery) -> None:
+        with self._lock:
+            self._slow.append(query)
+
+    @property
+    def slow(self) -> list[SlowQuery]:
+        """The most recent slow queries, the latest first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def __getitem__(self, name: str) -> Histogram:
+        with self._lock:
+            return self._histograms[name]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._histograms))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._slow.clear()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Count, total, mean, estimated quantiles and maximum in milliseconds, by name, ordered by total time."""
+        with self._lock:
+            items = [(name, Histogram(list(h.counts), h.total_ms, h.max_ms)) for name, h in self._histograms.items()]
+        rows = [{
+            "name": name,
+            "count": h.count,
+            "total_ms": h.total_ms,
+            "mean_ms": h.total_ms / h.count,
+            "p50_ms": h.quantile(0.5),
+            "p95_ms": h.quantile(0.95),
+            "p99_ms": h.quantile(0.99),
+            "max_ms": h.max_ms,
+        } for name, h in items]
+        columns = ["name", "count", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        return pd.DataFrame(rows, columns=columns).sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+methods = LatencyStats()
+"""Latencies of the `DataHandler` methods"""
+
+statements = LatencyStats()
+"""Latencies of the SQL statements, with the slow query log"""
+
+
+def timed(fn: T) -> T:
+    """Decorator: records the latency of every call in `methods`, under the qualified name of the function."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            methods.add(name, (time.perf_counter() - start) * 1000)
+    return wrapper  # type: ignore
+
+
+def reset() -> None:
+    """Resets all latency statistics of this process."""
+    methods.reset()
+    statements.reset()
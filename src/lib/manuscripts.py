@@ -1,10 +1,37 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
+from typing import Iterable, Sequence
 
 
-@dataclass(frozen=True)
+def _intern(s: str) -> str:
+    return sys.intern(s) if type(s) is str else s
+
+
+def _compact(obj: object, fields: Iterable[str]) -> None:
+    """Interns the values of the given fields, and turns the texts and people into tuples of interned strings.
+
+    Many catalogue entries and manuscripts share the same countries, repositories, texts, people, etc.,
+    so all of them then share a single copy of each of these strings.
+    """
+    for name in fields:
+        object.__setattr__(obj, name, _intern(getattr(obj, name)))
+    object.__setattr__(obj, "texts", tuple(map(_intern, getattr(obj, "texts"))))
+    object.__setattr__(obj, "people", tuple(map(_intern, getattr(obj, "people"))))
+
+
+_INTERNED_FIELDS = ("description", "date_string", "support", "height", "width", "extent", "origin", "creator",
+                    "country", "settlement", "repository")
+"""Fields with few distinct values"""
+
+
+@dataclass(frozen=True, slots=True)
 class CatalogueEntry:
+    """Metadata of a single catalogue entry, i.e. one XML file.
+
+    Texts and people can be given as any sequence, and are stored as tuples.
+    """
     catalogue_id: str
     shelfmark: str
     manuscript_id: str
@@ -26,12 +53,19 @@ class CatalogueEntry:
     country: str
     settlement: str
     repository: str
-    texts: list[str]
-    people: list[str]
+    texts: Sequence[str]
+    people: Sequence[str]
+
+    def __post_init__(self) -> None:
+        _compact(self, _INTERNED_FIELDS)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Manuscript:
+    """Metadata of a manuscript, unified from all of its catalogue entries.
+
+    Texts and people can be given as any sequence, and are stored as tuples.
+    """
     manuscript_id: str
     shelfmark: str
     catalogue_entries: int
@@ -56,5 +90,8 @@ class Manuscript:
     country: str
     settlement: str
     repository: str
-    texts: list[str]
-    people: list[str]
+    texts: Sequence[str]
+    people: Sequence[str]
+
+    def __post_init__(self) -> None:
+        _compact(self, _INTERNED_FIELDS)
@@ -2,29 +2,37 @@ from datetime import datetime as dt
 
 import pandas as pd
 import streamlit as st
-from lib import utils
+from lib import export
 from lib.datahandler import DataHandler
 from st_aggrid import AgGrid as ag
 from st_aggrid import GridUpdateMode
 
 
-def citavi_export(metadata: pd.DataFrame) -> None:
-    csv = metadata.to_csv(index=False)
+def citavi_export(handler: DataHandler, ms_ids: list[str]) -> None:
+    """Offers the metadata of the manuscripts for download. The file is only generated once requested."""
+    fmt = st.selectbox("Export format", list(export.ExportFormat), format_func=lambda f: f.label) or export.ExportFormat.CSV
+    if not st.button(f"Prepare {fmt.label} export"):
+        return
+    with st.spinner("Generating export..."):
+        path = export.export_manuscripts(handler, ms_ids, fmt)
     tstamp = dt.now().strftime("%Y-%m-%d-%H%M")
-    st.download_button(label="Download", data=csv, file_name=f"toole-citave-export{tstamp}.csv")
+    with open(path, "rb") as f:
+        st.download_button(label="Download", data=f, file_name=f"toole-citave-export{tstamp}.{fmt.value}", mime=fmt.mime)
 
 
 def plot_date_scatter(metadata: pd.DataFrame) -> None:
     if metadata.empty:
         return
-    fig = utils.date_plotting(metadata)
+    from lib import charts
+    fig = charts.date_plotting(metadata)
     st.plotly_chart(fig, use_container_width=True)
 
 
 def plot_dims(metadata: pd.DataFrame) -> None:
     if metadata.empty:
         return
-    fig = utils.dimensions_plotting(metadata)
+    from lib import charts
+    fig = charts.dimensions_plotting(metadata)
     if fig:
         st.plotly_chart(fig, use_container_width=True)
 
@@ -32,7 +40,8 @@ def plot_dims(metadata: pd.DataFrame) -> None:
 def plot_dims_facet(metadata: pd.DataFrame) -> None:
     if metadata.empty:
         return
-    fig = utils.dimensions_plotting_facet(metadata)
+    from lib import charts
+    fig = charts.dimensions_plotting_facet(metadata)
     if fig:
         st.plotly_chart(fig, use_container_width=True)
 
@@ -47,7 +56,7 @@ def process_ms_results(handler: DataHandler, mss: list[str]) -> None:
         print('Uh-oh:', e)
     if isinstance(meta, pd.DataFrame):
         with st.expander("Export results to Citavi"):
-            citavi_export(meta)
+            citavi_export(handler, mss)
         with st.expander("Plot dating of manuscripts"):
             show_data_chart(meta)
 
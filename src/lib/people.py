@@ -1,8 +1,14 @@
+import sys
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Person:
     pers_id: str
     first_name: str
     last_name: str
+
+    def __post_init__(self) -> None:
+        # many people share a first name
+        if type(self.first_name) is str:
+            object.__setattr__(self, "first_name", sys.intern(self.first_name))
@@ -0,0 +1,212 @@
+"""
+Profiling of the database build.
+
+While a `BuildProfiler` is active (see `active()`), the stages of the build (`stage()`)
+and every call of a function decorated with `@profiled` are measured:
+wall time, CPU time, number of items and peak memory.
+The time spent on each catalogue file is recorded as well, so that the slowest files can be listed.
+When no profiler is active, all of this costs next to nothing.
+
+Peak memory is measured with `tracemalloc`, which only sees allocations of the Python allocator;
+the memory of the parsed XML trees is allocated by libxml2. For stages, the peak resident set size
+of the process is recorded in addition, which does include it. Tracing memory slows down the build noticeably,
+so it can be switched off.
+"""
+
+from __future__ import annotations
+
+import functools
+import heapq
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore
+
+T = TypeVar("T", bound=Callable[..., Any])
+
+SLOWEST_FILES = 10
+"""Number of slowest files listed in the report by default."""
+
+
+@dataclass
+class Measurement:
+    """Accumulated measurements of a stage or a function."""
+
+    name: str
+    calls: int = 0
+    wall: float = 0.0
+    """wall time in seconds, summed up over all calls"""
+    cpu: float = 0.0
+    """CPU time of the process in seconds, summed up over all calls"""
+    items: int = 0
+    """number of items processed; for functions, the number of calls, unless given otherwise"""
+    peak_memory: int = 0
+    """maximum over all calls of the traced memory allocated on top of what was allocated at the start of the call, in bytes"""
+    max_rss: int = 0
+    """peak resident set size of the process at the end of the stage, in bytes. Only recorded for stages."""
+
+
+class Span:
+    """A single measurement in progress. The number of items processed can be set while it runs."""
+
+    def __init__(self, items: int = 0) -> None:
+        self.items = items
+        self._start_memory = 0
+        self._peak_memory = 0
+
+
+@dataclass
+class BuildProfiler:
+    """Collects the measurements of one build."""
+
+    slowest: int = SLOWEST_FILES
+    trace_memory: bool = True
+    stages: dict[str, Measurement] = field(default_factory=dict)
+    functions: dict[str, Measurement] = field(default_factory=dict)
+    _files: list[tuple[float, str]] = field(default_factory=list)
+    _spans: list[Span] = field(default_factory=list)
+    _start: float = field(default_factory=time.perf_counter)
+    _start_cpu: float = field(default_factory=time.process_time)
+
+    @contextmanager
+    def measure(self, name: str, is_stage: bool = False) -> Iterator[Span]:
+        """Measures the code run in the `with` block, adding to the stage or function `name`."""
+        span = Span(0 if is_stage else 1)
+        if self.trace_memory:
+            # the peak is reset for this span, so the enclosing one has to take note of the peak so far
+            current, peak = tracemalloc.get_traced_memory()
+            if self._spans:
+                self._spans[-1]._peak_memory = max(self._spans[-1]._peak_memory, peak)
+            tracemalloc.reset_peak()
+            span._start_memory = span._peak_memory = current
+        self._spans.append(span)
+        start, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield span
+        finally:
+            wall, cpu = time.perf_counter() - start, time.process_time() - start_cpu
+            self._spans.pop()
+            measurements = self.stages if is_stage else self.functions
+            m = measurements.get(name)
+            if m is None:
+                m = measurements[name] = Measurement(name)
+            m.calls += 1
+            m.wall += wall
+            m.cpu += cpu
+            m.items += span.items
+            if self.trace_memory:
+                peak = max(span._peak_memory, tracemalloc.get_traced_memory()[1])
+                m.peak_memory = max(m.peak_memory, peak - span._start_memory)
+                if self._spans:
+                    self._spans[-1]._peak_memory = max(self._spans[-1]._peak_memory, peak)
+            if is_stage:
+                m.max_rss = _max_rss()
+
+    def add_file(self, name: str, seconds: float) -> None:
+        """Records the time it took to process a file, keeping only the slowest ones."""
+        if len(self._files) < self.slowest:
+            heapq.heappush(self._files, (seconds, name))
+        elif self._files and seconds > self._files[0][0]:
+            heapq.heapreplace(self._files, (seconds, name))
+
+    @property
+    def slowest_files(self) -> list[tuple[str, float]]:
+        """The slowest files and their processing time in seconds, the slowest first."""
+        return [(name, seconds) for seconds, name in sorted(self._files, reverse=True)]
+
+    def report(self) -> dict[str, Any]:
+        """The measurements as a JSON-serializable dict. Functions are sorted by wall time, the slowest first."""
+        return {
+            "wall": time.perf_counter() - self._start,
+            "cpu": time.process_time() - self._start_cpu,
+            "max_rss": _max_rss(),
+            "memory_traced": self.trace_memory,
+            "stages": [asdict(m) for m in self.stages.values()],
+            "functions": [asdict(m) for m in sorted(self.functions.values(), key=lambda m: m.wall, reverse=True)],
+            "slowest_files": [{"file": name, "wall": seconds} for name, seconds in self.slowest_files],
+        }
+
+    def write_report(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self) -> str:
+        """A table of the stages, functions and slowest files, for the log."""
+        header = f"{'':<46} {'calls':>8} {'items':>8} {'wall s':>9} {'cpu s':>9} {'peak MiB':>9} {'rss MiB':>8}"
+        lines = [header, "Stages:"]
+        lines += [_row(m) for m in self.stages.values()]
+        lines.append("Functions:")
+        lines += [_row(m) for m in sorted(self.functions.values(), key=lambda m: m.wall, reverse=True)]
+        lines.append("Slowest files:")
+        lines += [f"  {name:<44} {seconds * 1000:>10.2f} ms" for name, seconds in self.slowest_files]
+        return "\n".join(lines)
+
+
+def _row(m: Measurement) -> str:
+    peak = f"{m.peak_memory / 2**20:>9.1f}" if m.peak_memory else f"{'':>9}"
+    rss = f"{m.max_rss / 2**20:>8.1f}" if m.max_rss else f"{'':>8}"
+    return f"  {m.name:<44} {m.calls:>8} {m.items:>8} {m.wall:>9.3f} {m.cpu:>9.3f} {peak} {rss}"
+
+
+def _max_rss() -> int:
+    if resource is None:
+        return 0
+    res = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return res if sys.platform == "darwin" else res * 1024
+
+
+_active: Optional[BuildProfiler] = None
+
+
+def get_profiler() -> Optional[BuildProfiler]:
+    """The active profiler, if any."""
+    return _active
+
+
+@contextmanager
+def active(profiler: BuildProfiler) -> Iterator[BuildProfiler]:
+    """Activates the profiler for the `with` block."""
+    global _active
+    tracing = profiler.trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        if tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Span]:
+    """Measures a stage of the build, if a profiler is active. The number of items can be set on the yielded span."""
+    if _active is None:
+        yield Span()
+        return
+    with _active.measure(name, is_stage=True) as span:
+        yield span
+
+
+def profiled(fn: T) -> T:
+    """Decorator: measures every call of the function while a profiler is active."""
+    name = fn.__qualname__ if "." in fn.__qualname__ else f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _active is None:
+            return fn(*args, **kwargs)
+        with _active.measure(name):
+            return fn(*args, **kwargs)
+    return wrapper  # type: ignore
@@ -0,0 +1,304 @@
+"""
+This module provides a headless HTTP/JSON interface to the data handler.
+
+It allows querying the data without the Streamlit front end,
+e.g. from scripts, for load testing, or behind a caching reverse proxy.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import signal
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+from uuid import UUID
+
+from lib import utils
+from lib.constants import DATABASE_PATH
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.database.sqlite.writer import BackgroundWriter
+from lib.datahandler import DataHandler
+from lib.groups import Group, GroupType
+from lib.utils import SearchOptions
+
+log = utils.get_logger(__name__)
+
+GZIP_MIN_SIZE = 1024
+"""Responses smaller than this many bytes are never compressed."""
+
+DATA_MAX_AGE = 3600
+"""Seconds for which clients and proxies may cache responses that only depend on the database generation."""
+
+
+class ApiError(Exception):
+    """Error that is reported to the client with the given HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class QueryService:
+    """Maps API requests to `DataHandler` calls, independent of the HTTP transport.
+
+    All responses of GET requests outside of `/api/groups` only depend on the database generation,
+    so they can be cached until the database is rebuilt.
+    """
+
+    def __init__(self, handler: DataHandler, read_only: bool = False) -> None:
+        self.handler = handler
+        self.read_only = read_only
+        self._searches: dict[str, Callable[[list[str], SearchOptions], list[str]]] = {
+            "/api/manuscripts/by-people": handler.search_manuscripts_related_to_persons,
+            "/api/people/by-manuscripts": handler.search_persons_related_to_manuscripts,
+            "/api/manuscripts/by-texts": handler.search_manuscripts_containing_texts,
+            "/api/texts/by-manuscripts": handler.search_texts_contained_by_manuscripts,
+        }
+        self._lookups: dict[str, Callable[[], Any]] = {
+            "/api/info": lambda: {"generation": handler.generation},
+            "/api/lookups/manuscripts": lambda: dict(handler.manuscripts),
+            "/api/lookups/people": lambda: dict(handler.person_names),
+            "/api/lookups/texts": lambda: list(handler.texts),
+        }
+
+    @property
+    def generation(self) -> str:
+        return self.handler.generation
+
+    def is_static(self, method: str, path: str) -> bool:
+        """Returns `True` if the response to the request only depends on the database generation."""
+        return method == "GET" and not path.startswith("/api/groups")
+
+    def handle(self, method: str, path: str, query: dict[str, list[str]], body: Optional[bytes]) -> tuple[HTTPStatus, bytes]:
+        """Handles a request and returns the HTTP status and the JSON encoded response body."""
+        path = path.rstrip("/")
+        if method == "GET":
+            if path in self._searches:
+                ids = query.get("ids", [])
+                mode = _get_search_option(query)
+                return HTTPStatus.OK, _json(self._searches[path](ids, mode))
+            if path in self._lookups:
+                return HTTPStatus.OK, _json(self._lookups[path]())
+            if path == "/api/manuscripts/metadata":
+                df = self.handler.search_manuscript_data(query.get("ids", []))
+                return HTTPStatus.OK, df.to_json(orient="records").encode("utf-8")
+            if path == "/api/groups":
+                return HTTPStatus.OK, _json([_group_to_dict(g) for g in self._get_groups(query)])
+            if path.startswith("/api/groups/"):
+                group = self.handler.get_group(_get_group_id(path))
+                if group is None:
+                    raise ApiError(HTTPStatus.NOT_FOUND, "No such group")
+                return HTTPStatus.OK, _json(_group_to_dict(group))
+        elif path == "/api/groups" or path.startswith("/api/groups/"):
+            if self.read_only:
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Server is running in read-only mode")
+            if method == "POST" and path == "/api/groups":
+                group = _group_from_json(body)
+                self.handler.add_group(group)
+                return HTTPStatus.CREATED, _json(_group_to_dict(group))
+            if method == "PUT" and path != "/api/groups":
+                group = _group_from_json(body, _get_group_id(path))
+                self.handler.put_group(group)
+                return HTTPStatus.OK, _json(_group_to_dict(group))
+            if method == "DELETE" and path != "/api/groups":
+                self.handler.delete_group(_get_group_id(path))
+                return HTTPStatus.NO_CONTENT, b""
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+
+    def _get_groups(self, query: dict[str, list[str]]) -> list[Group]:
+        if "type" not in query:
+            return self.handler.get_all_groups()
+        try:
+            t = GroupType.from_string(query["type"][0])
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        if t == GroupType.ManuscriptGroup:
+            return self.handler.get_ms_groups()
+        elif t == GroupType.TextGroup:
+            return self.handler.get_txt_groups()
+        return self.handler.get_ppl_groups()
+
+
+class QueryServer(ThreadingHTTPServer):
+    """HTTP server holding the `QueryService` that its request handlers work with."""
+    daemon_threads = True
+    service: QueryService
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: QueryServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.debug("%s - %s", self.address_string(), format % args)
+
+    def _dispatch(self, method: str) -> None:
+        service = self.server.service
+        url = urlsplit(self.path)
+        static = service.is_static(method, url.path)
+        etag = f'W/"{service.generation}-{hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:16]}"' if static else None
+        if etag and etag in self.headers.get("If-None-Match", ""):
+            self._respond(HTTPStatus.NOT_MODIFIED, b"", etag, static)
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            status, payload = service.handle(method, url.path, parse_qs(url.query), body)
+        except ApiError as e:
+            status, payload, static = e.status, _json({"error": str(e)}), False
+        except Exception:
+            log.exception("Failed to handle request: %s %s", method, self.path)
+            status, payload, static = HTTPStatus.INTERNAL_SERVER_ERROR, _json({"error": "Internal server error"}), False
+        if method == "GET" and status == HTTPStatus.OK and not static:
+            etag = f'W/"{hashlib.sha1(payload).hexdigest()}"'
+            if etag in self.headers.get("If-None-Match", ""):
+                self._respond(HTTPStatus.NOT_MODIFIED, b"", etag, static)
+                return
+        self._respond(status, payload, etag if status == HTTPStatus.OK else None, static)
+
+    def _respond(self, status: HTTPStatus, payload: bytes, etag: Optional[str], static: bool) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={DATA_MAX_AGE}" if static else "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if payload:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if len(payload) >= GZIP_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzip.compress(payload, compresslevel=6)
+                self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+def make_server(handler: Optional[DataHandler], host: str = "127.0.0.1", port: int = 8000, read_only: bool = False) -> QueryServer:
+    """Creates a server bound to the given address. If no handler is passed, the service has to be set before serving."""
+    server = QueryServer((host, port), _RequestHandler)
+    if handler is not None:
+        server.service = QueryService(handler, read_only)
+    return server
+
+
+def serve(db_path: str = DATABASE_PATH, host: str = "127.0.0.1", port: int = 8000, workers: int = 1, read_only: bool = False) -> None:
+    """Runs the query server until interrupted.
+
+    With more than one worker, the listening socket is created once and shared by forked worker processes.
+    The database is set up once, before the workers start.
+    Each worker then opens its own connection to the database file.
+    """
+    _setup_db(db_path)
+    server = make_server(None, host, port, read_only)
+    log.warning("Serving %s on http://%s:%s with %s worker(s)", db_path, host, server.server_port, workers)
+    if workers <= 1:
+        _run_worker(server, db_path, read_only)
+        return
+    children: list[int] = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _run_worker(server, db_path, read_only)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    server.server_close()
+
+    def stop(signum: int, _: Any) -> None:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+    log.warning("All workers stopped.")
+
+
+def _setup_db(db_path: str) -> None:
+    """Creates the missing tables and indexes of the database, and migrates it.
+
+    Setting up the database is not safe to run concurrently, so it runs in the parent process,
+    also when the workers open the database read-only, and the connection is closed before they are forked.
+    """
+    engine = get_engine(db_path)
+    try:
+        DatabaseSQLiteImpl(engine).setup_db()
+    finally:
+        engine.dispose()
+
+
+def _run_worker(server: QueryServer, db_path: str, read_only: bool) -> None:
+    engine = get_engine(db_path, read_only=read_only)
+    db = DatabaseSQLiteImpl(engine, None if read_only else BackgroundWriter(engine))
+    server.service = QueryService(DataHandler(db), read_only)
+    log.info("Worker %s ready", os.getpid())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _get_search_option(query: dict[str, list[str]]) -> SearchOptions:
+    mode = query.get("mode", [SearchOptions.CONTAINS_ONE.value])[0].upper()
+    try:
+        return SearchOptions(mode)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid search mode: {mode}")
+
+
+def _get_group_id(path: str) -> UUID:
+    try:
+        return UUID(path.rsplit("/", 1)[-1])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid group ID")
+
+
+def _group_to_dict(group: Group) -> dict[str, Any]:
+    return {
+        "group_id": str(group.group_id),
+        "group_type": group.group_type.value,
+        "name": group.name,
+        "date": group.date.isoformat(),
+        "items": sorted(group.items),
+    }
+
+
+def _group_from_json(body: Optional[bytes], group_id: Optional[UUID] = None) -> Group:
+    try:
+        data = json.loads(body or b"")
+        group_type = GroupType.from_string(data["group_type"])
+        name = str(data["name"])
+        items = {str(i) for i in data.get("items", [])}
+    except (ValueError, KeyError, TypeError) as e:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid group: {e}")
+    if group_id is None:
+        return Group(group_type=group_type, name=name, items=items)
+    return Group(group_type=group_type, name=name, items=items, group_id=group_id)
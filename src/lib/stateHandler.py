@@ -1,8 +1,74 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, overload
 
+from lib import utils
 from lib.utils import SearchOptions
 
+log = utils.get_logger(__name__)
+
+SESSION_MAX_BYTES = 16 * 1024 * 1024
+"""Default maximum size of the stored search results of one session."""
+
+SESSION_IDLE_TIMEOUT = 60 * 60
+"""Default number of seconds after which the state of an idle session is discarded."""
+
+MAX_SESSIONS = 500
+"""Default maximum number of sessions of which the state is kept."""
+
+
+class IdList(Sequence[str]):
+    """Compact, immutable list of IDs.
+
+    The IDs are stored as a single string, which takes a fraction of the memory of a list of strings.
+    Compares equal to lists and tuples with the same IDs.
+    """
+    __slots__ = ("_joined", "_len")
+    _SEP = "\x1f"
+
+    def __init__(self, ids: Iterable[str] = ()) -> None:
+        ids = list(ids)
+        self._joined = self._SEP.join(ids)
+        self._len = len(ids)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._joined.split(self._SEP) if self._len else ())
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        return list(self)[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IdList):
+            return self._len == other._len and self._joined == other._joined
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._joined)
+
+    def __repr__(self) -> str:
+        return f"IdList({list(self)!r})"
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint in bytes."""
+        return sys.getsizeof(self._joined) + 64
+
 
 class Step:
 
@@ -39,64 +105,171 @@ class Step:
 class SearchState:
     @dataclass
     class MS_by_Pers:
-        mss: list[str] = field(default_factory=list)
-        ppl: list[str] = field(default_factory=list)
+        mss: IdList = field(default_factory=IdList)
+        ppl: IdList = field(default_factory=IdList)
         mode: SearchOptions = SearchOptions.CONTAINS_ALL
 
     @dataclass
     class Pers_by_MS:
-        mss: list[str] = field(default_factory=list)
-        ppl: list[str] = field(default_factory=list)
+        mss: IdList = field(default_factory=IdList)
+        ppl: IdList = field(default_factory=IdList)
         mode: SearchOptions = SearchOptions.CONTAINS_ALL
 
     @dataclass
     class MS_by_Txt:
-        mss: list[str] = field(default_factory=list)
-        txt: list[str] = field(default_factory=list)
+        mss: IdList = field(default_factory=IdList)
+        txt: IdList = field(default_factory=IdList)
         mode: SearchOptions = SearchOptions.CONTAINS_ALL
 
     @dataclass
     class Txt_by_MS:
-        mss: list[str] = field(default_factory=list)
-        txt: list[str] = field(default_factory=list)
+        mss: IdList = field(default_factory=IdList)
+        txt: IdList = field(default_factory=IdList)
         mode: SearchOptions = SearchOptions.CONTAINS_ALL
 
-    ms_by_pers = MS_by_Pers()
-    pers_by_ms = Pers_by_MS()
-    ms_by_txt = MS_by_Txt()
-    txt_by_ms = Txt_by_MS()
+    def __init__(self) -> None:
+        self.ms_by_pers = SearchState.MS_by_Pers()
+        self.pers_by_ms = SearchState.Pers_by_MS()
+        self.ms_by_txt = SearchState.MS_by_Txt()
+        self.txt_by_ms = SearchState.Txt_by_MS()
 
 
 class StateHandler:
 
-    def __init__(self) -> None:
+    def __init__(self, max_bytes: int = SESSION_MAX_BYTES) -> None:
         self.searchState = SearchState()
         self.steps: Step = Step()
+        self.max_bytes = max_bytes
+        self._stored: list[str] = []
+        """Names of the search states holding results, least recently stored first."""
 
     def store_ms_by_person_search_state(self, mss: list[str], ppl: list[str], mode: SearchOptions) -> None:
         """Update the state after searching manuscripts by people"""
-        self.searchState.ms_by_pers.mss = mss
-        self.searchState.ms_by_pers.ppl = ppl
-        self.searchState.ms_by_pers.mode = mode
+        self.searchState.ms_by_pers = SearchState.MS_by_Pers(IdList(mss), IdList(ppl), mode)
         self.steps.search_mss_by_persons = Step.MS_by_Pers.Store_Results
+        self._stored_results("ms_by_pers")
 
     def store_ppl_by_ms_search_state(self, ppl: list[str], mss: list[str], mode: SearchOptions) -> None:
         """Update the state after searching people by manuscripts"""
-        self.searchState.pers_by_ms.ppl = ppl
-        self.searchState.pers_by_ms.mss = mss
-        self.searchState.pers_by_ms.mode = mode
+        self.searchState.pers_by_ms = SearchState.Pers_by_MS(IdList(mss), IdList(ppl), mode)
         self.steps.search_ppl_by_mss = Step.Pers_by_Ms.Store_Results
+        self._stored_results("pers_by_ms")
 
     def store_ms_by_txt_search_state(self, mss: list[str], txt: list[str], mode: SearchOptions) -> None:
         """Update the state after searching manuscripts by texts"""
-        self.searchState.ms_by_txt.mss = mss
-        self.searchState.ms_by_txt.txt = txt
-        self.searchState.ms_by_txt.mode = mode
+        self.searchState.ms_by_txt = SearchState.MS_by_Txt(IdList(mss), IdList(txt), mode)
         self.steps.search_mss_by_txt = Step.MS_by_Txt.Store_Results
+        self._stored_results("ms_by_txt")
 
     def store_txt_by_ms_search_state(self, txt: list[str], mss: list[str], mode: SearchOptions) -> None:
         """Update the state after searching texts by manuscripts"""
-        self.searchState.txt_by_ms.txt = txt
-        self.searchState.txt_by_ms.mss = mss
-        self.searchState.txt_by_ms.mode = mode
+        self.searchState.txt_by_ms = SearchState.Txt_by_MS(IdList(mss), IdList(txt), mode)
         self.steps.search_txt_by_mss = Step.Txt_by_Ms.Store_Results
+        self._stored_results("txt_by_ms")
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the stored search results in bytes."""
+        return sum(_nbytes(getattr(self.searchState, name)) for name in self._stored)
+
+    def _stored_results(self, name: str) -> None:
+        """Keeps track of stored results and discards the least recently stored ones, if the session is too large."""
+        if name in self._stored:
+            self._stored.remove(name)
+        self._stored.append(name)
+        while len(self._stored) > 1 and self.nbytes > self.max_bytes:
+            self._reset(self._stored.pop(0))
+        if self.nbytes > self.max_bytes:
+            log.warning("Search results exceed the session memory limit: %s > %s bytes", self.nbytes, self.max_bytes)
+
+    def _reset(self, name: str) -> None:
+        log.info("Discarding stored search results to stay within the session memory limit: %s", name)
+        if name == "ms_by_pers":
+            self.searchState.ms_by_pers = SearchState.MS_by_Pers()
+            self.steps.search_mss_by_persons = Step.MS_by_Pers.Search_person
+        elif name == "pers_by_ms":
+            self.searchState.pers_by_ms = SearchState.Pers_by_MS()
+            self.steps.search_ppl_by_mss = Step.Pers_by_Ms.Search_Ms
+        elif name == "ms_by_txt":
+            self.searchState.ms_by_txt = SearchState.MS_by_Txt()
+            self.steps.search_mss_by_txt = Step.MS_by_Txt.Search_Txt
+        elif name == "txt_by_ms":
+            self.searchState.txt_by_ms = SearchState.Txt_by_MS()
+            self.steps.search_txt_by_mss = Step.Txt_by_Ms.Search_Ms
+
+
+def _nbytes(state: Any) -> int:
+    return sum(v.nbytes for v in state.__dict__.values() if isinstance(v, IdList))
+
+
+@dataclass
+class _Session:
+    state: StateHandler
+    last_seen: float
+
+
+class SessionStore:
+    """Keeps one `StateHandler` per browser session.
+
+    The state of a session is discarded once the session is idle for longer than `idle_timeout` seconds,
+    or once `is_active` reports that it has ended.
+    If more than `max_sessions` sessions are known, the least recently seen ones are discarded.
+
+    Args:
+        max_bytes (int, optional): maximum size of the stored search results per session.
+        idle_timeout (float, optional): seconds after which the state of an idle session is discarded.
+        max_sessions (int, optional): maximum number of sessions to keep state for.
+        is_active (Callable[[str], bool], optional): function telling if a session ID still belongs to a live session.
+        clock (Callable[[], float], optional): time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = SESSION_MAX_BYTES,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        max_sessions: int = MAX_SESSIONS,
+        is_active: Optional[Callable[[str], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._is_active = is_active
+        self._clock = clock
+        self._sessions: dict[str, _Session] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> StateHandler:
+        """Gets the state of a session, creating a new one if there is none."""
+        with self._lock:
+            now = self._clock()
+            session = self._sessions.pop(session_id, None)
+            if session is not None and now - session.last_seen > self.idle_timeout:
+                session = None
+            self._evict(now)
+            if session is None:
+                session = _Session(StateHandler(self.max_bytes), now)
+                log.debug("Created state for session: %s", session_id)
+            session.last_seen = now
+            self._sessions[session_id] = session
+            return session.state
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the stored search results of all sessions in bytes."""
+        return sum(s.state.nbytes for s in list(self._sessions.values()))
+
+    def _evict(self, now: float) -> None:
+        expired = [
+            k for k, s in self._sessions.items()
+            if now - s.last_seen > self.idle_timeout or (self._is_active is not None and not self._is_active(k))
+        ]
+        for k in expired:
+            del self._sessions[k]
+        while len(self._sessions) >= self.max_sessions:
+            del self._sessions[next(iter(self._sessions))]
+        if expired:
+            log.info("Discarded state of %s idle sessions, %s remaining", len(expired), len(self._sessions))
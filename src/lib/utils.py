@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import atexit
+import copy
 import logging
 import os
+import queue
 import sys
+import threading
 from enum import Enum
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objs as go
-import statsmodels.api as sm
-from plotly.graph_objs import Figure
 
 __logs: list[logging.Logger] = []
 
+LOG_MAX_ITEMS = 10
+"""Collections logged as message arguments are cut down to this many items."""
+
+LOG_MAX_CHARS = 1000
+"""Message arguments are cut down to this many characters."""
+
 
 class SearchOptions(Enum):
     CONTAINS_ALL = "AND"
@@ -75,8 +81,91 @@ class Settings:
 __last: Optional[Settings] = None
 
 
+class _TruncatingQueueHandler(QueueHandler):
+    """Hands log records over to the background listener.
+
+    Unlike the standard `QueueHandler`, the message is not formatted on the calling thread.
+    Only large arguments are shortened, so that the record holds on to no large objects.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if isinstance(args, tuple) and args:
+            record = copy.copy(record)
+            record.args = tuple(_shorten(a) for a in args)
+        return record
+
+
+def _shorten(arg: Any) -> Any:
+    """Replaces large collections and long strings by a shortened representation."""
+    if isinstance(arg, (list, tuple, set, frozenset, dict)) and len(arg) > LOG_MAX_ITEMS:
+        items = list(arg.items() if isinstance(arg, dict) else arg)[:LOG_MAX_ITEMS]
+        return f"{items!r}[... {len(arg) - LOG_MAX_ITEMS} more of {len(arg)}]"
+    if isinstance(arg, str) and len(arg) > LOG_MAX_CHARS:
+        return f"{arg[:LOG_MAX_CHARS]}[... {len(arg) - LOG_MAX_CHARS} more characters]"
+    return arg
+
+
+__handler: Optional[QueueHandler] = None
+__listener: Optional[QueueListener] = None
+__setup_lock = threading.Lock()
+
+
+def _get_handler() -> QueueHandler:
+    """Sets up logging for this process on first use.
+
+    All loggers share a single queue handler. A listener thread takes the records off the queue,
+    formats them and writes them to the log files and to stdout, so logging never blocks on I/O.
+    """
+    global __handler, __listener
+    with __setup_lock:
+        if __handler is not None:
+            return __handler
+        log_format = logging.Formatter('%(asctime)s [ %(name)s ] - %(levelname)s:   %(message)s')
+
+        if not os.path.exists('logs'):
+            os.mkdir('logs')
+
+        f_handler = logging.FileHandler('logs/warnings.log', mode='a', encoding='utf-8')
+        f_handler.setLevel(logging.WARNING)
+        f_handler.setFormatter(log_format)
+
+        f_handler2 = logging.FileHandler('logs/log.log', mode='a', encoding='utf-8')
+        f_handler2.setLevel(logging.DEBUG)
+        f_handler2.setFormatter(log_format)
+
+        c_h = logging.StreamHandler(sys.stdout)
+        c_h.setLevel(logging.INFO)
+        c_h.setFormatter(log_format)
+
+        q: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        __handler = _TruncatingQueueHandler(q)
+        __listener = QueueListener(q, f_handler, f_handler2, c_h, respect_handler_level=True)
+        __listener.start()
+        atexit.register(_stop_listener)
+        # the listener thread does not survive forking, so forked worker processes need their own
+        os.register_at_fork(after_in_child=_restart_listener)
+        return __handler
+
+
+def _stop_listener() -> None:
+    if __listener is not None:
+        __listener.stop()
+
+
+def _restart_listener() -> None:
+    global __listener
+    if __listener is not None:
+        __listener = QueueListener(__listener.queue, *__listener.handlers, respect_handler_level=True)
+        __listener.start()
+
+
 def get_logger(name: str) -> logging.Logger:
-    """returns a pre-configured logger"""
+    """returns a pre-configured logger
+
+    Loggers are fetched by name, so calling this several times with the same name returns the same logger.
+    The logging handlers are only set up once per process.
+    """
     log = logging.getLogger(name)
 
     global __last
@@ -90,27 +179,10 @@ def get_logger(name: str) -> logging.Logger:
     else:
         log.setLevel(logging.WARNING)
 
-    log_format = logging.Formatter('%(asctime)s [ %(name)s ] - %(levelname)s:   %(message)s')
-
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-
-    f_handler = logging.FileHandler('logs/warnings.log', mode='a', encoding='utf-8')
-    f_handler.setLevel(logging.WARNING)
-    f_handler.setFormatter(log_format)
-    log.addHandler(f_handler)
-
-    f_handler2 = logging.FileHandler('logs/log.log', mode='a', encoding='utf-8')
-    f_handler2.setLevel(logging.DEBUG)
-    f_handler2.setFormatter(log_format)
-    log.addHandler(f_handler2)
-
-    c_h = logging.StreamHandler(sys.stdout)
-    c_h.setLevel(logging.INFO)
-    c_h.setFormatter(log_format)
-    log.addHandler(c_h)
-
-    __logs.append(log)
+    handler = _get_handler()
+    if handler not in log.handlers:
+        log.addHandler(handler)
+        __logs.append(log)
 
     return log
 
@@ -135,84 +207,9 @@ def set_log_level(debug: bool = False, verbose: bool = True) -> None:
     else:
         level = logging.WARNING
 
-    __log.debug(f"Set log level to: {level}")
+    __log.debug("Set log level to: %s", level)
     for l in __logs:
         l.setLevel(level)
 
 
 __log = get_logger(__name__)
-
-
-# Util functions for interface
-# ----------------------------
-
-# LATER: maybe have a separate module for plotting stuff/reports
-
-def date_plotting(df: pd.DataFrame) -> Figure:
-    ''' Plots the data of a given set of MSs. Used with MS metadata results. Returns scatterplot.
-    Args:
-        inDF(dataFrame, required): pandas DataFrame
-    Returns:
-        scatterplot data for plotly to be drawn with corresponding function
-    '''
-    df = df[df['terminus_ante_quem'] != 0]
-    df = df[df['terminus_post_quem'] != 0]
-    fig = px.scatter(df, x='terminus_post_quem', y='terminus_ante_quem', color='shelfmark')
-    first = df['terminus_post_quem'].min()-20
-    last = df['terminus_ante_quem'].max()+20
-    fig.add_shape(type='line', x0=first, y0=first, x1=last, y1=last, line=dict(color='rgba(50,50,50,0.8)'))
-    fig.update_layout(
-        title="Manuscript Dating Plot",
-        xaxis_title="Terminus Post Quem",
-        yaxis_title="Terminus Ante Quem",
-        legend_title="Manuscripts"
-    )
-    return fig
-
-
-def dimensions_plotting(df: pd.DataFrame) -> Optional[Figure]:
-    df["width"] = pd.to_numeric(df["width"], errors='coerce')
-    df["height"] = pd.to_numeric(df["height"], errors='coerce')
-    df = df[df['height'] != 0]
-    df = df[df['width'] != 0]
-    df = df[df['date_mean'] != 0]
-    if df.empty:
-        return None
-    fig = px.scatter(
-        df,
-        x='width',
-        y='height',
-        color=df['support'],
-        hover_name=df['shelfmark']
-    )
-    return fig
-
-
-def dimensions_plotting_facet(df: pd.DataFrame) -> Optional[Figure]:
-    df = df[['width', 'height', 'date_mean', 'support', 'shelfmark']]
-    df["width"] = pd.to_numeric(df["width"], errors='coerce')
-    df["height"] = pd.to_numeric(df["height"], errors='coerce')
-    df = df.dropna()
-    df = df[df['height'] != 0]
-    df = df[df['width'] != 0]
-    df = df[df['date_mean'] != 0]
-    if df.empty:
-        return None
-    df['century'] = df['date_mean'].div(100).round()
-    df = df.sort_values('width')
-    model = sm.OLS(df["height"], sm.add_constant(df["width"])).fit()
-    trace = go.Scatter(x=df["width"], y=model.predict(), line_color="gray", name="overall OLS")
-    trace.update(legendgroup="trendline", showlegend=False)
-    df = df.sort_values('century')
-    fig = px.scatter(
-        df,
-        x='width',
-        y='height',
-        color=df['support'],
-        hover_name=df['shelfmark'],
-        facet_col=df['century'],
-        facet_col_wrap=3
-    )
-    fig.add_trace(trace, row="all", col="all", exclude_empty_subplots=True)
-    fig.update_traces(selector=-1, showlegend=True)
-    return fig
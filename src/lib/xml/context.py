@@ -0,0 +1,85 @@
+"""
+Parsing context for the handrit.is XML files.
+
+Holds a reusable XML parser and the XPath expressions of all extractors in `lib.xml.tamer` and `lib.xml.metadata`,
+compiled once instead of on every lookup.
+Parsers must not be used by several threads at once, so each worker gets its own context through `get_context()`.
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from lxml import etree
+
+TEI = "http://www.tei-c.org/ns/1.0"
+XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+_NAMESPACES = {"tei": TEI}
+
+
+def _xpath(path: str) -> etree.XPath:
+    return etree.XPath(path, namespaces=_NAMESPACES, smart_strings=False)
+
+
+def first(xpath: etree.XPath, node: etree._Element) -> Any:
+    """Evaluates `xpath` on `node` and returns the first result, like `node.find()` does, or None."""
+    res = xpath(node)
+    return res[0] if res else None
+
+
+class ParsingContext:
+    """A configured parser and the precompiled XPath expressions of the extractors.
+
+    The parser never fetches anything from the network. Otherwise, it has the default settings,
+    so that the extractors see the same documents as with `etree.parse()`.
+    Paths starting with `(...)[1]` only select the first match in document order, like `find()`.
+    """
+
+    def __init__(self) -> None:
+        self.parser = etree.XMLParser(no_network=True)
+        # tamer
+        self.ms_desc = _xpath("(.//tei:msDesc)[1]")
+        self.shelfmark = _xpath("(.//tei:msDesc/tei:msIdentifier/tei:idno)[1]")
+        self.head = _xpath("(.//tei:head)[1]")
+        self.summary = _xpath("(.//tei:summary)[1]")
+        self.title = _xpath("tei:title[1]")
+        self.name_keys = _xpath(".//tei:name/@key")
+        self.text_titles = _xpath(".//tei:msItem/tei:title[1]")
+        self.person = _xpath(".//tei:person")
+        self.pers_name = _xpath("tei:persName[1]")
+        self.forename = _xpath("tei:forename")
+        self.surname = _xpath("tei:surname")
+        # metadata
+        self.orig_place = _xpath("(.//tei:origPlace)[1]")
+        self.hand_names = _xpath(".//tei:handDesc//tei:name")
+        self.support_desc = _xpath("(.//tei:supportDesc)[1]")
+        self.extent = _xpath("(.//tei:extent)[1]")
+        self.dimensions = _xpath("tei:dimensions[1]")
+        self.height = _xpath("tei:height[1]")
+        self.width = _xpath("tei:width[1]")
+        self.orig_date = _xpath("(.//tei:origDate)[1]")
+        self.ms_identifier = _xpath("(tei:teiHeader/tei:fileDesc/tei:sourceDesc/tei:msDesc/tei:msIdentifier)[1]")
+        self.country = _xpath("tei:country[1]")
+        self.settlement = _xpath("tei:settlement[1]")
+        self.repository = _xpath("tei:repository[1]")
+
+    def parse(self, path: Union[str, Path]) -> etree._Element:
+        """Parses the XML file at `path` and returns its root element.
+
+        Raises:
+            etree.XMLSyntaxError: if the file is not well-formed XML
+            OSError: if the file cannot be read
+        """
+        return etree.parse(str(path), self.parser).getroot()
+
+
+_local = threading.local()
+
+
+def get_context() -> ParsingContext:
+    """Returns the parsing context of the current thread, creating it on first use."""
+    ctx: Optional[ParsingContext] = getattr(_local, "context", None)
+    if ctx is None:
+        ctx = ParsingContext()
+        _local.context = ctx
+    return ctx
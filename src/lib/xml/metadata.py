@@ -1,15 +1,14 @@
-import copy
 import re
 import statistics
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from lxml import etree
 
 import lib.xml.tamer as tamer
-from lib import utils
+from lib import profiling, utils
+from lib.xml.context import first, get_context
 
 log = utils.get_logger(__name__)
-nsmap = {None: "http://www.tei-c.org/ns/1.0", 'xml': 'http://www.w3.org/XML/1998/namespace'}
 
 
 # Utlity Functions
@@ -25,16 +24,8 @@ def _get_digits(text: str) -> int:
     Returns:
         int: digits from text
     """
-    s = ""
-    for x in text:
-        if x.isdigit():
-            s += x
-    if s:
-        i = int(s)
-    else:
-        i = 0
-
-    return i
+    s = "".join(filter(str.isdigit, text))
+    return int(s) if s else 0
 
 
 # Pull meta data
@@ -68,11 +59,12 @@ def _get_key(leek: etree._Element) -> Optional[str]:
     elif key == "ka":
         pretty_key = "Canada"
     else:
-        log.warning(f"unknown country key: {key}. (Fix function get_key)")
+        log.warning("unknown country key: %s. (Fix function get_key)", key)
         return None
     return pretty_key
 
 
+@profiling.profiled
 def get_origin(root: etree._Element) -> str:
     """Get manuscript's place of origin.
 
@@ -83,7 +75,7 @@ def get_origin(root: etree._Element) -> str:
         str: country name
     """
     # TODO-BL: tidy up
-    origPlace = root.find(".//origPlace", root.nsmap)
+    origPlace = first(get_context().orig_place, root)
     if origPlace is None:
         return "Origin unknown"
     try:
@@ -100,6 +92,7 @@ def get_origin(root: etree._Element) -> str:
     return pretty_origPlace
 
 
+@profiling.profiled
 def get_creators(root: etree._Element) -> str:  # TODO: Implement a method that works with foreign keys
     """Get creator(s). Function for new SQLite backend.
 
@@ -109,25 +102,17 @@ def get_creators(root: etree._Element) -> str:  # TODO: Implement a method that
         str: creator name(s)
     """
     # TODO-BL: make strict division between SQLite and XML
-    hands = root.findall(".//handDesc", root.nsmap)
     pplIDs: List[str] = []
 
-    if hands is not None:
-        try:
-            for hand in hands:
-                potentials = hand.findall(".//name", root.nsmap)
-                for p in potentials:
-                    scribe = p.text
-                    if scribe is not None:
-                        scribe = "".join(scribe.splitlines())
-                        scribe = " ".join(scribe.split())
-                        if scribe is not None:  # Somehow, a few None values made their way into the final db...? /SK
-                            pplIDs.append(scribe)
-        except Exception:
-            # LATER: find out why, if that happens
-            fKey = "NULL"
-            pplIDs.append(fKey)
-    else:
+    try:
+        for p in get_context().hand_names(root):
+            scribe = p.text
+            if scribe is not None:
+                scribe = "".join(scribe.splitlines())
+                scribe = " ".join(scribe.split())
+                if scribe is not None:  # Somehow, a few None values made their way into the final db...? /SK
+                    pplIDs.append(scribe)
+    except Exception:
         # LATER: find out why, if that happens
         fKey = "NULL"
         pplIDs.append(fKey)
@@ -138,6 +123,7 @@ def get_creators(root: etree._Element) -> str:  # TODO: Implement a method that
     return res
 
 
+@profiling.profiled
 def get_support(root: etree._Element) -> str:
     """Get supporting material (paper or parchment).
 
@@ -147,7 +133,7 @@ def get_support(root: etree._Element) -> str:
     Returns:
         str: supporting material
     """
-    supportDesc = root.find('.//supportDesc', root.nsmap)
+    supportDesc = first(get_context().support_desc, root)
     if supportDesc is not None:
         support = supportDesc.attrib['material']
         if support == "chart":
@@ -166,106 +152,95 @@ def get_support(root: etree._Element) -> str:
     return pretty_support
 
 
-def get_folio(root: etree._Element) -> int:
-    # TODO: Update docstring! /SK
-    """Returns: total of folios.
-
-    Find <extent> and make copy.
-    Get rid of info that might bias number of folio:
-        Find <dimensions> and destroy all its tags from <extent>.
-        Find <locus> and destroy all its tags from <extent>.
-    Get cleaned text from remaining info in <extent>: folio number.
-    Try:
-        - If total of folio given, take it.
-        - If not, get rid of pages refering to empty pages
-        and of further unnecessary info about the manuscript in brackets, possibly containing digits.
-        - Check whether calculated number of folio is reasonable (< 1.000) - add [?] if not -
-        or whether it is 0 - write n/a.
-    Except:
-        - return: n/a
+_BRACKETS = re.compile(r"\([^()]*\)")
+"""Innermost brackets, which hold further information on parts of the manuscript, possibly containing digits."""
 
-    Args:
-        root (etree._Element): etree XML element object
-
-    Returns:
-        int: total of folios
-    """
-    # TODO: look into this method... can this be streamlined? it also picks up lots of errors...
-    extent: etree._Element = root.find('.//extent', root.nsmap)
-
-    if extent is None:
-        return 0
-    extent_copy = copy.copy(extent)
+_NUMBER_NOISE = str.maketrans("", "", ". ")
+"""Characters that may appear in a plain number of folios, e.g. `"iv. 120"`."""
 
-    dimensions = extent_copy.findall('dimensions', root.nsmap)
 
-    while dimensions:
-        for d in dimensions:
-            extent_copy.remove(d)
-        dimensions = extent_copy.find('dimensions', root.nsmap)
+def _folio_number(text: str) -> Optional[int]:
+    """The extent is a plain number."""
+    number = text.translate(_NUMBER_NOISE)
+    return int(number) if number.isdigit() else None
 
-    locus = extent_copy.find('locus', root.nsmap)
 
-    while locus:
-        extent_copy.remove(locus)
-        locus = extent_copy.find('locus', root.nsmap)
+def _folio_total(text: str) -> Optional[int]:
+    """The extent gives the total number of leaves, e.g. `"120 blöð alls"`."""
+    given_total = text.find("blöð alls")
+    return int(text[:given_total]) if given_total > 0 else None
 
-    clean_extent_copy: str = extent_copy.text
 
-    try:
-        copy_no_period = clean_extent_copy.replace('.', '')
-        copy_no_space = copy_no_period.replace(' ', '')
+def _folio_sum(text: str) -> Optional[int]:
+    """Sums up the numbers outside of brackets, before the description of empty leaves.
 
-        perfect_copy = copy_no_space.isdigit()
+    If there is no such description, the last character is cut off.
+    """
+    given_emptiness = text.find("Auð blöð")
+    if given_emptiness != 0:
+        text = text[:given_emptiness]
+    return sum(_get_digits(part) for part in _BRACKETS.sub("()", text).split("()"))
 
-        if perfect_copy == True:
-            folio_total = int(copy_no_space)
-        else:
-            folio_total = 0
-            '''Is a total of folio given:'''
-            given_total: int = clean_extent_copy.find("blöð alls")
 
-            if given_total > 0:
-                clean_extent_copy = clean_extent_copy[:given_total]
-                folio_total = int(clean_extent_copy)
-            else:  # I have no idea what this does
-                '''No total is given. First Get rid of other unnecessary info:'''
-                given_emptiness = clean_extent_copy.find("Auð blöð")
-                if given_emptiness:
-                    clean_extent_copy = clean_extent_copy[:given_emptiness]
+_FOLIO_RULES: list[tuple[Callable[[str], Optional[int]], bool]] = [
+    (_folio_number, False),
+    (_folio_total, True),
+    (_folio_sum, True),
+]
+"""Rules to get the number of folios from the text of <extent>, tried in order until one applies,
+and whether the result must be checked for plausibility."""
 
-                clean_extent_copy = re.sub(r"\([^()]*\)", "()", clean_extent_copy)
 
-                brackets = clean_extent_copy.find("()")
+def parse_folio(text: Optional[str]) -> tuple[int, bool]:
+    """Gets the number of folios from the text of <extent>.
 
-                if brackets == -1:
-                    folio_total = _get_digits(clean_extent_copy)
+    Returns:
+        tuple[int, bool]: the number of folios, which is 0 if none could be found,
+        and whether it was plausible (i.e. it has no more than three digits, and the text could be parsed).
+    """
+    if text is None:
+        return 0, False
+    try:
+        for rule, check in _FOLIO_RULES:
+            res = rule(text)
+            if res is not None:
+                if check and len(str(res)) > 3:
+                    return 0, False
+                return res, True
+    except ValueError:
+        pass
+    return 0, False
+
+
+@profiling.profiled
+def get_folio(root: etree._Element, ms_id: Optional[str] = None) -> int:
+    """Returns: total of folios.
 
-                else:
-                    while brackets != -1:
-                        first_bit: str = clean_extent_copy[:brackets]
-                        clean_extent_copy = clean_extent_copy[brackets+2:]
-                        brackets = clean_extent_copy.find("()")
-                        folio_n = _get_digits(first_bit)
-                        if folio_n:
-                            folio_total = folio_total+folio_n
-
-                    folio_z = _get_digits(clean_extent_copy)
-                    if folio_z:
-                        folio_total = folio_total+folio_z
-
-            folio_check: str = str(folio_total)
-            if len(folio_check) > 3:
-                name: str = tamer._find_full_id(root)
-                log.warning(f"{name}: Attention. Check number of folios: {len(folio_check)} ({folio_check}) from: {extent_copy.text}")
-                if extent_copy.items():
-                    log.error(f"Note: extent had attributes: {extent_copy.items()}")
-                folio_total = 0
+    Only the text of <extent> before its first child element is considered,
+    so that <dimensions> and <locus> do not bias the number of folios.
+    The rules of `_FOLIO_RULES` are tried on it in order:
+        - If the text is a number, take it.
+        - If a total of folios is given, take it.
+        - If not, get rid of the description of empty leaves
+          and of further unnecessary info about the manuscript in brackets, possibly containing digits,
+          then sum up the remaining numbers.
+    If the number of folios has more than three digits or cannot be parsed, a warning is logged, and 0 is returned.
 
-    except Exception:
-        folio_total = 0
-        log.warning(f"{folio_total}: Attention. Check number of folios.")
+    Args:
+        root (etree._Element): etree XML element object
+        ms_id (str, optional): the ID of the manuscript, for warnings. Looked up in `root` if not given.
 
+    Returns:
+        int: total of folios
+    """
+    extent = first(get_context().extent, root)
+    if extent is None:
+        return 0
+    folio_total, plausible = parse_folio(extent.text)
+    if not plausible:
+        log.warning("%s: Attention. Check number of folios from: %s", ms_id or tamer._find_full_id(root), extent.text)
+        if extent.items():
+            log.error("Note: extent had attributes: %s", extent.items())
     return folio_total
 
 
@@ -341,6 +316,7 @@ def get_folio(root: etree._Element) -> int:
 #     return pretty_length
 
 
+@profiling.profiled
 def get_extent(root: etree._Element) -> tuple[int, int, str]:  # TODO-BL: tidy up
     """Get extent of manuscript. For qualitative usage.
         NB! The 'extent' is the measurements of the leaves!
@@ -351,17 +327,18 @@ def get_extent(root: etree._Element) -> tuple[int, int, str]:  # TODO-BL: tidy u
     Returns:
         str: qualitative description of manuscript's extent
     """
-    extent = root.find('.//extent', root.nsmap)
+    ctx = get_context()
+    extent = first(ctx.extent, root)
     if extent is None:
         return 0, 0, "no dimensions given"
 
-    dimensions = extent.find('dimensions', root.nsmap)
+    dimensions = first(ctx.dimensions, extent)
     if dimensions is None:
         log.debug("failed building manuscript extent description")
         return 0, 0, "N/A"
     try:
-        height = dimensions.find("height", root.nsmap)
-        width = dimensions.find("width", root.nsmap)
+        height = first(ctx.height, dimensions)
+        width = first(ctx.width, dimensions)
 
         height_measurements = 0
         if height is not None:
@@ -453,9 +430,10 @@ def get_description(root: etree._Element) -> tuple[str, str, str, str]:
 #     return pretty_country, pretty_settlement, pretty_institution, pretty_repository, pretty_collection, pretty_signature
 
 
+@profiling.profiled
 def get_date(root: etree._Element) -> Tuple[str, int, int, int, int]:
     # TODO: Redesign /SK
-    tag = root.find(".//origDate", root.nsmap)
+    tag = first(get_context().orig_date, root)
     date = ""
     ta = 0
     tp = 0
@@ -511,18 +489,20 @@ def get_date(root: etree._Element) -> Tuple[str, int, int, int, int]:
     return date, tp, ta, meandate, yearrange
 
 
+@profiling.profiled
 def get_ms_origin(root: etree._Element) -> Tuple[str, str, str]:
-    ms_id = root.find(".teiHeader/fileDesc/sourceDesc/msDesc/msIdentifier", nsmap)
+    ctx = get_context()
+    ms_id = first(ctx.ms_identifier, root)
 
     if ms_id is None:
         return "", "", ""
     else:
-        co = ms_id.find("country", nsmap)
+        co = first(ctx.country, ms_id)
         try:
             country = co.text
         except Exception:
             country = ""
-        se = ms_id.find("settlement", nsmap)
+        se = first(ctx.settlement, ms_id)
         # settlement = se.text if se else ""
         # This should be working. This should result in settlement = se.text. But it doesnt. It ALWAYS fucking results in settlement = ""
         # WHY? /SK
@@ -531,7 +511,7 @@ def get_ms_origin(root: etree._Element) -> Tuple[str, str, str]:
             settlement = se.text
         except Exception:
             settlement = ""
-        re = ms_id.find("repository", nsmap)
+        re = first(ctx.repository, ms_id)
         try:
             repository = re.text
         except Exception:
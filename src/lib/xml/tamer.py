@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from typing import Iterable, Iterator, Optional
 
@@ -5,32 +6,33 @@ from lxml import etree
 
 import lib.utils as utils
 import lib.xml.metadata as metadata
+from lib import profiling
 from lib.constants import PERSON_DATA_PATH
 from lib.manuscripts import CatalogueEntry
 from lib.people import Person
+from lib.xml.context import XML_ID, first, get_context
 
 log = utils.get_logger(__name__)
-nsmap = {None: "http://www.tei-c.org/ns/1.0", 'xml': 'http://www.w3.org/XML/1998/namespace'}
 
 
+@profiling.profiled
 def _load_xml_contents(path: Path) -> Optional[etree._Element]:
     try:
-        log.info(f"Loading XML file: {path}")
-        tree: etree._ElementTree = etree.parse(path, None)
-        root: etree._Element = tree.getroot()
-        return root
+        log.info("Loading XML file: %s", path)
+        return get_context().parse(path)
     except etree.XMLSyntaxError:
         if path.is_relative_to('data/handrit'):  # it's a real file not a test file
-            log.exception(f"{path}: Broken XML!")
+            log.exception("%s: Broken XML!", path)
         return None
     except OSError:
         if path.is_relative_to('data/handrit'):  # it's a real file not a test file
-            log.exception(f"{path}: Non existent XML!")
+            log.exception("%s: Non existent XML!", path)
         return None
 
 
+@profiling.profiled
 def _parse_xml_content(root: etree._Element, filename: str) -> CatalogueEntry:
-    log.info(f"Parsing metadata: {filename}")
+    log.info("Parsing metadata: %s", filename)
     shelfmark = _get_shelfmark(root)
     full_id = _find_full_id(root)
     ms_nickname = _get_shorttitle(root, full_id)
@@ -38,7 +40,7 @@ def _parse_xml_content(root: etree._Element, filename: str) -> CatalogueEntry:
     origin = metadata.get_origin(root)
     date, tp, ta, meandate, yearrange = metadata.get_date(root)
     support = metadata.get_support(root)
-    folio = metadata.get_folio(root)
+    folio = metadata.get_folio(root, full_id)
     height, width, extent, description = metadata.get_description(root)
     handrit_id = _find_id(root)
     creator = metadata.get_creators(root)
@@ -48,7 +50,7 @@ def _parse_xml_content(root: etree._Element, filename: str) -> CatalogueEntry:
     ppl = _get_ppl_from_ms(root)
     if ppl == []:
         log.warn(f"{full_id} doesn't have any people living in it. Check!")
-    log.debug(f"Sucessfully processed {shelfmark}/{full_id}")
+    log.debug("Sucessfully processed %s/%s", shelfmark, full_id)
     return CatalogueEntry(
         catalogue_id=full_id,
         shelfmark=shelfmark,
@@ -76,59 +78,42 @@ def _parse_xml_content(root: etree._Element, filename: str) -> CatalogueEntry:
     )
 
 
+@profiling.profiled
 def _get_ppl_from_ms(root: etree._Element) -> list[str]:
     """gets a list of person IDs, given an XML document"""
-    ppl_raw = root.findall(".//name", nsmap)
-    if ppl_raw is None:
-        return []
-    ppl: list[str] = [person.get('key') for person in ppl_raw if person.get('key') is not None]
-    log.debug(f"Loaded people from xml: {len(ppl)}")
+    ppl: list[str] = get_context().name_keys(root)
+    log.debug("Loaded people from xml: %s", len(ppl))
     return list(set(ppl))
 
 
+@profiling.profiled
 def _get_txt_list_from_ms(root: etree._Element) -> list[str]:
-    txts_raw = root.findall(".//msItem", nsmap)
-    if txts_raw is None:
-        return []
     txts: list[str] = []
-    for txt in txts_raw:
-        # lvl = txt.get('n')
-        # print(lvl)
-        # if lvl is None:
-        title_raw = txt.find("title", nsmap)
-        # rubric_raw = txt.find("rubric", nsmap)
-        # print(lvl)
-        # print(title_raw.text if title_raw is not None else "null")
-        # print(rubric_raw)
-        if title_raw is not None:
-            title: str = title_raw.text
-            if title is not None:
-                if "\n" in title:
-                    title = "".join(title.splitlines())
-                title = " ".join(title.split())  # There are excessive spaces in the XML. This gets rid of them /SK
-                txts.append(title)
-        # elif rubric_raw is not None:
-        #     rubric: str = rubric_raw.text
-        #     if rubric is not None:
-        #         if "\n" in rubric:
-        #             rubric = "".join(rubric.splitlines())
-        #         rubric = " ".join(rubric.split())
-        #         txts.append(rubric)
+    # the first title of each msItem
+    for title_raw in get_context().text_titles(root):
+        title: str = title_raw.text
+        if title is not None:
+            if "\n" in title:
+                title = "".join(title.splitlines())
+            title = " ".join(title.split())  # There are excessive spaces in the XML. This gets rid of them /SK
+            txts.append(title)
     return list(set(txts))
 
 
+@profiling.profiled
 def _get_shorttitle(root: etree._Element, ms_id: str) -> str:
-    head = root.find(".//head", root.nsmap)
-    summary = root.find(".//summary", root.nsmap)
+    ctx = get_context()
+    head = first(ctx.head, root)
+    summary = first(ctx.summary, root)
     if head is None and summary is None:
         log.warn(f"{ms_id} has no nickname or it is stored in a weird way")
         return "N/A"
     if head is not None:
-        title_raw = head.find("title", root.nsmap)
+        title_raw = first(ctx.title, head)
     else:
-        title_raw = summary.find("title", root.nsmap)
+        title_raw = first(ctx.title, summary)
     if title_raw is None:
-        log.debug(f"No title present in manuscript: {ms_id}")
+        log.debug("No title present in manuscript: %s", ms_id)
         return "N/A"
     title = title_raw.text
     if not title:
@@ -145,10 +130,14 @@ def _get_shorttitle(root: etree._Element, ms_id: str) -> str:
 
 def _get_all_data_from_files(files: Iterable[Path]) -> Iterator[CatalogueEntry]:
     for f in files:
+        start = time.perf_counter()
         ele = _load_xml_contents(f)
         filename = f.name
         if ele is not None:
             yield _parse_xml_content(ele, filename)
+        profiler = profiling.get_profiler()
+        if profiler:
+            profiler.add_file(filename, time.perf_counter() - start)
 
 
 def get_metadata_from_files(files: Iterable[Path]) -> list[CatalogueEntry]:
@@ -156,31 +145,32 @@ def get_metadata_from_files(files: Iterable[Path]) -> list[CatalogueEntry]:
     return list(data)
 
 
+@profiling.profiled
 def _get_shelfmark(root: etree._Element) -> str:
     try:
-        idno = root.find('.//msDesc/msIdentifier/idno', root.nsmap)
+        idno = first(get_context().shelfmark, root)
         if idno is not None:
             return str(idno.text)
         else:
             return ""
     except Exception:
-        log.exception(f"Faild to load Shelfmark XML: {root}")
+        log.exception("Faild to load Shelfmark XML: %s", root)
         return ""
 
 
+@profiling.profiled
 def get_ppl_names() -> list[Person]:
     """Delivers the names found in the handrit names authority file.
     Returns list of Person value objects.
     """
     res: list[Person] = []
-    tree = etree.parse(PERSON_DATA_PATH, None)
-    root = tree.getroot()
-    ppl = root.findall(".//person", nsmap)
-    for pers in ppl:
-        id_ = pers.get('{http://www.w3.org/XML/1998/namespace}id')
-        name_tag = pers.find('persName', nsmap)
-        firstNameS = name_tag.findall('forename', nsmap)
-        lastNameS = name_tag.findall('surname', nsmap)
+    ctx = get_context()
+    root = ctx.parse(PERSON_DATA_PATH)
+    for pers in ctx.person(root):
+        id_ = pers.get(XML_ID)
+        name_tag = first(ctx.pers_name, pers)
+        firstNameS = ctx.forename(name_tag)
+        lastNameS = ctx.surname(name_tag)
         firstNameClean = [name.text for name in firstNameS if name.text]
         if firstNameClean:
             firstName = " ".join(firstNameClean)
@@ -202,10 +192,11 @@ def _find_id(root: etree._Element) -> str:
     return str(id_)
 
 
+@profiling.profiled
 def _find_full_id(root: etree._Element) -> str:
-    id_raw = root.find('.//msDesc', root.nsmap)
+    id_raw = first(get_context().ms_desc, root)
     try:
-        id_ = id_raw.attrib['{http://www.w3.org/XML/1998/namespace}id']
+        id_ = id_raw.attrib[XML_ID]
     except Exception:
         id_ = 'ID-ERR-01'
         log.exception("Some soups are to salty. An unkown error occured.")
@@ -1,5 +1,8 @@
 import subprocess
+from typing import Optional
 
+from lib.constants import DUCKDB_DATABASE_PATH, PARQUET_EXPORT_PATH
+from lib.profiling import BuildProfiler
 from lib.utils import get_logger
 from ops.db_init import db_init
 
@@ -18,11 +21,15 @@ def update() -> None:
     log.info("Updated data from handrit")
 
 
-def build() -> None:
-    db_init()
+def build(profiler: Optional[BuildProfiler] = None, duckdb: bool = False, parquet: bool = False) -> None:
+    db_init(
+        profiler=profiler,
+        duckdb_path=DUCKDB_DATABASE_PATH if duckdb else None,
+        parquet_path=PARQUET_EXPORT_PATH if parquet else None,
+    )
 
 
-def update_and_build() -> None:
+def update_and_build(profiler: Optional[BuildProfiler] = None, duckdb: bool = False, parquet: bool = False) -> None:
     initialize()
     update()
-    db_init()
+    build(profiler, duckdb, parquet)
@@ -2,34 +2,78 @@ import dataclasses
 import uuid
 from logging import Logger
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence
 
-from lib import utils
-from lib.constants import DATABASE_PATH, XML_BASE_PATH
-from lib.database import deduplicate
+from lib import corpus_statistics, profiling, utils
+from lib.constants import (BUILD_PROFILE_PATH, DATABASE_PATH,
+                           DUCKDB_DATABASE_PATH, LOOKUP_SNAPSHOT_PATH,
+                           XML_BASE_PATH)
+from lib.database import deduplicate, parquet, snapshot
 from lib.database.database import Database
 from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
                                                       get_engine)
 from lib.xml import tamer
 
+if TYPE_CHECKING:
+    from lib.database.duckdb.database_duckdb_impl import DatabaseDuckDBImpl
+
 log: Logger = utils.get_logger(__name__)
 
 
-def db_init(db_path: str = DATABASE_PATH, files_base_path: str = XML_BASE_PATH) -> None:
-    """Initialize and populate the database, provided the DB path and the base path where the XML files are located"""
+def db_init(
+    db_path: str = DATABASE_PATH,
+    files_base_path: str = XML_BASE_PATH,
+    snapshot_path: str = LOOKUP_SNAPSHOT_PATH,
+    profiler: Optional[profiling.BuildProfiler] = None,
+    profile_path: str = BUILD_PROFILE_PATH,
+    duckdb_path: Optional[str] = None,
+    parquet_path: Optional[str] = None,
+) -> None:
+    """Initialize and populate the database, provided the DB path and the base path where the XML files are located.
+
+    Afterwards, the lookup snapshot for the new database is written to `snapshot_path`.
+
+    If `duckdb_path` is given, a DuckDB database is built there as well, from the same data.
+    If `parquet_path` is given, the tables of the new database are exported to a Parquet dataset there.
+
+    If a profiler is given, the build is profiled: the report is written to `profile_path`,
+    and a summary is logged at the end.
+    """
+    if profiler is None:
+        _db_init(db_path, files_base_path, snapshot_path, duckdb_path, parquet_path)
+        return
+    with profiling.active(profiler):
+        _db_init(db_path, files_base_path, snapshot_path, duckdb_path, parquet_path)
+    profiler.write_report(profile_path)
+    log.info("Build profile written to %s", profile_path)
+    for line in profiler.summary().splitlines():
+        log.info("%s", line)
+
+
+def _db_init(db_path: str, files_base_path: str, snapshot_path: str, duckdb_path: Optional[str],
+             parquet_path: Optional[str]) -> None:
     log.warning("DB Init started...")
-    log.info(f"db: {db_path}, file base path: {files_base_path}")
+    log.info("db: %s, file base path: %s", db_path, files_base_path)
     files = Path(files_base_path).rglob('*.xml')
-    db = make_sqlite_db()
-    populate_db(db, files)
+    with profiling.stage("setup"):
+        db = make_sqlite_db(db_path)
+        others = [make_duckdb_db(duckdb_path)] if duckdb_path else []
+    populate_db(db, files, others)
+    with profiling.stage("snapshot"):
+        snapshot.write_snapshot(db, snapshot_path)
+    if parquet_path:
+        with profiling.stage("parquet"):
+            parquet.export_parquet(db, parquet_path)
+    for other in others:
+        other.close()
     log.warning("DB Init finished.")
 
 
-def make_sqlite_db(db_path: str = DATABASE_PATH) -> Database:
+def make_sqlite_db(db_path: str = DATABASE_PATH) -> DatabaseSQLiteImpl:
     """Remove the old DB file, create a new one and add all tables to it."""
-    log.info(f"Removing Database: {db_path}")
+    log.info("Removing Database: %s", db_path)
     Path(db_path).unlink(missing_ok=True)
-    log.info(f"Creating Database: {db_path}")
+    log.info("Creating Database: %s", db_path)
     engine = get_engine(db_path)
     db = DatabaseSQLiteImpl(engine)
     log.info("Setting up Database")
@@ -38,12 +82,32 @@ def make_sqlite_db(db_path: str = DATABASE_PATH) -> Database:
     return db
 
 
-def populate_db(db: Database, files: Iterable[Path]) -> None:
-    """Extract all data from the XML files and add it to the database."""
-    ppl = tamer.get_ppl_names()
-    log.info(f"Loaded people information: {len(ppl)}")
-    catalogue_entries = tamer.get_metadata_from_files(files)
-    log.info(f"Loaded catalogue entries: {len(catalogue_entries)}")
+def make_duckdb_db(db_path: str = DUCKDB_DATABASE_PATH) -> "DatabaseDuckDBImpl":
+    """Remove the old DuckDB file, create a new one and add all tables to it.
+
+    DuckDB is only imported here, as it is only needed when building with `--duckdb`.
+    """
+    from lib.database.duckdb.database_duckdb_impl import (DatabaseDuckDBImpl,
+                                                          get_connection)
+    log.info("Removing DuckDB Database: %s", db_path)
+    Path(db_path).unlink(missing_ok=True)
+    Path(f"{db_path}.wal").unlink(missing_ok=True)
+    db = DatabaseDuckDBImpl(get_connection(db_path))
+    db.setup_db()
+    log.info("DuckDB Database set up")
+    return db
+
+
+def populate_db(db: Database, files: Iterable[Path], others: Sequence[Database] = ()) -> None:
+    """Extract all data from the XML files and add it to the database, and to any `others` as well."""
+    with profiling.stage("people") as s:
+        ppl = tamer.get_ppl_names()
+        s.items = len(ppl)
+    log.info("Loaded people information: %s", len(ppl))
+    with profiling.stage("catalogue") as s:
+        catalogue_entries = tamer.get_metadata_from_files(files)
+        s.items = len(catalogue_entries)
+    log.info("Loaded catalogue entries: %s", len(catalogue_entries))
     catalogue_entries_unique = []
     ids_used = set()
     for e in catalogue_entries:
@@ -55,9 +119,29 @@ def populate_db(db: Database, files: Iterable[Path]) -> None:
             uid = str(uuid.uuid4())
             new_e = dataclasses.replace(e, catalogue_id=uid)
             catalogue_entries_unique.append(new_e)
-            log.warning(f"Duplicate Catalogue ID found: {cid} -> replaced by {uid}")
+            log.warning("Duplicate Catalogue ID found: %s -> replaced by %s", cid, uid)
     log.info("Ensured that catalogue IDs are unique")
-    manuscripts = deduplicate.get_unified_metadata(catalogue_entries_unique)
-    log.info(f"Deduplicated catalogue entries to manuscript metadata: {len(manuscripts)}")
-    db.add_data(ppl, catalogue_entries_unique, manuscripts)
+    with profiling.stage("unify") as s:
+        unification = deduplicate.unify(catalogue_entries_unique)
+        s.items = len(catalogue_entries_unique)
+    log.info("Deduplicated catalogue entries to manuscript metadata: %s", len(unification.manuscripts))
+    with profiling.stage("add_data") as s:
+        db.add_data(ppl, catalogue_entries_unique, unification.manuscripts)
+        s.items = len(ppl) + len(catalogue_entries_unique) + len(unification.manuscripts)
     log.info("Added all data to DB.")
+    with profiling.stage("add_unification_conflicts") as s:
+        db.add_unification_conflicts(unification.conflicts)
+        s.items = len(unification.conflicts)
+    with profiling.stage("corpus_statistics") as s:
+        statistics = corpus_statistics.compute(ppl, catalogue_entries_unique, unification.manuscripts)
+        db.add_corpus_statistics(statistics)
+        s.items = len(unification.manuscripts)
+    log.info("Computed corpus statistics: %s", len(statistics))
+    for other in others:
+        with profiling.stage(f"add_data_{type(other).__name__}") as s:
+            other.add_data(ppl, catalogue_entries_unique, unification.manuscripts)
+            other.add_unification_conflicts(unification.conflicts)
+            other.add_corpus_statistics(statistics)
+            s.items = len(ppl) + len(catalogue_entries_unique) + len(unification.manuscripts)
+        log.info("Added all data to %s.", type(other).__name__)
+    log.info("Stored values that could not be unified: %s", len(unification.conflicts))
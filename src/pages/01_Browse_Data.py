@@ -1,29 +1,91 @@
 import streamlit as st
 
 from gui_utils import get_handler
-
+from lib.browse import PAGE_SIZE, BrowseEntity
+from lib.corpus_statistics import CorpusStatistic
 
 handler = get_handler()
-st.title("Currently Loaded Dataset")
 
-# Manuscripts
-mss = handler.manuscripts
-st.header("Manuscripts")
-st.write(f"We have {len(mss)} mss")
+PAGE_SIZES = [25, PAGE_SIZE, 100, 250]
+
+SORT_LABELS = {
+    "manuscript_id": "ID",
+    "shelfmark": "Shelfmark",
+    "date_mean": "Date",
+    "texts": "Number of texts",
+    "people": "Number of people",
+    "text_id": "Title",
+    "pers_id": "ID",
+    "first_name": "First name",
+    "last_name": "Last name",
+    "manuscripts": "Number of manuscripts",
+}
+
+
+def browse(entity: BrowseEntity, what: str, placeholder: str) -> None:
+    """Shows one page of the listing of an entity, with the controls to filter, sort and page through it."""
+    key = entity.value
+    col_search, col_sort, col_order = st.columns([3, 2, 1])
+    search = col_search.text_input(f"Filter {what}", placeholder=placeholder, key=f"browse_{key}_search")
+    sort_by = col_sort.selectbox("Sort by", entity.sort_keys, format_func=SORT_LABELS.__getitem__, key=f"browse_{key}_sort")
+    descending = col_order.checkbox("Descending", key=f"browse_{key}_desc")
+    col_page, col_size = st.columns([3, 1])
+    page_size = col_size.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"browse_{key}_size") or PAGE_SIZE
+    page_no = col_page.number_input("Page", min_value=1, value=1, step=1, key=f"browse_{key}_page")
+    page = handler.browse(entity, search, sort_by, descending, int(page_no), page_size)
+    pages = page.pages(page_size)
+    if page.total == 0:
+        st.write(f"No {what} found.")
+        return
+    if page_no > pages:
+        st.warning(f"There are only {pages} pages.")
+        return
+    st.write(f"{page.total} {what}, showing {page.offset + 1} to {page.offset + len(page.rows)} (page {page_no} of {pages})")
+    st.dataframe(page.rows, use_container_width=True)
+
+
+def corpus_statistics() -> None:
+    """Shows the statistics of the corpus, as computed when the database was built."""
+    statistics = handler.corpus_statistics
+    totals = statistics[CorpusStatistic.Totals]
+    if totals.empty:
+        st.write("No statistics available. They are computed when the database is built.")
+        return
+    for col, (label, value) in zip(st.columns(len(totals)), totals.itertuples(index=False)):
+        col.metric(label, value)
+    centuries = statistics[CorpusStatistic.Centuries]
+    st.subheader(CorpusStatistic.Centuries.title)
+    st.bar_chart(centuries.set_index(centuries.columns[0]))
+    rankings = [CorpusStatistic.Countries, CorpusStatistic.Repositories, CorpusStatistic.Supports,
+                CorpusStatistic.Texts, CorpusStatistic.People]
+    for col, statistic in zip(st.columns(2) * len(rankings), rankings):
+        df = statistics[statistic]
+        col.subheader(statistic.title)
+        col.dataframe(df.set_index(df.columns[0]), use_container_width=True)
+
+
+st.title("Currently Loaded Dataset")
 st.write("Each manuscript can have entries in multiple languages (English, Icelandic, Danish)")
-with st.expander("Show all manuscripts"):
-    st.write(list(mss.keys()))
-
-# Texts
-txt = handler.texts
-st.header("Texts")
-st.write(f'Found {len(txt)} texts.')
-with st.expander("Show all texts"):
-    st.write(txt)
-
-# Persons
-pers = handler.person_names
-st.header("Persons")
-st.write(f'{len(pers)} people loaded.')
-with st.expander("Show all people"):
-    st.write(pers)
+
+tab_mss, tab_txt, tab_ppl, tab_stats = st.tabs(["Manuscripts", "Texts", "People", "Statistics"])
+with tab_mss:
+    browse(BrowseEntity.Manuscripts, "manuscripts", "ID, shelfmark or title")
+with tab_txt:
+    browse(BrowseEntity.Texts, "texts", "Title")
+with tab_ppl:
+    browse(BrowseEntity.People, "people", "ID or name")
+with tab_stats:
+    corpus_statistics()
+
+st.header("Unification Conflicts")
+st.write("Manuscripts with entries in multiple catalogues, whose values could not be unified when the data was built.")
+summary = handler.unification_conflicts_summary
+if summary.empty:
+    st.write("No conflicts.")
+else:
+    st.dataframe(summary, use_container_width=True)
+    col_field, col_page = st.columns([3, 1])
+    conflict_field = col_field.selectbox("Show conflicts of", [None, *summary["field"].unique()],
+                                         format_func=lambda f: "All fields" if f is None else f)
+    conflict_page = col_page.number_input("Page", min_value=1, value=1, step=1, key="conflicts_page")
+    st.dataframe(handler.get_unification_conflicts(conflict_field, int(conflict_page)), use_container_width=True)
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 import streamlit as st
@@ -112,13 +113,15 @@ def __meta_mss_groups() -> None:
             res = list(sel[0].items)
         if res:
             st.write(f"Found {len(res)} manuscripts")
-            if st.button("Load metadata and stuff"):
+            if st.checkbox("Load metadata and stuff"):
                 metadatahandler.process_ms_results(handler, res)
     else:
         st.write("Select one or more groups you want to work with")
 
 
-def __group_selector(groups: list[Group] = handler.get_ms_groups()) -> list[Group]:
+def __group_selector(groups: Optional[list[Group]] = None) -> list[Group]:
+    if groups is None:
+        groups = handler.get_ms_groups()
     st.write("Select the groups you want to combine.")
     selections: set[UUID] = set()
     for i, g in enumerate(groups):
@@ -129,13 +132,8 @@ def __group_selector(groups: list[Group] = handler.get_ms_groups()) -> list[Grou
 
 
 def __group_combinator(groups: list[Group], mode: SearchOptions) -> set[str]:
-    sets = [g.items for g in groups]
     st.write("---")
-    if mode == SearchOptions.CONTAINS_ONE:
-        res = set.union(*sets)
-    else:
-        res = set.intersection(*sets)
-    return res
+    return handler.combine_groups([g.group_id for g in groups], mode)
 
 
 def __union_selector() -> SearchOptions:
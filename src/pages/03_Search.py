@@ -3,6 +3,7 @@ from typing import Any, Callable
 import streamlit as st
 from gui_utils import get_handler, get_log, get_state
 from lib import metadatahandler
+from lib.datahandler import SelectOptions
 from lib.groups import Group, GroupType
 from lib.stateHandler import Step
 from lib.utils import SearchOptions
@@ -75,8 +76,8 @@ def select_manuscripts() -> None:
         with st.container():
             selection = st.multiselect(
                 f'Select Manuscripts',
-                handler.manuscripts.keys(),
-                format_func=lambda x: f"{' / '.join(handler.manuscripts[x])} ({x})"
+                handler.manuscript_options.keys,
+                format_func=handler.manuscript_options.format
             )
             if not selection:
                 st.write("Please select one or more manuscripts from the dropdown.")
@@ -85,7 +86,7 @@ def select_manuscripts() -> None:
             table = [(*handler.manuscripts[x], x) for x in selection]
             st.table(table)
     step2 = st.empty()
-    if selection and step2.button("Continue with Selection"):
+    if selection and step2.checkbox("Continue with Selection"):
         step1.empty()
         step2.empty()
         with step2:
@@ -101,7 +102,7 @@ def select_manuscripts() -> None:
                 with chart:
                     metadatahandler.show_data_chart(meta)
                 with export:
-                    metadatahandler.citavi_export(meta)
+                    metadatahandler.citavi_export(handler, selection)
                     __save_group(
                         ids=selection,
                         searchterms=selection,
@@ -141,10 +142,9 @@ def __search_mss_by_person_step_search() -> None:
     __search_step_1(
         what_sg="Person",
         what_pl="People",
-        selection_keys=list(handler.person_names.keys()),
+        options=handler.person_options,
         search_func=handler.search_manuscripts_related_to_persons,
         state_func=state.store_ms_by_person_search_state,
-        format_func=lambda x: f"{handler.person_names[x]} ({x})",
     )
 
 
@@ -152,8 +152,8 @@ def __search_mss_by_person_step_save_results() -> None:
     """
     Step 2 of this search: Do something with the result.
     """
-    results = state.searchState.ms_by_pers.mss
-    ppl = state.searchState.ms_by_pers.ppl
+    results = list(state.searchState.ms_by_pers.mss)
+    ppl = list(state.searchState.ms_by_pers.ppl)
     mode = state.searchState.ms_by_pers.mode
     st.subheader("Person(s) selected")
     base, data, chart, export = st.tabs(["Overview", "Details", "Chart(s)", "Export/Save"])
@@ -167,7 +167,7 @@ def __search_mss_by_person_step_save_results() -> None:
     with chart:
         metadatahandler.show_data_chart(meta)
     with export:
-        metadatahandler.citavi_export(meta)
+        metadatahandler.citavi_export(handler, results)
         def next_step() -> None: state.steps.search_mss_by_persons = Step.MS_by_Pers.Search_person
         __save_group(
             ids=results,
@@ -208,10 +208,9 @@ def __search_person_by_mss_step_search() -> None:
     __search_step_1(
         what_sg="Manuscript",
         what_pl="Manuscripts",
-        selection_keys=list(handler.manuscripts.keys()),
+        options=handler.manuscript_options,
         search_func=handler.search_persons_related_to_manuscripts,
         state_func=state.store_ppl_by_ms_search_state,
-        format_func=lambda x: f"{' / '.join(handler.manuscripts[x])} ({x})",
     )
 
 
@@ -219,8 +218,8 @@ def __search_person_by_mss_step_save_results() -> None:
     """
     Step 2 of this search: Do something with the result.
     """
-    results = state.searchState.pers_by_ms.ppl
-    mss = state.searchState.pers_by_ms.mss
+    results = list(state.searchState.pers_by_ms.ppl)
+    mss = list(state.searchState.pers_by_ms.mss)
     mode = state.searchState.pers_by_ms.mode
     st.subheader("Manuscript(s) selected")
     query = f' {mode.value} '.join([f"({x})" for x in mss])
@@ -269,9 +268,9 @@ def __search_mss_by_text_step_search() -> None:
     __search_step_1(
         what_sg="Text",
         what_pl="Texts",
-        selection_keys=list(handler.texts),
+        options=handler.text_options,
         search_func=handler.search_manuscripts_containing_texts,
-        state_func=state.store_ms_by_txt_search_state
+        state_func=state.store_ms_by_txt_search_state,
     )
 
 
@@ -279,8 +278,8 @@ def __search_mss_by_text_step_save_results() -> None:
     """
     Step 2 of this search: Do something with the result.
     """
-    results = state.searchState.ms_by_txt.mss
-    txt = state.searchState.ms_by_txt.txt
+    results = list(state.searchState.ms_by_txt.mss)
+    txt = list(state.searchState.ms_by_txt.txt)
     mode = state.searchState.ms_by_txt.mode
     st.subheader("Text(s) selected")
     query = f' {mode.value} '.join(txt)
@@ -294,7 +293,7 @@ def __search_mss_by_text_step_save_results() -> None:
     with chart:
         metadatahandler.show_data_chart(meta)
     with export:
-        metadatahandler.citavi_export(meta)
+        metadatahandler.citavi_export(handler, results)
         def next_step() -> None: state.steps.search_mss_by_txt = Step.MS_by_Txt.Search_Txt
         __save_group(
             ids=results,
@@ -335,10 +334,9 @@ def __search_text_by_mss_step_search() -> None:
     __search_step_1(
         what_sg="Text",
         what_pl="Texts",
-        selection_keys=list(handler.manuscripts.keys()),
+        options=handler.manuscript_options,
         search_func=handler.search_texts_contained_by_manuscripts,
         state_func=state.store_txt_by_ms_search_state,
-        format_func=lambda x: f"{' / '.join(handler.manuscripts[x])} ({x})",
     )
 
 
@@ -346,11 +344,11 @@ def __search_text_by_mss_step_save_results() -> None:
     """
     Step 2 of this search: Do something with the result.
     """
-    results = state.searchState.txt_by_ms.txt
+    results = list(state.searchState.txt_by_ms.txt)
     if not results:
         state.steps.search_txt_by_mss = Step.Txt_by_Ms.Search_Ms
         st.experimental_rerun()
-    mss = state.searchState.txt_by_ms.mss
+    mss = list(state.searchState.txt_by_ms.mss)
     mode = state.searchState.txt_by_ms.mode
     st.subheader("Manuscript(s) selected")
     query = f' {mode.value} '.join([f"({x})" for x in mss])
@@ -382,10 +380,9 @@ def __search_text_by_mss_step_save_results() -> None:
 def __search_step_1(
     what_sg: str,
     what_pl: str,
-    selection_keys: list[str],
+    options: SelectOptions,
     search_func: Callable[[list[str], SearchOptions], list[str]],
     state_func: Callable[[list[str], list[str], SearchOptions], None],
-    format_func: Callable[[str], str] = str,
 ) -> None:
     """Generic function for the first step of a search. May be called by more specific search step functions.
 
@@ -396,20 +393,19 @@ def __search_step_1(
     Args:
         what_sg (str): The thing that is being searched. Singular. (Manuscript/Person/Text)
         what_pl (str): The thing that is being searched. Plural. (Manuscripts/People/Texts)
-        selection_keys (list[str]): the search options that are being displayed in the multiselect.
+        options (SelectOptions): the search options that are being displayed in the multiselect, with their labels.
         search_func (Callable[[list[str], SearchOptions], list[str]]): The datahandler's search function 
             `((search_ids, search_mode) => result_ids)` that will return the appropriate search results.
         state_func (Callable[[list[str], list[str], SearchOptions], None]): A function that sets the state 
             to what it should be, once the search is done.
-        format_func (Callable[[str], str], optional): A function that formats the selection keys for displaying.
     """
     with st.form(f"search_ms_by_{what_sg}"):
         st.subheader(f"Select {what_sg}(s)")
         mode = __ask_for_search_mode()
-        selection = st.multiselect(f'Select {what_sg}', selection_keys, format_func=format_func)
+        selection = st.multiselect(f'Select {what_sg}', options.keys, format_func=options.format)
         if st.form_submit_button(f"Search {what_pl}"):
-            log.debug(f'Search Mode: {mode}')
-            log.debug(f'selection: {selection}')
+            log.debug('Search Mode: %s', mode)
+            log.debug('selection: %s', selection)
             with st.spinner('Searching...'):
                 res = search_func(selection, mode)
             state_func(res, selection, mode)
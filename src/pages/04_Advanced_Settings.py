@@ -1,6 +1,11 @@
+import time
+
 import streamlit as st
 from streamlit.components.v1 import html
 
+from lib import latency
+from lib.database.sqlite.database_sqlite_impl import SLOW_QUERY_MS
+
 
 def nav_page(page_name: str, timeout_secs: int = 3) -> None:
     # Hack from https://github.com/streamlit/streamlit/issues/4832#issuecomment-1201938174
@@ -36,3 +41,28 @@ st.warning("You may have to wait for a bit...")
 if st.button("Clear Streamlit Cache"):
     st.experimental_singleton.clear()
     nav_page("")
+
+
+st.header("Query Timing")
+st.caption(f"Latencies since the start of this server process or the last reset, in milliseconds. "
+           f"Quantiles are estimated from histogram buckets. "
+           f"Statements taking longer than {SLOW_QUERY_MS:.0f} ms are logged with their query plan.")
+
+if st.button("Reset Query Timing"):
+    latency.reset()
+
+st.subheader("Data Handler Methods")
+st.dataframe(latency.methods.to_dataframe(), use_container_width=True)
+
+st.subheader("SQL Statements")
+st.dataframe(latency.statements.to_dataframe(), use_container_width=True)
+
+st.subheader("Slow Queries")
+slow_queries = latency.statements.slow
+if not slow_queries:
+    st.write("No slow queries.")
+for q in slow_queries:
+    with st.expander(f"{time.strftime('%H:%M:%S', time.localtime(q.timestamp))} - {q.ms:.1f} ms - {q.statement[:80]}"):
+        st.code(q.statement, language="sql")
+        st.write(f"Parameters: {q.parameters}")
+        st.code("\n".join(q.plan) or "No query plan")
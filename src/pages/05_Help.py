@@ -21,9 +21,10 @@ Clicking on run will fetch your result lists from handrit and load the correspon
 can finetune them in postprocessing.
 
 There are several options here:
-1. Export to CSV
+1. Export to CSV, Parquet or Excel
 +
-Will export the currently displayed data to a CSV file, which you can download.
+Will export the currently displayed data to a file of the chosen format, which you can download.
+The file is generated when you click "Prepare export", and kept for a while, so that downloading the same results again is instant.
 
 2. Export References to Citavi
 +
@@ -1,5 +1,8 @@
 import argparse
 
+from lib.constants import (BUILD_PROFILE_PATH, DUCKDB_DATABASE_PATH,
+                           PARQUET_EXPORT_PATH)
+from lib.profiling import SLOWEST_FILES, BuildProfiler
 from ops.build import build, update_and_build
 
 
@@ -10,12 +13,39 @@ def main() -> None:
         action="store_true",
         help="Do not update the handrit.is git submodule. this is useful if the DB should contain a particular version of te data"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Measure time, CPU time and memory of each stage and extraction function, and write a report to {BUILD_PROFILE_PATH}"
+    )
+    parser.add_argument(
+        "--profile-slowest",
+        type=int,
+        default=SLOWEST_FILES,
+        help="Number of slowest files to list in the profile"
+    )
+    parser.add_argument(
+        "--profile-no-memory",
+        action="store_true",
+        help="Do not trace memory when profiling, which makes the build faster and the timings more accurate"
+    )
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help=f"Build a DuckDB database at {DUCKDB_DATABASE_PATH} as well, which the app uses if TOOLE_DATABASE=duckdb is set"
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help=f"Export the tables of the new database to a Parquet dataset at {PARQUET_EXPORT_PATH}, tagged with the handrit commit"
+    )
     # LATER: we could also add an option to pass a git hash, and it would automatically check that version out
     args = parser.parse_args()
+    profiler = BuildProfiler(args.profile_slowest, not args.profile_no_memory) if args.profile else None
     if args.no_update:
-        build()
+        build(profiler, args.duckdb, args.parquet)
     else:
-        update_and_build()
+        update_and_build(profiler, args.duckdb, args.parquet)
 
 
 if __name__ == "__main__":
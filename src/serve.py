@@ -0,0 +1,28 @@
+import argparse
+
+from lib.constants import DATABASE_PATH
+from lib.server import serve
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the data as HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind to")
+    parser.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Number of worker processes sharing the socket and the database file (requires fork, i.e. not on Windows)"
+    )
+    parser.add_argument(
+        "--read-only",
+        action="store_true",
+        help="Open the database read-only. Group changes are rejected in this mode."
+    )
+    parser.add_argument("--db", default=DATABASE_PATH, help="Path to the SQLite database")
+    args = parser.parse_args()
+    serve(db_path=args.db, host=args.host, port=args.port, workers=args.workers, read_only=args.read_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import pytest
+
+from lib.database.database import Database
+from lib.database.sqlite import database_sqlite_impl
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+from lib.groups import Group, GroupType
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+
+
+def make_entry(ms_id: str, texts: list[str], people: list[str]) -> CatalogueEntry:
+    """A catalogue entry of the manuscript `ms_id`, with the given texts and people, and fixed metadata otherwise."""
+    return CatalogueEntry(
+        catalogue_id=f"{ms_id}-en", shelfmark=f"AM {ms_id}", manuscript_id=ms_id, catalogue_filename=f"{ms_id}-en.xml",
+        title=f"Title {ms_id}", description="Paper / 10 x 20 mm", date_string="1500-1600",
+        terminus_post_quem=1500, terminus_ante_quem=1600, date_mean=1550, dating_range=100,
+        support="Paper", folio=10, height="10", width="20", extent="10 x 20 mm", origin="Iceland",
+        creator="NULL", country="Iceland", settlement="Reykjavík", repository="Stofnun Árna Magnússonar",
+        texts=texts, people=people
+    )
+
+
+def make_manuscript(e: CatalogueEntry) -> Manuscript:
+    """The manuscript unified from the single catalogue entry `e`."""
+    return Manuscript(
+        manuscript_id=e.manuscript_id, shelfmark=e.shelfmark, catalogue_entries=1, catalogue_ids=e.catalogue_id,
+        catalogue_filenames=e.catalogue_filename, title=e.title, description=e.description, date_string=e.date_string,
+        terminus_post_quem=e.terminus_post_quem, termini_post_quos=str(e.terminus_post_quem),
+        terminus_ante_quem=e.terminus_ante_quem, termini_ante_quos=str(e.terminus_ante_quem), date_mean=e.date_mean,
+        date_standard_deviation=70.7, support=e.support, folio=e.folio, height=e.height, width=e.width,
+        extent=e.extent, origin=e.origin, creator=e.creator, country=e.country, settlement=e.settlement,
+        repository=e.repository, texts=e.texts, people=e.people
+    )
+
+
+@pytest.fixture
+def db() -> Database:
+    """An empty in-memory SQLite database. Test modules of other implementations override it."""
+    engine = database_sqlite_impl.get_engine(':memory:')
+    db = DatabaseSQLiteImpl(engine)
+    db.setup_db()
+    return db
+
+
+@pytest.fixture
+def db_data(db: Database) -> Database:
+    """The `db` fixture with 31 manuscripts, their texts and three people added."""
+    ppl = [Person("p1", "Árni", "Magnússon"), Person("p2", "Jón", "Ólafsson"), Person("p3", "Jón", None)]
+    entries = [make_entry(f"ms{i:02d}", ["Njáls saga"] + (["Egils saga"] if i % 2 else []), ["p1", "p2"][:i % 3])
+               for i in range(30)]
+    entries.append(make_entry("ms_100%", [], []))
+    db.add_data(ppl, entries, [make_manuscript(e) for e in entries])
+    return db
+
+
+@pytest.fixture
+def group_ms() -> Group:
+    group = Group(
+        GroupType.ManuscriptGroup,
+        "group_ms",
+        {"ms_1"}
+    )
+    return group
+
+
+@pytest.fixture
+def group_txt() -> Group:
+    group = Group(
+        GroupType.TextGroup,
+        "group_txt",
+        {"txt_1"}
+    )
+    return group
+
+
+@pytest.fixture
+def group_ppl() -> Group:
+    group = Group(
+        GroupType.PersonGroup,
+        "group_ppl",
+        {"p_1", "p_2"}
+    )
+    return group
@@ -0,0 +1,94 @@
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from lib import latency
+from lib.browse import BrowseEntity
+from lib.database.duckdb import database_duckdb_impl as database
+from lib.database.duckdb.database_duckdb_impl import \
+    DatabaseDuckDBImpl as Database
+from lib.database.sqlite import database_sqlite_impl
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+from lib.groups import Group, GroupType
+from lib.manuscripts import CatalogueEntry, Manuscript
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+from tests.integration.test_database_sqlite import (TestBrowse,  # noqa: F401
+                                                    TestGroups,
+                                                    test_corpus_statistics,
+                                                    test_unification_conflicts)
+
+# The protocol tests of the SQLite implementation are imported above and run against the `db` fixture of this module,
+# which overrides the one of `tests.conftest`.
+
+
+@pytest.fixture
+def db() -> Database:
+    db = Database(database.get_connection(':memory:'))
+    db.setup_db()
+    return db
+
+
+def _data() -> tuple[list[Person], list[CatalogueEntry], list[Manuscript]]:
+    ppl = [Person("p1", "Árni", "Magnússon"), Person("p2", "Jón", "Ólafsson"), Person("p3", "Jón", None)]
+    entries = [make_entry(f"ms{i}", ["Njáls saga"] + (["Egils saga"] if i % 2 else []), ["p1", "p2"][:i % 3]) for i in range(6)]
+    entries.append(dataclasses.replace(make_entry("ms1", ["Laxdæla saga"], ["p3"]), catalogue_id="ms1-da"))
+    return ppl, entries, [make_manuscript(e) for e in entries[:-1]]
+
+
+def test_same_results_as_sqlite(db: Database) -> None:
+    sqlite = DatabaseSQLiteImpl(database_sqlite_impl.get_engine(':memory:'))
+    sqlite.setup_db()
+    db.add_data(*_data())
+    sqlite.add_data(*_data())
+    assert db.persons_lookup_dict() == sqlite.persons_lookup_dict()
+    assert db.ms_lookup_dict() == sqlite.ms_lookup_dict()
+    assert sorted(db.txt_lookup_list()) == sorted(sqlite.txt_lookup_list())
+    selections: list[list[str]] = [["p1"], ["p2", "p3"], []]
+    for ids in selections:
+        assert sorted(db.ms_x_ppl(ids)) == sorted(sqlite.ms_x_ppl(ids))
+    for ids in (["ms1"], ["ms2", "ms3", "ms9"]):
+        assert sorted(db.ppl_x_mss(ids)) == sorted(sqlite.ppl_x_mss(ids))
+        assert sorted(db.txts_x_ms(ids)) == sorted(sqlite.txts_x_ms(ids))
+    assert sorted(db.ms_x_txts(["Egils saga"])) == sorted(sqlite.ms_x_txts(["Egils saga"]))
+    res = db.get_metadata(["ms2", "ms1"])
+    expected = sqlite.get_metadata(["ms2", "ms1"]).sort_values("manuscript_id", ignore_index=True)
+    assert res.equals(expected[res.columns])
+    assert db.get_metadata([]).empty
+    for entity in BrowseEntity:
+        for sort_by in entity.sort_keys:
+            page = db.browse(entity, "a", sort_by, True, 1, 3)
+            assert page.rows.equals(sqlite.browse(entity, "a", sort_by, True, 1, 3).rows)
+
+
+def test_generation_and_groups_version(tmp_path: Path) -> None:
+    path = str(tmp_path / "data.duckdb")
+    db = Database(database.get_connection(path))
+    db.setup_db()
+    assert db.get_generation() == ""
+    db.add_data(*_data())
+    generation = db.get_generation()
+    assert len(generation) == 32
+    group = Group(GroupType.ManuscriptGroup, "group", {"ms1"})
+    db.add_group(group)
+    db.add_group_items(group.group_id, {"ms2"})
+    assert db.get_groups_version() == 2
+    db.close()
+    db = Database(database.get_connection(path, read_only=True))
+    assert db.get_generation() == generation
+    assert db.get_groups_version() == 2
+    assert db.get_all_groups()[0].items == {"ms1", "ms2"}
+    assert db.union_groups([group.group_id]) == db.intersect_groups([group.group_id, group.group_id])
+
+
+def test_time_queries(db_data: Database) -> None:
+    slow = Database(db_data.connection, slow_ms=0)
+    latency.reset()
+    slow.browse(BrowseEntity.Manuscripts, "ms", "shelfmark", False, 0, 10)
+    slow.get_metadata(["ms1", "ms2", "ms3"])
+    stats = latency.statements.to_dataframe()
+    assert len(stats) == 3
+    assert len(latency.statements.slow) == 3
+    assert all(q.plan for q in latency.statements.slow)
+    latency.reset()
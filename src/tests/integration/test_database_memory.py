@@ -0,0 +1,51 @@
+import pytest
+
+from lib.database.memory.database_memory_impl import DatabaseMemoryImpl
+from lib.database.sqlite.database_sqlite_impl import DatabaseSQLiteImpl
+from lib.groups import Group, GroupType
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+
+
+@pytest.fixture
+def memory(db_data: DatabaseSQLiteImpl) -> DatabaseMemoryImpl:
+    return DatabaseMemoryImpl(db_data)
+
+
+def test_same_results_as_sqlite(memory: DatabaseMemoryImpl, db_data: DatabaseSQLiteImpl) -> None:
+    assert memory.get_generation() == db_data.get_generation()
+    assert memory.persons_lookup_dict() == db_data.persons_lookup_dict()
+    assert memory.ms_lookup_dict() == db_data.ms_lookup_dict()
+    assert sorted(memory.txt_lookup_list()) == sorted(db_data.txt_lookup_list())
+    selections: list[list[str]] = [["p1"], ["p1", "p2", "p3", "p9"], []]
+    for ids in selections:
+        assert sorted(memory.ms_x_ppl(ids)) == sorted(db_data.ms_x_ppl(ids))
+    selections = [["ms01"], ["ms02", "ms03", "ms04", "ms99"], []]
+    for ids in selections:
+        assert sorted(memory.ppl_x_mss(ids)) == sorted(db_data.ppl_x_mss(ids))
+        assert sorted(memory.txts_x_ms(ids)) == sorted(db_data.txts_x_ms(ids))
+    assert sorted(memory.ms_x_txts(["Egils saga"])) == sorted(db_data.ms_x_txts(["Egils saga"]))
+    res = memory.get_metadata(["ms02", "ms01", "ms02", "ms99"])
+    expected = db_data.get_metadata(["ms02", "ms01"]).sort_values("manuscript_id", ignore_index=True)
+    assert res.equals(expected[res.columns])
+    assert memory.get_metadata([]).empty
+
+
+def test_delegates_to_sqlite(memory: DatabaseMemoryImpl, db_data: DatabaseSQLiteImpl) -> None:
+    group = Group(GroupType.PersonGroup, "group", {"p1"})
+    memory.add_group(group)
+    memory.add_group_items(group.group_id, {"p2"})
+    assert db_data.get_ppl_groups()[0].items == {"p1", "p2"}
+    assert memory.get_groups_version() == db_data.get_groups_version() == 2
+
+
+def test_add_data_reloads(db: DatabaseSQLiteImpl) -> None:
+    memory = DatabaseMemoryImpl(db)
+    assert memory.ms_lookup_dict() == {}
+    assert memory.get_metadata(["ms1"]).empty
+    entry = make_entry("ms1", ["Njáls saga"], ["p1"])
+    memory.add_data([Person("p1", "Árni", "Magnússon")], [entry], [make_manuscript(entry)])
+    assert memory.get_generation() == db.get_generation() != ""
+    assert memory.ms_x_txts(["Njáls saga"]) == ["ms1"]
+    assert memory.ppl_x_mss(["ms1"]) == ["p1"]
+    assert list(memory.get_metadata(["ms1"])["shelfmark"]) == ["AM ms1"]
@@ -1,62 +1,34 @@
 import dataclasses
+import sqlite3
+import uuid
+from pathlib import Path
 
 import pytest
+from sqlalchemy import text
 from sqlalchemy.future import Engine
 from sqlmodel import Session, SQLModel
 
+from lib import latency
+from lib.browse import BrowseEntity
+from lib.conflicts import UnificationConflict
+from lib.corpus_statistics import CorpusStatistic
 from lib.database.sqlite import database_sqlite_impl as database
 from lib.database.sqlite.database_sqlite_impl import \
     DatabaseSQLiteImpl as Database
 from lib.groups import Group, GroupType
+from tests.conftest import make_entry, make_manuscript
 
 
-@pytest.fixture
-def db() -> Database:
-    engine = database.get_engine(':memory:')
-    db = Database(engine)
-    db.setup_db()
-    return db
-
-
-@pytest.fixture
-def group_ms() -> Group:
-    group = Group(
-        GroupType.ManuscriptGroup,
-        "group_ms",
-        {"ms_1"}
-    )
-    return group
-
-
-@pytest.fixture
-def group_txt() -> Group:
-    group = Group(
-        GroupType.TextGroup,
-        "group_txt",
-        {"txt_1"}
-    )
-    return group
-
-
-@pytest.fixture
-def group_ppl() -> Group:
-    group = Group(
-        GroupType.PersonGroup,
-        "group_ppl",
-        {"p_1", "p_2"}
-    )
-    return group
+def test_create_sql_engine_inmemory() -> None:
+    e = database.get_engine(':memory:')
+    assert isinstance(e, Engine)
+    SQLModel.metadata.create_all(e)
+    with Session(e) as s:
+        assert s.info == {}
 
 
 class TestGroups:
 
-    def test_create_sql_engine_inmemory(self) -> None:
-        e = database.get_engine(':memory:')
-        assert isinstance(e, Engine)
-        SQLModel.metadata.create_all(e)
-        with Session(e) as s:
-            assert s.info == {}
-
     def test_add_group_one(self, db: Database, group_ms: Group) -> None:
         db.add_group(group_ms)
         res = db.get_all_groups()
@@ -108,3 +80,192 @@ class TestGroups:
         res = db.get_all_groups()
         assert res == [new_group]
         assert group_ms not in res
+
+    def test_update_group_incremental(self, db: Database, group_ppl: Group) -> None:
+        db.add_group(group_ppl)
+        new_group = dataclasses.replace(group_ppl, name="renamed", items={"p_2", "p_3"})
+        db.update_group(new_group, group_ppl.group_id)
+        assert db.get_all_groups() == [new_group]
+
+    def test_add_and_remove_group_items(self, db: Database, group_ppl: Group) -> None:
+        db.add_group(group_ppl)
+        db.add_group_items(group_ppl.group_id, {"p_2", "p_3"})
+        assert db.get_ppl_groups()[0].items == {"p_1", "p_2", "p_3"}
+        db.remove_group_items(group_ppl.group_id, {"p_1", "p_4"})
+        assert db.get_ppl_groups()[0].items == {"p_2", "p_3"}
+
+    def test_delete_group(self, db: Database, group_ms: Group, group_ppl: Group) -> None:
+        db.add_group(group_ms)
+        db.add_group(group_ppl)
+        db.delete_group(group_ppl.group_id)
+        assert db.get_all_groups() == [group_ms]
+        assert db.union_groups([group_ppl.group_id]) == []
+
+    def test_add_items_to_deleted_group(self, db: Database, group_ppl: Group) -> None:
+        db.add_group(group_ppl)
+        db.delete_group(group_ppl.group_id)
+        db.add_group_items(group_ppl.group_id, {"p_3"})
+        assert db.get_all_groups() == []
+        assert db.union_groups([group_ppl.group_id]) == []
+
+    def test_combine_groups(self, db: Database, group_ppl: Group) -> None:
+        other = Group(GroupType.PersonGroup, "other", {"p_2", "p_3"})
+        db.add_group(group_ppl)
+        db.add_group(other)
+        ids = [group_ppl.group_id, other.group_id]
+        assert sorted(db.union_groups(ids)) == ["p_1", "p_2", "p_3"]
+        assert db.intersect_groups(ids) == ["p_2"]
+        assert sorted(db.intersect_groups([other.group_id])) == ["p_2", "p_3"]
+        assert db.intersect_groups([]) == []
+
+
+def test_migrate_legacy_group_items(tmp_path: Path) -> None:
+    engine = database.get_engine(str(tmp_path / "legacy.db"))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE groups (group_id CHAR(32) PRIMARY KEY, group_type VARCHAR(9), name VARCHAR, date VARCHAR, items VARCHAR)"))
+        group_id = uuid.uuid4()
+        conn.execute(text(f"INSERT INTO groups VALUES ('{group_id.hex}', 'ManuscriptGroup', 'old', '0.0', 'ms_1|ms_2')"))
+    db = Database(engine)
+    db.setup_db()
+    groups = db.get_all_groups()
+    assert [(g.group_id, g.items) for g in groups] == [(group_id, {"ms_1", "ms_2"})]
+    db.setup_db()
+    assert db.get_all_groups() == groups
+
+
+class TestBrowse:
+
+    def test_pages(self, db_data: Database) -> None:
+        first = db_data.browse(BrowseEntity.Manuscripts, "", "manuscript_id", False, 0, 10)
+        last = db_data.browse(BrowseEntity.Manuscripts, "", "manuscript_id", False, 30, 10)
+        assert first.total == last.total == 31
+        assert list(first.rows["manuscript_id"]) == [f"ms{i:02d}" for i in range(10)]
+        assert list(last.rows["manuscript_id"]) == ["ms_100%"]
+        assert last.offset == 30
+        assert first.pages(10) == 4
+
+    def test_counts(self, db_data: Database) -> None:
+        rows = db_data.browse(BrowseEntity.Manuscripts, "", "manuscript_id", False, 0, 3).rows
+        assert list(rows["texts"]) == [1, 2, 1]
+        assert list(rows["people"]) == [0, 1, 2]
+        rows = db_data.browse(BrowseEntity.Texts, "", "manuscripts", True, 0, 10).rows
+        assert rows.values.tolist() == [["Njáls saga", 30], ["Egils saga", 15]]
+        rows = db_data.browse(BrowseEntity.People, "", "pers_id", False, 0, 10).rows
+        assert list(rows["manuscripts"]) == [20, 10, 0]
+
+    def test_sort(self, db_data: Database) -> None:
+        rows = db_data.browse(BrowseEntity.Manuscripts, "", "people", True, 0, 3).rows
+        assert list(rows["manuscript_id"]) == ["ms02", "ms05", "ms08"]
+        rows = db_data.browse(BrowseEntity.People, "", "last_name", False, 0, 10).rows
+        assert list(rows["pers_id"]) == ["p3", "p1", "p2"]
+        rows = db_data.browse(BrowseEntity.People, "", "first_name", False, 0, 10).rows
+        assert list(rows["pers_id"]) == ["p2", "p3", "p1"]
+        with pytest.raises(ValueError):
+            db_data.browse(BrowseEntity.Texts, "", "shelfmark", False, 0, 10)
+
+    @pytest.mark.parametrize("entity, search, expected", [
+        (BrowseEntity.Manuscripts, "ms1", ["ms10", "ms11", "ms12", "ms13", "ms14", "ms15", "ms16", "ms17", "ms18", "ms19"]),
+        (BrowseEntity.Manuscripts, "TITLE MS2", [f"ms2{i}" for i in range(10)]),
+        (BrowseEntity.Manuscripts, "100%", ["ms_100%"]),
+        (BrowseEntity.Manuscripts, "_", ["ms_100%"]),
+        (BrowseEntity.Manuscripts, "%", ["ms_100%"]),
+        (BrowseEntity.People, "árni", ["p1"]),
+        (BrowseEntity.People, "ÓLAF", ["p2"]),
+        (BrowseEntity.People, "jón", ["p2", "p3"]),
+        (BrowseEntity.Texts, "eg", ["Egils saga"]),
+        (BrowseEntity.Texts, 'saga"', []),
+    ])
+    def test_search(self, db_data: Database, entity: BrowseEntity, search: str, expected: list[str]) -> None:
+        page = db_data.browse(entity, search, entity.sort_keys[-2], False, 0, 50)
+        assert sorted(page.rows.iloc[:, 0]) == expected
+        assert page.total == len(expected)
+
+
+def test_browse_index_of_existing_database(tmp_path: Path) -> None:
+    engine = database.get_engine(str(tmp_path / "data.db"))
+    db = Database(engine)
+    db.setup_db()
+    db.add_data([], [make_entry("ms1", ["Njáls saga"], [])], [make_manuscript(make_entry("ms1", ["Njáls saga"], []))])
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {database.BROWSE_INDEX}"))
+        conn.execute(text("DROP INDEX ix_textmanuscriptjunction_manuscript_id"))
+    db.setup_db()
+    assert list(db.browse(BrowseEntity.Texts, "njál", "text_id", False, 0, 10).rows["text_id"]) == ["Njáls saga"]
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM textmanuscriptjunction WHERE manuscript_id = 'ms1'"
+        )).all()
+    assert "ix_textmanuscriptjunction_manuscript_id" in str(plan)
+
+
+def test_browse_index_without_trigram_tokenizer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = str(tmp_path / "data.db")
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 33, 0))
+    db = Database(database.get_engine(path))
+    db.setup_db()
+    entries = [make_entry("ms1", ["Njáls saga"], []), make_entry("ms2", ["Egils saga"], [])]
+    db.add_data([], entries, [make_manuscript(e) for e in entries])
+    assert list(db.browse(BrowseEntity.Texts, "ÁLS SAG", "text_id", False, 0, 10).rows["text_id"]) == ["Njáls saga"]
+    assert db.browse(BrowseEntity.Texts, "saga", "text_id", False, 0, 10).total == 2
+    with db.engine.connect() as conn:
+        assert not database._is_trigram_index(conn)
+    monkeypatch.undo()
+    assert Database(database.get_engine(path)).browse(BrowseEntity.Texts, "gils", "text_id", False, 0, 10).total == 1
+    db = Database(database.get_engine(str(tmp_path / "trigram.db")))
+    db.setup_db()
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 33, 0))
+    with pytest.raises(RuntimeError, match="needs SQLite 3.34.0"):
+        db.setup_db()
+
+
+def test_unification_conflicts(db: Database) -> None:
+    conflicts = [
+        UnificationConflict("ms2", "folio", ("10", "20"), "mean", "15"),
+        UnificationConflict("ms1", "country", ("Ísland", "Danmark"), "join", "Ísland | Danmark"),
+        UnificationConflict("ms2", "country", ("Ísland", "Norway"), "join", "Ísland | Norway"),
+    ]
+    db.add_unification_conflicts([UnificationConflict("ms0", "title", ("a", "b"), "join", "a | b")])
+    db.add_unification_conflicts(conflicts)
+    summary = db.get_unification_conflicts_summary()
+    assert summary.values.tolist() == [["country", "join", 2], ["folio", "mean", 1]]
+    res = db.get_unification_conflicts(None, 0, 10)
+    assert res.values.tolist() == [
+        ["ms1", "country", ["Ísland", "Danmark"], "join", "Ísland | Danmark"],
+        ["ms2", "country", ["Ísland", "Norway"], "join", "Ísland | Norway"],
+        ["ms2", "folio", ["10", "20"], "mean", "15"],
+    ]
+    assert list(db.get_unification_conflicts("country", 1, 10)["manuscript_id"]) == ["ms2"]
+    db.add_unification_conflicts([])
+    assert db.get_unification_conflicts_summary().empty
+    assert db.get_unification_conflicts(None, 0, 10).empty
+
+
+def test_corpus_statistics(db: Database) -> None:
+    statistics = {
+        CorpusStatistic.Totals: [("Manuscripts", 3), ("People", 2)],
+        CorpusStatistic.Centuries: [("1300–1399", 1), ("1500–1599", 2)],
+        CorpusStatistic.Texts: [],
+    }
+    assert db.get_corpus_statistics() == {}
+    db.add_corpus_statistics({CorpusStatistic.Countries: [("Iceland", 1)]})
+    db.add_corpus_statistics(statistics)
+    assert db.get_corpus_statistics() == {
+        CorpusStatistic.Totals: [("Manuscripts", 3), ("People", 2)],
+        CorpusStatistic.Centuries: [("1300–1399", 1), ("1500–1599", 2)],
+    }
+
+
+def test_time_queries(db_data: Database) -> None:
+    database.time_queries(db_data.engine, slow_ms=0)
+    latency.reset()
+    db_data.browse(BrowseEntity.Manuscripts, "ms", "shelfmark", False, 0, 10)
+    db_data.get_metadata(["ms1", "ms2", "ms3"])
+    stats = latency.statements.to_dataframe()
+    assert len(stats) >= 3
+    assert any("IN (?, ...)" in s for s in stats["name"])
+    slow = latency.statements.slow
+    assert len(slow) == stats["count"].sum()
+    assert any(line.lstrip().startswith(("SCAN", "SEARCH")) for q in slow for line in q.plan)
+    latency.reset()
+    assert latency.statements.to_dataframe().empty
+    assert not latency.statements.slow
@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from lib import export
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+from lib.export import ExportCache, ExportFormat
+from tests.conftest import make_entry, make_manuscript
+
+
+@pytest.fixture
+def handler(tmp_path: Path) -> DataHandler:
+    db = DatabaseSQLiteImpl(get_engine(str(tmp_path / "data.db")))
+    db.setup_db()
+    entries = [make_entry(f"ms{i:02d}", [], []) for i in range(25)]
+    db.add_data([], entries, [make_manuscript(e) for e in entries])
+    return DataHandler(db)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ExportCache:
+    return ExportCache(str(tmp_path / "exports"))
+
+
+def _expected(handler: DataHandler, ms_ids: list[str]) -> pd.DataFrame:
+    return handler.search_manuscript_data(ms_ids).sort_values("manuscript_id").reset_index(drop=True)
+
+
+def test_chunks(handler: DataHandler) -> None:
+    chunks = list(export.iter_metadata(handler, [f"ms{i:02d}" for i in reversed(range(25))], chunk_size=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert list(pd.concat(chunks)["manuscript_id"]) == [f"ms{i:02d}" for i in range(25)]
+
+
+@pytest.mark.parametrize("fmt", list(ExportFormat))
+def test_export(handler: DataHandler, cache: ExportCache, fmt: ExportFormat, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(export, "CHUNK_SIZE", 4)
+    ms_ids = [f"ms{i:02d}" for i in range(0, 25, 2)] + ["unknown"]
+    path = export.export_manuscripts(handler, ms_ids, fmt, cache)
+    if fmt == ExportFormat.CSV:
+        res = pd.read_csv(path, dtype={"height": str, "width": str})
+    elif fmt == ExportFormat.PARQUET:
+        res = pd.read_parquet(path)
+    else:
+        res = pd.read_excel(path, dtype={"height": str, "width": str})
+    expected = _expected(handler, ms_ids)
+    assert list(res.columns) == list(expected.columns)
+    assert list(res["manuscript_id"]) == list(expected["manuscript_id"])
+    assert list(res["shelfmark"]) == list(expected["shelfmark"])
+    assert list(res["folio"]) == list(expected["folio"])
+
+
+def test_export_cached(handler: DataHandler, cache: ExportCache) -> None:
+    path = export.export_manuscripts(handler, ["ms01", "ms02"], ExportFormat.CSV, cache)
+    mtime = path.stat().st_mtime_ns
+    os.utime(path, ns=(0, 0))
+    assert export.export_manuscripts(handler, ["ms02", "ms01", "ms02"], ExportFormat.CSV, cache) == path
+    assert path.stat().st_mtime_ns >= mtime
+    assert export.export_manuscripts(handler, ["ms01", "ms02"], ExportFormat.PARQUET, cache) != path
+    assert export.export_manuscripts(handler, ["ms01"], ExportFormat.CSV, cache) != path
+    assert not [p for p in cache.path.iterdir() if p.name.startswith(".")]
+
+
+def test_cache_eviction(handler: DataHandler, cache: ExportCache) -> None:
+    first = export.export_manuscripts(handler, ["ms01"], ExportFormat.CSV, cache)
+    os.utime(first, (0, 0))
+    cache.max_bytes = first.stat().st_size + 1
+    second = export.export_manuscripts(handler, ["ms02"], ExportFormat.CSV, cache)
+    assert second.exists()
+    assert not first.exists()
@@ -0,0 +1,67 @@
+import dataclasses
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import inspect
+
+from lib.database import parquet
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> DatabaseSQLiteImpl:
+    db = DatabaseSQLiteImpl(get_engine(str(tmp_path / "data.db")))
+    db.setup_db()
+    ppl = [Person("p2", "Jón", "Ólafsson"), Person("p1", "Árni", None)]
+    entries = [make_entry("ms2", ["Njáls saga", "Egils saga"], ["p1", "p2"]), make_entry("ms1", ["Njáls saga"], ["p1"])]
+    manuscripts = [make_manuscript(e) for e in entries]
+    manuscripts[0] = dataclasses.replace(manuscripts[0], catalogue_ids="ms2-en | ms2-da", termini_post_quos="1500 | 1550")
+    db.add_data(ppl, entries, manuscripts)
+    return db
+
+
+def test_export(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "parquet")
+    parquet.export_parquet(db, path, commit="abc123")
+    manifest = parquet.read_manifest(path)
+    assert manifest["handrit_commit"] == "abc123"
+    assert manifest["generation"] == db.get_generation()
+    assert set(manifest["tables"]) == set(parquet.TABLES)
+    mss = pq.read_table(Path(path) / "manuscripts.parquet", memory_map=True)
+    assert mss.schema.metadata[b"toole.handrit_commit"] == b"abc123"
+    assert mss.column("manuscript_id").to_pylist() == ["ms1", "ms2"]
+    assert mss.column("catalogue_ids").to_pylist() == [["ms1-en"], ["ms2-en", "ms2-da"]]
+    assert mss.column("termini_post_quos").to_pylist() == [[1500], [1500, 1550]]
+    assert mss.column("terminus_post_quem").type == pa.int32()
+    assert pa.types.is_dictionary(mss.column("country").type)
+    df = pq.read_table(Path(path) / "people.parquet").to_pandas()
+    assert df["pers_id"].tolist() == ["p1", "p2"]
+    assert df["last_name"].tolist()[1] == "Ólafsson" and df["last_name"].isna().tolist() == [True, False]
+    pxm = pq.read_table(Path(path) / "personmanuscriptjunction.parquet")
+    assert pxm.to_pydict() == {"manuscript_id": ["ms1", "ms2", "ms2"], "pers_id": ["p1", "p1", "p2"]}
+    column = pq.ParquetFile(Path(path) / "manuscripts.parquet").metadata.row_group(0).column(0)
+    assert (column.statistics.min, column.statistics.max) == ("ms1", "ms2")
+    assert manifest["tables"]["textmanuscriptjunction"]["rows"] == 3
+
+
+def test_export_replaces_previous(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "parquet")
+    parquet.export_parquet(db, path, commit="old")
+    parquet.export_parquet(db, path, commit="new")
+    assert parquet.read_manifest(path)["handrit_commit"] == "new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.db", "parquet"]
+
+
+def test_tables_match_database(db: DatabaseSQLiteImpl) -> None:
+    inspector = inspect(db.engine)
+    for name, (_, schema) in parquet.TABLES.items():
+        assert set(schema.names) == {c["name"] for c in inspector.get_columns(name)}
+
+
+def test_handrit_commit(tmp_path: Path) -> None:
+    assert parquet.handrit_commit(str(tmp_path)) == ""
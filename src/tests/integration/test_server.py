@@ -0,0 +1,129 @@
+import gzip
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import inspect
+
+from lib import server
+from lib.database.sqlite.database_sqlite_impl import (BROWSE_INDEX,
+                                                      DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+from lib.people import Person
+from lib.server import make_server
+from tests.conftest import make_entry, make_manuscript
+
+
+@pytest.fixture
+def handler(tmp_path: Path) -> DataHandler:
+    db = DatabaseSQLiteImpl(get_engine(str(tmp_path / "data.db")))
+    db.setup_db()
+    ppl = [Person("p1", "Árni", "Magnússon"), Person("p2", "Jón", "Ólafsson")]
+    entries = [make_entry("ms1", ["Njáls saga"], ["p1"]), make_entry("ms2", ["Njáls saga", "Egils saga"], ["p1", "p2"])]
+    db.add_data(ppl, entries, [make_manuscript(e) for e in entries])
+    return DataHandler(db)
+
+
+@pytest.fixture
+def base_url(handler: DataHandler) -> Iterator[str]:
+    server = make_server(handler, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url: str, method: str = "GET", data: Optional[Any] = None, headers: Optional[dict[str, str]] = None) -> tuple[int, Any, Any]:
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as res:
+            raw = res.read()
+            if res.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            return res.status, json.loads(raw) if raw else None, res.headers
+    except urllib.error.HTTPError as e:
+        return e.code, None, e.headers
+
+
+def test_search_endpoints(base_url: str) -> None:
+    query = urlencode({"ids": ["Njáls saga", "Egils saga"], "mode": "AND"}, doseq=True)
+    status, res, _ = _request(f"{base_url}/api/manuscripts/by-texts?{query}")
+    assert status == 200
+    assert res == ["ms2"]
+    _, res, _ = _request(f"{base_url}/api/manuscripts/by-people?ids=p1&mode=OR")
+    assert sorted(res) == ["ms1", "ms2"]
+    _, res, _ = _request(f"{base_url}/api/people/by-manuscripts?ids=ms1&ids=ms2&mode=AND")
+    assert res == ["p1"]
+    _, res, _ = _request(f"{base_url}/api/texts/by-manuscripts?ids=ms2")
+    assert sorted(res) == ["Egils saga", "Njáls saga"]
+    status, _, _ = _request(f"{base_url}/api/texts/by-manuscripts?ids=ms2&mode=XOR")
+    assert status == 400
+
+
+def test_lookups_and_metadata(base_url: str, handler: DataHandler) -> None:
+    _, res, _ = _request(f"{base_url}/api/lookups/people")
+    assert res == handler.person_names
+    _, res, _ = _request(f"{base_url}/api/manuscripts/metadata?ids=ms1")
+    assert [r["manuscript_id"] for r in res] == ["ms1"]
+    _, res, _ = _request(f"{base_url}/api/info")
+    assert res == {"generation": handler.generation}
+    assert handler.generation
+
+
+def test_etag_revalidation(base_url: str, handler: DataHandler) -> None:
+    url = f"{base_url}/api/lookups/manuscripts"
+    status, _, headers = _request(url)
+    assert status == 200
+    etag = headers["ETag"]
+    assert handler.generation in etag
+    assert "max-age" in headers["Cache-Control"]
+    status, res, _ = _request(url, headers={"If-None-Match": etag})
+    assert status == 304
+    assert res is None
+
+
+def test_gzip(base_url: str) -> None:
+    req = urllib.request.Request(f"{base_url}/api/manuscripts/metadata?ids=ms1&ids=ms2", headers={"Accept-Encoding": "gzip"})
+    with urllib.request.urlopen(req) as res:
+        assert res.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(res.read()))) == 2
+
+
+def test_group_crud(base_url: str) -> None:
+    status, created, _ = _request(f"{base_url}/api/groups", "POST", {"group_type": "msgroup", "name": "g", "items": ["ms1"]})
+    assert status == 201
+    url = f"{base_url}/api/groups/{created['group_id']}"
+    _, res, headers = _request(url)
+    assert res == created
+    assert headers["Cache-Control"] == "no-cache"
+    status, _, _ = _request(url, headers={"If-None-Match": headers["ETag"]})
+    assert status == 304
+    _, res, _ = _request(url, "PUT", {"group_type": "msgroup", "name": "g", "items": ["ms1", "ms2"]})
+    assert res["items"] == ["ms1", "ms2"]
+    _, res, _ = _request(f"{base_url}/api/groups?type=msgroup")
+    assert [g["items"] for g in res] == [["ms1", "ms2"]]
+    status, _, _ = _request(url, "DELETE")
+    assert status == 204
+    status, _, _ = _request(url)
+    assert status == 404
+
+
+def test_setup_db_before_workers(tmp_path: Path) -> None:
+    path = str(tmp_path / "data.db")
+    sqlite3.connect(path).close()
+    server._setup_db(path)
+    db = DatabaseSQLiteImpl(get_engine(path, read_only=True))
+    assert DataHandler(db).generation == ""
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"DROP TABLE {BROWSE_INDEX}")
+    server._setup_db(path)
+    assert inspect(db.engine).has_table(BROWSE_INDEX)
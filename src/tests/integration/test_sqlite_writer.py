@@ -0,0 +1,105 @@
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.database.sqlite.writer import BackgroundWriter
+from lib.datahandler import DataHandler
+from lib.groups import Group, GroupType
+from lib.utils import SearchOptions
+
+N_THREADS = 8
+N_GROUPS = 10
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "data.db")
+    DatabaseSQLiteImpl(get_engine(path)).setup_db()
+    return path
+
+
+@pytest.fixture
+def db(db_path: str) -> Iterator[DatabaseSQLiteImpl]:
+    engine = get_engine(db_path)
+    writer = BackgroundWriter(engine)
+    yield DatabaseSQLiteImpl(engine, writer)
+    writer.close()
+
+
+def test_wal_mode(db: DatabaseSQLiteImpl) -> None:
+    with Session(db.engine) as session:
+        assert session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+def test_failing_write_does_not_affect_batch(db: DatabaseSQLiteImpl) -> None:
+    assert db.writer is not None
+    group = Group(GroupType.ManuscriptGroup, "g", {"a"})
+
+    def fail(session: Session) -> None:
+        raise ValueError("nope")
+
+    futures = [db.writer.submit(fail)]
+    db.add_group(group)
+    with pytest.raises(ValueError):
+        futures[0].result()
+    assert db.get_all_groups() == [group]
+
+
+def test_concurrent_group_writes(db: DatabaseSQLiteImpl, db_path: str) -> None:
+    handler = DataHandler(db)
+    # another process writing to the same database file, without the background writer
+    other = DatabaseSQLiteImpl(get_engine(db_path))
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def write(n: int) -> None:
+        try:
+            for i in range(N_GROUPS):
+                group = Group(GroupType.ManuscriptGroup, f"group {n}/{i}", {f"ms{n}", f"ms{i}"})
+                handler.add_group(group)
+                handler.add_group_items(group.group_id, {"shared"})
+                if i % 3 == 0:
+                    handler.remove_group_items(group.group_id, {f"ms{i}"})
+        except BaseException as e:
+            errors.append(e)
+
+    def write_other() -> None:
+        try:
+            for i in range(N_GROUPS):
+                other.add_group(Group(GroupType.TextGroup, f"other {i}", {f"txt{i}"}))
+        except BaseException as e:
+            errors.append(e)
+
+    def read() -> None:
+        try:
+            while not stop.is_set():
+                groups = handler.get_ms_groups()
+                handler.combine_groups([g.group_id for g in groups], SearchOptions.CONTAINS_ONE)
+        except BaseException as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writers = [threading.Thread(target=write, args=(n,)) for n in range(N_THREADS)] + [threading.Thread(target=write_other)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert not errors
+    n_ms_groups = N_THREADS * N_GROUPS
+    n_writes = n_ms_groups * 2 + N_THREADS * len(range(0, N_GROUPS, 3)) + N_GROUPS
+    assert db.get_groups_version() == n_writes
+    ms_groups = handler.get_ms_groups()
+    assert len(ms_groups) == n_ms_groups
+    assert len(handler.get_txt_groups()) == N_GROUPS
+    assert all("shared" in g.items for g in ms_groups)
+    assert handler.combine_groups([g.group_id for g in ms_groups], SearchOptions.CONTAINS_ALL) == {"shared"}
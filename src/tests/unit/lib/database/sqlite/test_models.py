@@ -5,7 +5,7 @@ from uuid import uuid4
 import pytest
 
 from lib.groups import Group, GroupType
-from lib.database.sqlite.models import Groups
+from lib.database.sqlite.models import GroupItems, Groups
 
 
 @pytest.fixture
@@ -41,7 +41,6 @@ def group_model() -> Groups:
         group_type=GroupType.ManuscriptGroup,
         name=name,
         date="0.0",
-        items=""
     )
 
 
@@ -52,7 +51,7 @@ def test_groups_make_multiple_items(group: Group) -> None:
     model = Groups.make(group)
     assert model.group_type == group.group_type
     assert model.name == group.name
-    assert model.items in {f"{item1}|{item2}", f"{item2}|{item1}"}
+    assert {i.item_id for i in model.items} == {item1, item2}
     assert model.date == "0.0"
     assert model.group_id == group.group_id
 
@@ -63,7 +62,7 @@ def test_groups_make_one_item(group: Group) -> None:
     model = Groups.make(group)
     assert model.group_type == group.group_type
     assert model.name == group.name
-    assert model.items == item
+    assert [i.item_id for i in model.items] == [item]
     assert model.date == "0.0"
     assert model.group_id == group.group_id
 
@@ -72,7 +71,7 @@ def test_groups_make_empty_items(group: Group) -> None:
     model = Groups.make(group)
     assert model.group_type == group.group_type
     assert model.name == group.name
-    assert model.items == ""
+    assert model.items == []
     assert model.date == "0.0"
     assert model.group_id == group.group_id
 
@@ -82,7 +81,7 @@ def test_groups_make_with_defaults(group_default: Group) -> None:
     after = datetime.now().timestamp()
     assert model.group_type == group_default.group_type
     assert model.name == group_default.name
-    assert model.items == ""
+    assert model.items == []
     assert float(model.date) < after
     assert after - float(model.date) < 5  # should never be 5 seconds
     assert model.group_id == group_default.group_id
@@ -98,7 +97,7 @@ def test_groups_to_group_empty_items(group_model: Groups) -> None:
 
 
 def test_groups_to_group_one_item(group_model: Groups) -> None:
-    group_model.items = "a"
+    group_model.items = [GroupItems(item_id="a")]
     group = group_model.to_group()
     assert group.group_id == group_model.group_id
     assert group.name == group_model.name
@@ -108,7 +107,7 @@ def test_groups_to_group_one_item(group_model: Groups) -> None:
 
 
 def test_groups_to_group_multiple_items(group_model: Groups) -> None:
-    group_model.items = "a|b"
+    group_model.items = [GroupItems(item_id="a"), GroupItems(item_id="b")]
     group = group_model.to_group()
     assert group.group_id == group_model.group_id
     assert group.name == group_model.name
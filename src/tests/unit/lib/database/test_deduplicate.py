@@ -0,0 +1,85 @@
+import dataclasses
+import math
+import random
+import statistics
+from fractions import Fraction
+
+import pytest
+
+from lib.conflicts import UnificationConflict
+from lib.database import deduplicate
+from tests.conftest import make_entry
+
+
+@pytest.mark.parametrize("x, y, expected", [
+    ("a", "a", "a"),
+    ("Paper", "Paper and parchment", "Paper and parchment"),
+    ("N/A", "Iceland", "Iceland"),
+    ("Iceland", "Origin unknown", "Iceland"),
+    ("København", "Copenhagen", "Copenhagen"),
+    ("Denmark", "Danmark", "Denmark"),
+    ("Iceland", "Norway", "Iceland | Norway"),
+])
+def test_combine_str(x: str, y: str, expected: str) -> None:
+    assert deduplicate.combine_str(x, y) == expected
+
+
+def test_combine_ints() -> None:
+    assert deduplicate.combine_ints(10) == 10
+    assert deduplicate.combine_ints(10, 0, 10) == 10
+    assert deduplicate.combine_ints(10, 20, 0) == 15
+    assert deduplicate.combine_ints(10, 20, 30) == 17
+
+
+def test_unify() -> None:
+    e1 = make_entry("ms1", ["t1"], ["p1"])
+    e2 = dataclasses.replace(make_entry("ms1", ["t2"], ["p1", "p2"]), catalogue_id="ms1-da", country="Danmark",
+                             origin="Origin unknown", folio=0, terminus_post_quem=1450)
+    e3 = make_entry("ms2", [], [])
+    e4 = dataclasses.replace(e1, catalogue_id="ms1-is", country="Denmark", title="Annar titill", folio=20)
+    res = deduplicate.unify([e1, e2, e3, e4])
+    ms1, ms2 = res.manuscripts
+    assert (ms1.manuscript_id, ms2.manuscript_id) == ("ms1", "ms2")
+    assert ms1.catalogue_entries == 3
+    assert ms1.catalogue_ids == "ms1-en | ms1-da | ms1-is"
+    assert ms1.country == "Iceland | Denmark"
+    assert ms1.origin == "Iceland"
+    assert ms1.title == "Title ms1 | Annar titill"
+    assert ms1.folio == 15
+    assert ms1.terminus_post_quem == 1500
+    assert ms1.termini_post_quos == "1450 | 1500"
+    assert ms1.date_mean == 1541
+    assert ms1.date_standard_deviation == 66.45800679125628
+    assert sorted(ms1.texts) == ["t1", "t2"]
+    assert sorted(ms1.people) == ["p1", "p2"]
+    assert ms2 == deduplicate.unify([e3]).manuscripts[0]
+    assert res.conflicts == [
+        UnificationConflict("ms1", "title", ("Title ms1", "Title ms1", "Annar titill"), "join", "Title ms1 | Annar titill"),
+        UnificationConflict("ms1", "termini_post_quos", ("1500", "1450", "1500"), "join", "1450 | 1500"),
+        UnificationConflict("ms1", "folio", ("10", "0", "20"), "mean", "15"),
+        UnificationConflict("ms1", "country", ("Iceland", "Danmark", "Denmark"), "join", "Iceland | Denmark"),
+    ]
+
+
+def _assert_correctly_rounded(root: float, square: Fraction) -> None:
+    """Asserts that `root` is the float closest to the square root of `square`:
+    that the square lies between the squares of the midpoints between `root` and its neighbouring floats."""
+    assert root >= 0
+    if root > 0:
+        assert ((Fraction(root) + Fraction(math.nextafter(root, -math.inf))) / 2) ** 2 <= square
+    assert ((Fraction(root) + Fraction(math.nextafter(root, math.inf))) / 2) ** 2 >= square
+
+
+def test_date_stats() -> None:
+    rnd = random.Random(42)
+    for _ in range(1000):
+        dates = [rnd.randint(0, 2000) for _ in range(rnd.randint(2, 8))]
+        mean, stdev = deduplicate._date_stats(dates)
+        assert mean == sum(dates) // len(dates)
+        _assert_correctly_rounded(stdev, statistics.variance([Fraction(d) for d in dates]))
+    assert deduplicate._date_stats([1500, 1500]) == (1500, 0.0)
+
+
+@pytest.mark.parametrize("p, q", [(0, 1), (4, 1), (2, 1), (1, 3), (10 ** 40 + 1, 7), (7, 10 ** 40 + 1)])
+def test_sqrt_of_fraction(p: int, q: int) -> None:
+    _assert_correctly_rounded(deduplicate._sqrt_of_fraction(p, q), Fraction(p, q))
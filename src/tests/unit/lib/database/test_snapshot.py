@@ -0,0 +1,130 @@
+import weakref
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from lib.database import snapshot
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+
+
+@pytest.fixture
+def db() -> DatabaseSQLiteImpl:
+    db = DatabaseSQLiteImpl(get_engine(':memory:'))
+    db.setup_db()
+    db.add_data([Person("p1", "Jón", "Jónsson"), Person("p2", "Jón", "Jónsson"), Person("p3", "Árni", "Magnússon")], [], [])
+    return db
+
+
+def test_get_person_names_inverse() -> None:
+    res = snapshot.get_person_names_inverse({"a": "x", "b": "y", "c": "x"})
+    assert res == {"x": ["a", "c"], "y": ["b"]}
+
+
+def test_snapshot_roundtrip(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "lookups.snapshot")
+    snapshot.write_snapshot(db, path)
+    res = snapshot.read_snapshot(path, db.get_generation())
+    assert res == snapshot.make_snapshot(db)
+    assert res is not None
+    assert res.person_names_inverse == {"Jón Jónsson": ["p1", "p2"], "Árni Magnússon": ["p3"]}
+
+
+def test_snapshot_outdated(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "lookups.snapshot")
+    snapshot.write_snapshot(db, path)
+    assert snapshot.read_snapshot(path, "another generation") is None
+    assert snapshot.read_snapshot(str(tmp_path / "missing"), db.get_generation()) is None
+
+
+def test_handler_lookups(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "lookups.snapshot")
+    lazy = DataHandler(db)
+    snapshot.write_snapshot(db, path)
+    from_snapshot = DataHandler(db, path)
+    assert "person_names" in from_snapshot.__dict__
+    assert "person_names" not in lazy.__dict__
+    assert lazy.person_names == from_snapshot.person_names
+    assert lazy.person_names_inverse == from_snapshot.person_names_inverse
+    assert lazy.manuscripts == from_snapshot.manuscripts == {}
+    assert lazy.texts == from_snapshot.texts == []
+
+
+def test_mapped_lookups(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    db.add_data([], [make_entry("ms1", ["Njála"], ["p1"]), make_entry("ms2", ["Egils saga", "Njála"], [])],
+                [make_manuscript(make_entry("ms1", ["Njála"], ["p1"])), make_manuscript(make_entry("ms2", ["Egils saga", "Njála"], []))])
+    path = str(tmp_path / "lookups.snapshot")
+    snapshot.write_snapshot(db, path)
+    res = snapshot.read_snapshot(path, db.get_generation())
+    assert res is not None
+    assert res.person_names["p3"] == "Árni Magnússon"
+    assert res.person_names.get("p4") is None
+    assert "p1" in res.person_names and 1 not in res.person_names
+    with pytest.raises(KeyError):
+        res.manuscripts["ms3"]
+    assert res.manuscripts == db.ms_lookup_dict()
+    assert sorted(res.texts) == ["Egils saga", "Njála"]
+    assert res.texts[-1] == res.texts[1] and res.texts[:5] == list(res.texts)
+    with pytest.raises(IndexError):
+        res.texts[2]
+    lazy = DataHandler(db)
+    handler = DataHandler(db, path)
+    for options in ("manuscript_options", "person_options", "text_options"):
+        expected, mapped = getattr(lazy, options), getattr(handler, options)
+        assert mapped.keys == expected.keys
+        assert [mapped.format(k) for k in mapped.keys] == [expected.format(k) for k in expected.keys]
+
+
+def test_replace_mapped_snapshot(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = str(tmp_path / "lookups.snapshot")
+    snapshot.write_snapshot(db, path)
+    old = snapshot.read_snapshot(path, db.get_generation())
+    db.add_data([Person("p4", "Jón", "Ólafsson")], [], [])
+    snapshot.write_snapshot(db, path)
+    assert old is not None
+    assert "p4" not in old.person_names and old.person_names["p1"] == "Jón Jónsson"
+    assert snapshot.read_snapshot(path, old.generation) is None
+    new = snapshot.read_snapshot(path, db.get_generation())
+    assert new is not None and new.person_names["p4"] == "Jón Ólafsson"
+    assert list(tmp_path.iterdir()) == [tmp_path / "lookups.snapshot"]
+    old.close()
+    with pytest.raises(ValueError):
+        old.person_names["p1"]
+    assert new.person_names["p1"] == "Jón Jónsson"
+
+
+def test_drop_handler(db: DatabaseSQLiteImpl, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = str(tmp_path / "lookups.snapshot")
+    snapshot.write_snapshot(db, path)
+    read_snapshot, mapped = snapshot.read_snapshot, []
+
+    def read(path: str, generation: str) -> Optional[snapshot.LookupSnapshot]:
+        res = read_snapshot(path, generation)
+        mapped.append(weakref.ref(res.mapped.data) if res and res.mapped else None)
+        return res
+
+    monkeypatch.setattr(snapshot, "read_snapshot", read)
+    handler = DataHandler(db, path)
+    options = handler.person_options
+    labels = options.labels
+    assert labels is not None and labels["p3"] == "Árni Magnússon (p3)"
+    assert labels["p3"] is labels["p3"]
+    assert list(options.keys) == sorted(labels, key=labels.__getitem__) and options.keys[0] is options.keys[0]
+    ref = mapped[0]
+    assert ref is not None
+    del handler
+    assert ref() is not None and options.format("p1") == "Jón Jónsson (p1)"
+    del options, labels
+    assert ref() is None
+
+
+def test_invalid_snapshot(db: DatabaseSQLiteImpl, tmp_path: Path) -> None:
+    path = tmp_path / "lookups.snapshot"
+    path.write_bytes(b"TOOLE-LOOKUPS-1\n")
+    assert snapshot.read_snapshot(str(path), db.get_generation()) is None
+    path.write_bytes(b"")
+    assert snapshot.read_snapshot(str(path), db.get_generation()) is None
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from lib import charts
+
+
+def _metadata(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "shelfmark": [f"AM {i} fol." for i in range(n)],
+        "terminus_post_quem": [1200 + i % 300 for i in range(n)],
+        "terminus_ante_quem": [1250 + i % 300 for i in range(n)],
+        "date_mean": [1225 + i % 300 for i in range(n)],
+        "width": [str(100 + i % 50) for i in range(n)],
+        "height": [str(150 + i % 70) for i in range(n)],
+        "support": ["Paper" if i % 3 else "Parchment" for i in range(n)],
+    })
+
+
+def test_date_plotting() -> None:
+    fig = charts.date_plotting(_metadata(100), max_points=100)
+    assert len(fig.data) == 1
+    assert fig.data[0].type == "scattergl"
+    assert len(fig.data[0].x) == 100
+    assert fig.data[0].text[0] == "AM 0 fol."
+    fig = charts.date_plotting(_metadata(101), max_points=100)
+    assert len(fig.data) == 1
+    assert fig.data[0].type == "heatmap"
+    assert np.nansum(np.array(fig.data[0].z, dtype=float)) == 101
+
+
+def test_dimensions_plotting() -> None:
+    fig = charts.dimensions_plotting(_metadata(100), max_points=100)
+    assert fig is not None
+    assert [t.name for t in fig.data] == ["Paper", "Parchment"]
+    assert all(t.type == "scattergl" for t in fig.data)
+    assert sum(len(t.x) for t in fig.data) == 100
+    fig = charts.dimensions_plotting(_metadata(101), max_points=100)
+    assert fig is not None
+    assert fig.data[0].type == "heatmap"
+    assert np.nansum(np.array(fig.data[0].z, dtype=float)) == 101
+
+
+def test_dimensions_plotting_facet() -> None:
+    fig = charts.dimensions_plotting_facet(_metadata(100))
+    assert fig is not None
+    trend = fig.data[-1]
+    assert trend.name == "overall OLS"
+    assert list(trend.x) == sorted(trend.x)
+
+
+def test_least_squares() -> None:
+    x = np.array([1.0, 2.0, 3.0, 4.0])
+    y = np.array([3.1, 4.9, 7.2, 8.8])
+    intercept, slope = charts.least_squares(x, y)
+    expected_slope, expected_intercept = np.polyfit(x, y, 1)
+    assert np.isclose(slope, expected_slope)
+    assert np.isclose(intercept, expected_intercept)
+    # all widths equal: the fit is flat through the mean
+    intercept, slope = charts.least_squares(np.array([5.0, 5.0]), np.array([1.0, 3.0]))
+    assert np.isclose(intercept + slope * 5, 2.0)
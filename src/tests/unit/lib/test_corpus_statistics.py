@@ -0,0 +1,36 @@
+import dataclasses
+
+from lib import corpus_statistics
+from lib.corpus_statistics import CorpusStatistic
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+
+
+def test_compute() -> None:
+    ppl = [Person("p1", "Árni", "Magnússon"), Person("p2", "Jón", None), Person("p3", "Jón", "Ólafsson")]
+    entries = [make_entry(f"ms{i}", ["Njáls saga"] + (["Egils saga"] if i % 2 else []), ["p1", "p2"][:i % 3]) for i in range(5)]
+    manuscripts = [make_manuscript(e) for e in entries]
+    manuscripts[1] = dataclasses.replace(manuscripts[1], date_mean=1320, country="Origin unknown", support=" ")
+    manuscripts[2] = dataclasses.replace(manuscripts[2], date_mean=0, country="Denmark", texts=["Njáls saga"] * 2)
+    res = corpus_statistics.compute(ppl, entries, manuscripts)
+    assert set(res) == set(CorpusStatistic)
+    assert res[CorpusStatistic.Totals] == [("Manuscripts", 5), ("Catalogue entries", 5), ("Texts", 2), ("People", 3),
+                                           ("Dated manuscripts", 4)]
+    assert res[CorpusStatistic.Centuries] == [("1300–1399", 1), ("1500–1599", 3), ("Undated", 1)]
+    assert res[CorpusStatistic.Countries] == [("Iceland", 3), ("Denmark", 1), ("Unknown", 1)]
+    assert res[CorpusStatistic.Supports] == [("Paper", 4), ("Unknown", 1)]
+    assert res[CorpusStatistic.Repositories] == [("Stofnun Árna Magnússonar", 5)]
+    assert res[CorpusStatistic.Texts] == [("Njáls saga", 5), ("Egils saga", 2)]
+    assert res[CorpusStatistic.People] == [("Árni Magnússon (p1)", 3), ("Jón (p2)", 1)]
+
+
+def test_compute_empty() -> None:
+    res = corpus_statistics.compute([], [], [])
+    assert res[CorpusStatistic.Totals][0] == ("Manuscripts", 0)
+    assert all(not rows for s, rows in res.items() if s != CorpusStatistic.Totals)
+
+
+def test_columns() -> None:
+    for statistic in CorpusStatistic:
+        assert len(statistic.columns) == 2
+        assert statistic.title
@@ -1 +1,166 @@
-from lib import datahandler
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from lib.browse import MAX_PAGE_SIZE, BrowseEntity, BrowsePage
+from lib.corpus_statistics import CorpusStatistic
+from lib.database.duckdb.database_duckdb_impl import DatabaseDuckDBImpl
+from lib.database.memory.database_memory_impl import DatabaseMemoryImpl
+from lib.database.sqlite.database_sqlite_impl import (DatabaseSQLiteImpl,
+                                                      get_engine)
+from lib.datahandler import DataHandler
+from lib.groups import Group, GroupCatalogue, GroupType
+from lib.utils import SearchOptions
+
+
+class _CountingDatabase:
+    """Wraps a database and counts how often all groups are loaded."""
+
+    def __init__(self, db: DatabaseSQLiteImpl) -> None:
+        self.db = db
+        self.loads = 0
+
+    def get_all_groups(self) -> list[Group]:
+        self.loads += 1
+        return self.db.get_all_groups()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.db, name)
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "data.db")
+    DatabaseSQLiteImpl(get_engine(path)).setup_db()
+    return path
+
+
+@pytest.fixture
+def db(db_path: str) -> _CountingDatabase:
+    return _CountingDatabase(DatabaseSQLiteImpl(get_engine(db_path)))
+
+
+@pytest.fixture
+def handler(db: _CountingDatabase) -> DataHandler:
+    return DataHandler(db)  # type: ignore
+
+
+def test_group_catalogue() -> None:
+    g1 = Group(GroupType.ManuscriptGroup, "g1", {"a"})
+    g2 = Group(GroupType.TextGroup, "g2", {"b"})
+    catalogue = GroupCatalogue(1, [g1, g2])
+    assert catalogue.get_all() == [g1, g2]
+    assert catalogue.get_by_type(GroupType.TextGroup) == [g2]
+    g2_new = Group(GroupType.PersonGroup, "g2", {"c"}, group_id=g2.group_id)
+    catalogue.put(g2_new)
+    assert catalogue.get(g2.group_id) == g2_new
+    assert catalogue.get_by_type(GroupType.TextGroup) == []
+    assert catalogue.get_by_type(GroupType.PersonGroup) == [g2_new]
+    catalogue.remove(g1.group_id)
+    assert len(catalogue) == 1
+    assert catalogue.get(g1.group_id) is None
+
+
+def test_groups_loaded_once(handler: DataHandler, db: _CountingDatabase) -> None:
+    group = Group(GroupType.ManuscriptGroup, "g", {"ms1"})
+    db.add_group(group)
+    assert handler.get_ms_groups() == [group]
+    assert handler.get_txt_groups() == []
+    assert handler.get_all_groups() == [group]
+    assert handler.get_group(group.group_id) == group
+    assert db.loads == 1
+
+
+def test_groups_write_through(handler: DataHandler, db: _CountingDatabase) -> None:
+    assert handler.get_all_groups() == []
+    group = Group(GroupType.PersonGroup, "g", {"p1", "p2"})
+    handler.add_group(group)
+    handler.add_group_items(group.group_id, {"p3"})
+    handler.remove_group_items(group.group_id, {"p1"})
+    assert handler.get_ppl_groups()[0].items == {"p2", "p3"}
+    renamed = Group(GroupType.PersonGroup, "renamed", {"p4"}, group_id=group.group_id)
+    handler.put_group(renamed)
+    assert handler.get_all_groups() == [renamed]
+    assert handler.combine_groups([group.group_id], SearchOptions.CONTAINS_ALL) == {"p4"}
+    handler.delete_group(group.group_id)
+    assert handler.get_all_groups() == []
+    assert db.loads == 1
+
+
+def test_groups_changed_by_other_process(handler: DataHandler, db: _CountingDatabase, db_path: str) -> None:
+    other = DatabaseSQLiteImpl(get_engine(db_path))
+    assert handler.get_all_groups() == []
+    group = Group(GroupType.TextGroup, "g", {"t1"})
+    other.add_group(group)
+    assert handler.get_all_groups() == [group]
+    assert db.loads == 2
+    mine = Group(GroupType.TextGroup, "mine", {"t2"})
+    other.add_group_items(group.group_id, {"t3"})
+    handler.add_group(mine)
+    assert handler.get_group(group.group_id) == Group(GroupType.TextGroup, "g", {"t1", "t3"}, group.date, group.group_id)
+    assert handler.get_group(mine.group_id) == mine
+    assert db.loads == 3
+
+
+def test_select_options(handler: DataHandler) -> None:
+    handler.manuscripts = {"ms2": ["AM 2 fol.", "Möðruvallabók"], "ms1": ["AM 1 fol."]}
+    handler.person_names = {"p1": "jón", "p2": "Árni", "p3": "Bjarni"}
+    handler.texts = ["Njála", "Egils saga"]
+    assert handler.manuscript_options.keys == ["ms1", "ms2"]
+    assert handler.manuscript_options.format("ms2") == "AM 2 fol. / Möðruvallabók (ms2)"
+    assert handler.person_options.keys == ["p3", "p1", "p2"]
+    assert handler.person_options.format("p1") == "jón (p1)"
+    assert handler.text_options.keys == ["Egils saga", "Njála"]
+    assert handler.text_options.format("Njála") == "Njála"
+    # computed only once
+    assert handler.person_options is handler.person_options
+
+
+def test_browse(handler: DataHandler, db: _CountingDatabase, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[tuple[Any, ...]] = []
+
+    def browse(*args: Any) -> BrowsePage:
+        calls.append(args)
+        return BrowsePage(0, args[4], pd.DataFrame())
+
+    monkeypatch.setattr(db, "browse", browse)
+    handler.browse(BrowseEntity.People, " jón ")
+    handler.browse(BrowseEntity.Texts, sort_by="manuscripts", descending=True, page=3, page_size=20)
+    handler.browse(BrowseEntity.Manuscripts, page=0, page_size=10 ** 6)
+    assert calls == [
+        (BrowseEntity.People, "jón", "last_name", False, 0, 50),
+        (BrowseEntity.Texts, "", "manuscripts", True, 40, 20),
+        (BrowseEntity.Manuscripts, "", "shelfmark", False, 0, MAX_PAGE_SIZE),
+    ]
+    with pytest.raises(ValueError):
+        handler.browse(BrowseEntity.Texts, sort_by="shelfmark")
+
+
+def test_make_duckdb(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lib.datahandler.DUCKDB_DATABASE_PATH", str(tmp_path / "data.duckdb"))
+    handler = DataHandler.make("duckdb")
+    assert isinstance(handler.database, DatabaseDuckDBImpl)
+    assert handler.texts == []
+    with pytest.raises(ValueError):
+        DataHandler.make("postgres")
+
+
+def test_make_memory(db_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lib.datahandler.get_engine", lambda: get_engine(db_path))
+    handler = DataHandler.make("memory")
+    assert isinstance(handler.database, DatabaseMemoryImpl)
+    assert handler.search_manuscript_data(["ms1"]).empty
+    handler.add_group(Group(GroupType.TextGroup, "group", {"Njáls saga"}))
+    assert len(DatabaseSQLiteImpl(get_engine(db_path)).get_txt_groups()) == 1
+
+
+def test_corpus_statistics(handler: DataHandler, db: _CountingDatabase) -> None:
+    assert all(df.empty for df in handler.corpus_statistics.values())
+    db.add_corpus_statistics({CorpusStatistic.Supports: [("Paper", 2), ("Parchment", 1)]})
+    assert handler.corpus_statistics[CorpusStatistic.Supports].empty
+    res = DataHandler(db).corpus_statistics  # type: ignore
+    assert list(res[CorpusStatistic.Supports].columns) == ["Support", "Manuscripts"]
+    assert res[CorpusStatistic.Supports].values.tolist() == [["Paper", 2], ["Parchment", 1]]
+    assert res[CorpusStatistic.Texts].empty
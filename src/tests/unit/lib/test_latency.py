@@ -0,0 +1,45 @@
+from lib import latency
+from lib.latency import Histogram, LatencyStats
+
+
+def test_histogram() -> None:
+    h = Histogram()
+    for ms in [0.05, 0.3, 0.3, 3, 7, 7, 7, 40, 90, 20000]:
+        h.add(ms)
+    assert h.count == 10
+    assert h.max_ms == 20000
+    assert h.quantile(0.5) == 10
+    assert h.quantile(0.8) == 50
+    assert h.quantile(0.95) == 20000
+    assert h.quantile(0) == 0.1
+    assert Histogram().quantile(0.5) == 0
+
+
+def test_stats() -> None:
+    stats = LatencyStats()
+    stats.add("a", 1)
+    stats.add("b", 5)
+    stats.add("b", 15)
+    df = stats.to_dataframe()
+    assert list(df["name"]) == ["b", "a"]
+    assert list(df["count"]) == [2, 1]
+    assert df["mean_ms"][0] == 10
+    assert sorted(stats) == ["a", "b"]
+    stats.reset()
+    assert stats.to_dataframe().empty
+
+
+def test_timed() -> None:
+    @latency.timed
+    def fn(x: int) -> int:
+        if x < 0:
+            raise ValueError()
+        return x
+
+    latency.reset()
+    assert fn(2) == 2
+    try:
+        fn(-1)
+    except ValueError:
+        pass
+    assert latency.methods[fn.__qualname__].count == 2
@@ -0,0 +1,40 @@
+import dataclasses
+import pickle
+
+from lib.database.sqlite.models import CatalogueEntries, Manuscripts, People
+from lib.people import Person
+from tests.conftest import make_entry, make_manuscript
+
+
+def _fresh(s: str) -> str:
+    return s.encode().decode()
+
+
+def test_compact() -> None:
+    e1 = make_entry("ms1", ["Njáls saga", "Egils saga"], ["p1"])
+    e2 = dataclasses.replace(make_entry("ms2", [_fresh("Njáls saga")], []), country=_fresh("Iceland"))
+    assert not hasattr(e1, "__dict__")
+    assert e1.texts == ("Njáls saga", "Egils saga")
+    assert e1.people == ("p1",)
+    assert e2.country is e1.country
+    assert e2.texts[0] is e1.texts[0]
+    ms = make_manuscript(e1)
+    assert not hasattr(ms, "__dict__")
+    assert ms.texts == e1.texts
+    assert pickle.loads(pickle.dumps(ms)) == ms
+
+
+def test_person() -> None:
+    p1, p2 = Person("p1", "Jón", "Jónsson"), Person("p2", _fresh("Jón"), None)  # type: ignore
+    assert not hasattr(p1, "__dict__")
+    assert p1.first_name is p2.first_name
+    assert pickle.loads(pickle.dumps(p2)) == p2
+
+
+def test_make_models() -> None:
+    e = make_entry("ms1", ["Njáls saga"], ["p1"])
+    entry = CatalogueEntries.make(e)
+    assert (entry.catalogue_id, entry.country, entry.texts, entry.people) == ("ms1-en", "Iceland", [], [])
+    ms = Manuscripts.make(make_manuscript(e))
+    assert (ms.manuscript_id, ms.date_standard_deviation, ms.texts) == ("ms1", 70.7, [])
+    assert People.make(Person("p1", "Jón", "Jónsson")).last_name == "Jónsson"
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+from lib import profiling
+from lib.profiling import BuildProfiler
+from lib.xml import tamer
+
+test_data = Path("src/tests/testdata")
+
+
+@profiling.profiled
+def _allocate(n: int) -> int:
+    return len(list(range(n)))
+
+
+def test_inactive() -> None:
+    assert profiling.get_profiler() is None
+    assert _allocate(10) == 10
+    with profiling.stage("nothing") as s:
+        s.items = 3
+
+
+def test_measure() -> None:
+    profiler = BuildProfiler()
+    with profiling.active(profiler):
+        with profiling.stage("outer") as s:
+            _allocate(100_000)
+            _allocate(10)
+            s.items = 7
+    assert profiling.get_profiler() is None
+    outer = profiler.stages["outer"]
+    assert (outer.calls, outer.items) == (1, 7)
+    assert outer.wall > 0 and outer.max_rss > 0
+    f = profiler.functions["test_profiling._allocate"]
+    assert (f.calls, f.items) == (2, 2)
+    assert outer.wall >= f.wall
+    assert f.peak_memory > 100_000 * 8
+    assert outer.peak_memory >= f.peak_memory
+    assert f.max_rss == 0
+
+
+def test_without_memory() -> None:
+    profiler = BuildProfiler(trace_memory=False)
+    with profiling.active(profiler):
+        _allocate(100_000)
+    assert profiler.functions["test_profiling._allocate"].peak_memory == 0
+
+
+def test_slowest_files() -> None:
+    profiler = BuildProfiler(slowest=3)
+    for i, seconds in enumerate([0.5, 0.1, 0.9, 0.3, 0.7]):
+        profiler.add_file(f"f{i}.xml", seconds)
+    assert profiler.slowest_files == [("f2.xml", 0.9), ("f4.xml", 0.7), ("f0.xml", 0.5)]
+
+
+def test_extractors(tmp_path: Path) -> None:
+    profiler = BuildProfiler()
+    with profiling.active(profiler):
+        with profiling.stage("catalogue") as s:
+            entries = tamer.get_metadata_from_files([test_data / "AM01-0001-is.xml"])
+            s.items = len(entries)
+    assert "tamer._load_xml_contents" in profiler.functions
+    assert profiler.functions["metadata.get_folio"].calls == 1
+    assert profiler.slowest_files[0][0] == "AM01-0001-is.xml"
+    path = tmp_path / "profile" / "report.json"
+    profiler.write_report(str(path))
+    report = json.loads(path.read_text())
+    assert report["stages"][0]["name"] == "catalogue"
+    assert report["stages"][0]["items"] == 1
+    assert report["slowest_files"][0]["file"] == "AM01-0001-is.xml"
+    assert "metadata.get_folio" in profiler.summary()
@@ -90,3 +90,62 @@ def test_store_txt_by_ms_search_state(state: stateHandler.StateHandler) -> None:
     assert state.searchState.txt_by_ms.txt == new_txt
     assert state.searchState.txt_by_ms.mode == new_mode
     assert state.steps.search_txt_by_mss == stateHandler.Step.Txt_by_Ms.Store_Results
+
+
+def test_states_are_independent() -> None:
+    s1 = stateHandler.StateHandler()
+    s2 = stateHandler.StateHandler()
+    s1.store_ms_by_person_search_state(mss=["a"], ppl=["x"], mode=SearchOptions.CONTAINS_ONE)
+    assert s2.searchState.ms_by_pers == stateHandler.SearchState.MS_by_Pers()
+    assert s2.steps.search_mss_by_persons == stateHandler.Step.MS_by_Pers.Search_person
+
+
+def test_id_list() -> None:
+    ids = stateHandler.IdList(["a", "bb", "c c"])
+    assert len(ids) == 3
+    assert list(ids) == ["a", "bb", "c c"]
+    assert ids[1] == "bb"
+    assert ids == ["a", "bb", "c c"]
+    assert ids == stateHandler.IdList(("a", "bb", "c c"))
+    assert ids != ["a", "bb"]
+    assert stateHandler.IdList() == []
+    assert list(stateHandler.IdList([""])) == [""]
+    assert not stateHandler.IdList()
+
+
+def test_memory_cap() -> None:
+    state = stateHandler.StateHandler(max_bytes=stateHandler.IdList([f"AM{i:07d}" for i in range(1000)]).nbytes * 3)
+    ids = [f"AM{i:07d}" for i in range(1000)]
+    state.store_ms_by_person_search_state(mss=ids, ppl=["x"], mode=SearchOptions.CONTAINS_ONE)
+    state.store_ms_by_txt_search_state(mss=ids, txt=["y"], mode=SearchOptions.CONTAINS_ONE)
+    assert state.searchState.ms_by_pers.mss == ids
+    state.store_txt_by_ms_search_state(mss=ids, txt=ids, mode=SearchOptions.CONTAINS_ONE)
+    # the oldest results were discarded
+    assert state.nbytes <= state.max_bytes
+    assert state.searchState.ms_by_pers == stateHandler.SearchState.MS_by_Pers()
+    assert state.steps.search_mss_by_persons == stateHandler.Step.MS_by_Pers.Search_person
+    assert state.searchState.txt_by_ms.txt == ids
+    assert state.steps.search_txt_by_mss == stateHandler.Step.Txt_by_Ms.Store_Results
+
+
+def test_session_store() -> None:
+    now = [0.0]
+    active = {"a", "b", "c"}
+    store = stateHandler.SessionStore(idle_timeout=10, max_sessions=2, is_active=active.__contains__, clock=lambda: now[0])
+    a = store.get("a")
+    assert store.get("a") is a
+    assert store.get("b") is not a
+    assert len(store) == 2
+    # least recently seen session is dropped when the store is full
+    store.get("a")
+    store.get("c")
+    assert len(store) == 2
+    assert store.get("a") is a
+    # idle sessions are dropped
+    now[0] = 11
+    assert store.get("a") is not a
+    assert len(store) == 1
+    # ended sessions are dropped
+    active.remove("a")
+    store.get("b")
+    assert len(store) == 1
@@ -1,3 +1,10 @@
+import logging
+import queue
+import subprocess
+import sys
+from pathlib import Path
+
+from lib import utils
 from lib.utils import Settings
 
 
@@ -6,3 +13,45 @@ def test_nothing() -> None:
     s = Settings()
     assert s.cache
     assert s.use_cache
+
+
+def test_no_plotting_stack_on_import() -> None:
+    """The build CLI and the data handler must not load the plotting stack."""
+    code = (
+        "import sys; import lib.utils; assert 'pandas' not in sys.modules, 'pandas'; "
+        "import ops.db_init, lib.datahandler; "
+        "loaded = [m for m in ('plotly', 'statsmodels') if m in sys.modules]; assert not loaded, loaded"
+    )
+    res = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[3], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+
+
+def test_handlers_installed_once() -> None:
+    log = utils.get_logger("test_handlers_installed_once")
+    assert utils.get_logger("test_handlers_installed_once") is log
+    assert len(log.handlers) == 1
+    assert utils.get_logger("another_logger").handlers == log.handlers
+
+
+def test_shorten_log_arguments() -> None:
+    assert utils._shorten([1, 2]) == [1, 2]
+    assert utils._shorten(list(range(12))) == "[0, 1, 2, 3, 4, 5, 6, 7, 8, 9][... 2 more of 12]"
+    assert utils._shorten("x" * (utils.LOG_MAX_CHARS + 5)).endswith("[... 5 more characters]")
+    record = logging.LogRecord("x", logging.INFO, "", 0, "ids: %s", (list(range(100)),), None)
+    prepared = utils._TruncatingQueueHandler(queue.SimpleQueue()).prepare(record)
+    assert prepared.getMessage() == "ids: [0, 1, 2, 3, 4, 5, 6, 7, 8, 9][... 90 more of 100]"
+    assert record.args == (list(range(100)),)
+
+
+def test_lazy_formatting() -> None:
+    class Expensive:
+        formatted = 0
+
+        def __str__(self) -> str:
+            Expensive.formatted += 1
+            return "expensive"
+
+    log = utils.get_logger("test_lazy_formatting")
+    log.setLevel(logging.INFO)
+    log.debug("value: %s", Expensive())
+    assert Expensive.formatted == 0
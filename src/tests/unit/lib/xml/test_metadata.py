@@ -1 +1,44 @@
+import pytest
+from lxml import etree
+
 from lib.xml import metadata
+
+
+def _document(extent: str) -> etree._Element:
+    return etree.fromstring(
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0"><msDesc xml:id="AM01-0001-is"><physDesc><objectDesc><supportDesc>'
+        f'<extent>{extent}</extent></supportDesc></objectDesc></physDesc></msDesc></TEI>'
+    )
+
+
+@pytest.mark.parametrize("extent, expected", [
+    ("45", 45),
+    ("112 blöð", 112),
+    ("i + 98 + i blöð", 98),
+    ("iv. 120", 12),
+    ("3 + 218 + 3 blöð", 0),
+    (" 63 blöð alls (þar af 2 auð)", 63),
+    ("78 blöð (blöð 3-4 og 17 eru auð) Auð blöð: 3, 4 og 17.", 78),
+    ("Auð blöð: 1v og 45v", 145),
+    ("102 + i blöð (1r-45v (90 bls.) í 8vo)", 0),
+    ("ii + 80 + ii leaves (one leaf missing after fol. 7)", 807),
+    ('92 blöð <locus from="1r" to="92v">1r-92v</locus> (<dimensions><height>200</height></dimensions>)', 92),
+    ('<dimensions unit="mm"><height>205</height><width>165</width></dimensions>', 0),
+    ("", 0),
+    ("blöð alls", 0),
+    ("1040 blöð (margir hlutar)", 0),
+    ("²3 blöð", 0),
+])
+def test_get_folio(extent: str, expected: int) -> None:
+    assert metadata.get_folio(_document(extent)) == expected
+
+
+def test_get_folio_without_extent() -> None:
+    assert metadata.get_folio(etree.fromstring('<TEI xmlns="http://www.tei-c.org/ns/1.0"/>')) == 0
+
+
+def test_parse_folio() -> None:
+    assert metadata.parse_folio("154 blöð alls") == (154, True)
+    assert metadata.parse_folio("1040 blöð") == (0, False)
+    assert metadata.parse_folio("x blöð alls") == (0, False)
+    assert metadata.parse_folio(None) == (0, False)
@@ -1,8 +1,9 @@
+import threading
 from pathlib import Path
 
-import pytest
 from lxml import etree as et
 from lib.xml import tamer
+from lib.xml.context import get_context
 
 test_data = Path("src/tests/testdata")
 
@@ -23,6 +24,26 @@ def test_load_xml_contents_failing() -> None:
     assert res is None
 
 
-@pytest.mark.skip(reason="has to be done, but not a priority right now")
 def test_parse_xml_content() -> None:
-    pass
+    root = tamer._load_xml_contents(test_data / 'AM01-0001-is.xml')
+    assert root is not None
+    entry = tamer._parse_xml_content(root, 'AM01-0001-is.xml')
+    assert (entry.catalogue_id, entry.manuscript_id, entry.shelfmark) == ("AM01-0001-is", "AM01-0001", "AM 1 fol.")
+    assert entry.title == "Sögubók"
+    assert (entry.country, entry.settlement, entry.repository) == ("Ísland", "Reykjavík", "Stofnun Árna Magnússonar")
+    assert (entry.date_string, entry.terminus_post_quem, entry.terminus_ante_quem, entry.date_mean) == ("1650-1699", 1650, 1699, 1674)
+    assert (entry.support, entry.folio, entry.height, entry.width) == ("Paper", 120, "310", "195")
+    assert entry.description == "Paper / 310 x 195 mm"
+    assert sorted(entry.creator.split("; ")) == ["Jón Erlendsson", "Páll"]
+    assert sorted(entry.texts) == ["Bolla þáttur", "Laxdæla saga", "Njáls saga"]
+    assert sorted(entry.people) == ["ArnMag001", "JonErl001"]
+
+
+def test_get_context() -> None:
+    ctx = get_context()
+    assert get_context() is ctx
+    other = []
+    t = threading.Thread(target=lambda: other.append(get_context()))
+    t.start()
+    t.join()
+    assert other[0] is not ctx